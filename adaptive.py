@@ -0,0 +1,253 @@
+"""Computerized adaptive testing over the question bank with a 2PL item response model
+
+Each knowledge area has its own ability estimate, the mean (EAP) of a
+posterior over a fixed grid of abilities. The bank has only one to four
+questions per area, too few to place an area on their own, so areas borrow
+strength from each other: an area's prior is centred on the ability shown in
+the other areas, with CAT_AREA_SD of room to differ from it. The next
+question goes to the least-covered area that is still uncertain, at the bank
+difficulty closest to that area's current estimate, which is where a 2PL
+item is most informative. An area stops once the posterior's standard
+deviation drops to CAT_SE_TARGET, once it is CAT_DECISION_CONFIDENCE sure
+which side of its recommended level the user is on, after CAT_MAX_PER_AREA
+questions, or when it runs out of questions.
+
+Area scores are the share of the area's questions answered correctly, as in
+the fixed quiz; the ability estimates only decide what to ask and when to stop.
+"""
+import math
+import os
+import random
+from functools import lru_cache
+
+from question_bank import get_bank
+from scoring import SCORING_LOGIC, area_feedback, format_answer, normalize_answer
+
+
+# Position of each bank difficulty level on the ability scale
+DIFFICULTY_SCALE = {1: -1.0, 2: 0.0, 3: 1.0}
+
+# Item discrimination; 1.7 makes the logistic curve match the normal ogive.
+# Questions may override it with a "discrimination" field.
+DISCRIMINATION = 1.7
+
+SE_TARGET = float(os.environ.get('CAT_SE_TARGET', 0.75))
+# An area also stops once it is this likely to be above (or below) its
+# recommended level, since more questions would not change the roadmap
+DECISION_CONFIDENCE = float(os.environ.get('CAT_DECISION_CONFIDENCE', 0.95))
+MIN_PER_AREA = int(os.environ.get('CAT_MIN_PER_AREA', 1))
+MAX_PER_AREA = int(os.environ.get('CAT_MAX_PER_AREA', 4))
+
+# Ability grid from -4 to 4 and the log of the normal prior over the user's
+# overall ability
+PRIOR_SD = 1.5
+GRID = [i / 5 - 4 for i in range(41)]
+LOG_PRIOR = [-(theta / PRIOR_SD) ** 2 / 2 for theta in GRID]
+
+# How far an area's ability is expected to stray from the user's overall ability
+AREA_SD = float(os.environ.get('CAT_AREA_SD', 1.0))
+
+
+@lru_cache(maxsize=64)
+def _log_likelihoods(discrimination, difficulty):
+    """Return log P(correct) and log P(incorrect) at every grid point"""
+    correct = [-math.log1p(math.exp(-discrimination * (theta - difficulty))) for theta in GRID]
+    incorrect = [-math.log1p(math.exp(discrimination * (theta - difficulty))) for theta in GRID]
+    return correct, incorrect
+
+
+def probability_correct(theta, difficulty, discrimination=DISCRIMINATION):
+    """Return the 2PL probability of answering an item correctly"""
+    return 1 / (1 + math.exp(-discrimination * (theta - difficulty)))
+
+
+def expected_score(theta, levels=tuple(DIFFICULTY_SCALE), discrimination=DISCRIMINATION):
+    """Return the expected percent correct on questions at these bank difficulty levels"""
+    return round(100 * sum(probability_correct(theta, DIFFICULTY_SCALE.get(int(level), 0.0),
+                                               discrimination)
+                           for level in levels) / len(levels))
+
+
+@lru_cache(maxsize=128)
+def ability_for_score(score, levels=tuple(DIFFICULTY_SCALE)):
+    """Return the lowest grid ability whose expected score on these levels reaches score"""
+    for theta in GRID:
+        if expected_score(theta, levels) >= score:
+            return theta
+    return GRID[-1]
+
+
+def _summary(log_weights):
+    """Return the grid weights, mean and standard deviation of a log posterior"""
+    peak = max(log_weights)
+    weights = [math.exp(value - peak) for value in log_weights]
+    total = sum(weights)
+    weights = [weight / total for weight in weights]
+    mean = sum(weight * theta for weight, theta in zip(weights, GRID))
+    variance = sum(weight * (theta - mean) ** 2 for weight, theta in zip(weights, GRID))
+    return weights, mean, math.sqrt(variance)
+
+
+def _item_parameters(question):
+    return (float(question.get("discrimination", DISCRIMINATION)),
+            DIFFICULTY_SCALE.get(int(question["difficulty"]), 0.0))
+
+
+class AdaptiveSession:
+    """Ability estimates and the questions asked so far in one adaptive assessment"""
+
+    def __init__(self, bank=None, se_target=SE_TARGET, min_per_area=MIN_PER_AREA,
+                 max_per_area=MAX_PER_AREA):
+        self.bank = bank or get_bank()
+        self.se_target = se_target
+        self.min_per_area = min_per_area
+        self.max_per_area = max_per_area
+        self.areas = [area for area in SCORING_LOGIC["knowledge_areas"] if area in self.bank.areas]
+        self.log_likelihood = {area: [0.0] * len(GRID) for area in self.areas}
+        self.asked = {area: 0 for area in self.areas}
+        self.correct = {area: 0 for area in self.areas}
+        self.seen = set()
+        self.exhausted = set()
+        self.review = []
+        self._estimates = {}
+
+    @classmethod
+    def replay(cls, question_ids, answers, **kwargs):
+        """Rebuild a session from the ids asked and the answers given, in order"""
+        session = cls(**kwargs)
+        for question_id, answer in zip(question_ids, answers):
+            question = session.bank.get(question_id)
+            if question is not None:
+                session.record(question, answer)
+        return session
+
+    def record(self, question, answer):
+        """Grade an answer locally and update the area's ability estimate"""
+        area = question["area"]
+        correct = normalize_answer(answer) == normalize_answer(question["correctAnswer"])
+        self.seen.add(question["id"])
+        if area in self.log_likelihood:
+            likelihood = _log_likelihoods(*_item_parameters(question))[0 if correct else 1]
+            totals = self.log_likelihood[area]
+            for index, value in enumerate(likelihood):
+                totals[index] += value
+            self.asked[area] += 1
+            self.correct[area] += correct
+            # Every area's prior depends on the other areas' answers
+            self._estimates.clear()
+
+        self.review.append({
+            "question_id": question["id"],
+            "correct": correct,
+            "user_answer": format_answer(answer),
+            # Adaptive questions reach the browser without their answer key
+            "correct_answer": question["correctAnswer"],
+            "explanation": question["explanation"]
+        })
+        return correct
+
+    def estimate(self, area):
+        """Return the area's ability estimate, its standard error and P(at recommended level)"""
+        if area not in self._estimates:
+            # Overall ability from the other areas' answers, widened by how far
+            # this area may differ from it, is the area's prior
+            overall = list(LOG_PRIOR)
+            for other, totals in self.log_likelihood.items():
+                if other != area:
+                    for index, value in enumerate(totals):
+                        overall[index] += value
+            _, center, spread = _summary(overall)
+            spread = math.sqrt(spread ** 2 + AREA_SD ** 2)
+
+            weights, mean, se = _summary([
+                -((theta - center) / spread) ** 2 / 2 + value
+                for theta, value in zip(GRID, self.log_likelihood[area])])
+            cut = ability_for_score(SCORING_LOGIC["recommended_levels"].get(area, 0),
+                                    self._levels(area))
+            above = sum(weight for weight, theta in zip(weights, GRID) if theta >= cut)
+            self._estimates[area] = (mean, se, above)
+        return self._estimates[area]
+
+    def _levels(self, area):
+        """Return the difficulty of each of the area's bank questions, as a hashable tuple"""
+        return tuple(sorted(level for level, (_, size) in self.bank.areas[area]["difficulties"].items()
+                            for _ in range(size)))
+
+    def _next_in_area(self, area, theta, rng):
+        """Return an unseen question's record number at the difficulty nearest theta"""
+        levels = sorted(self.bank.areas[area]["difficulties"],
+                        key=lambda level: abs(DIFFICULTY_SCALE.get(int(level), 0.0) - theta))
+        for level in levels:
+            start, size = self.bank.bucket(area, level)
+            # A random probe usually lands on an unseen question at once
+            for _ in range(4):
+                number = self.bank.sample_numbers(area, 1, difficulty=level, rng=rng)[0]
+                if self.bank.record(number)["id"] not in self.seen:
+                    return number
+            for position in range(start, start + size):
+                number = self.bank.bucket_entry(position)
+                if self.bank.record(number)["id"] not in self.seen:
+                    return number
+        return None
+
+    def finished(self, area):
+        """Return whether the area needs no more questions"""
+        if area in self.exhausted or self.asked[area] >= self.max_per_area:
+            return True
+        if self.asked[area] < self.min_per_area:
+            return False
+        _, se, above = self.estimate(area)
+        return se <= self.se_target or max(above, 1 - above) >= DECISION_CONFIDENCE
+
+    def next_question(self, rng=random):
+        """Return the record number of the next question to ask, or None when done"""
+        candidates = sorted(
+            (area for area in self.areas if not self.finished(area)),
+            key=lambda area: (self.asked[area], -self.estimate(area)[1]))
+        for area in candidates:
+            number = self._next_in_area(area, self.estimate(area)[0], rng)
+            if number is not None:
+                return number
+            # Every question in the area has been asked
+            self.exhausted.add(area)
+        return None
+
+    def progress(self):
+        """Return how many questions were answered and where each area stands"""
+        return {
+            "answered": len(self.review),
+            "areas": {area: {"questions": self.asked[area],
+                             "done": self.finished(area)} for area in self.areas}
+        }
+
+    def evaluation(self):
+        """Return the evaluation in the score_answers shape, with ability estimates"""
+        weights = SCORING_LOGIC["weight_by_area"]
+        recommended_levels = SCORING_LOGIC["recommended_levels"]
+        areas = {}
+        weighted_score = 0.0
+        weighted_total = 0.0
+        for area in SCORING_LOGIC["knowledge_areas"]:
+            recommended = recommended_levels.get(area, 0)
+            if self.asked.get(area):
+                theta, se, _ = self.estimate(area)
+                score = round(100 * self.correct[area] / self.asked[area])
+                weighted_score += weights.get(area, 1.0) * score
+                weighted_total += weights.get(area, 1.0)
+            else:
+                theta, se, score = None, None, 0
+            areas[area] = {
+                "score": score,
+                "recommended": recommended,
+                "feedback": area_feedback(area, score, recommended),
+                "ability": None if theta is None else round(theta, 2),
+                "standard_error": None if se is None else round(se, 2),
+                "questions": self.asked.get(area, 0)
+            }
+
+        return {
+            "score": round(weighted_score / weighted_total) if weighted_total else 0,
+            "areas": areas,
+            "review": list(self.review),
+            "adaptive": True
+        }
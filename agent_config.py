@@ -0,0 +1,115 @@
+"""Evaluator agent definition: system prompt, memory blocks and model settings
+
+Only imported when an agent has to be created, so serving requests with an
+existing agent never loads these literals or the letta_client types.
+"""
+import json
+
+from letta_client import CreateBlock
+
+from roadmap_builder import ROADMAP_TEMPLATES
+from scoring import SCORING_LOGIC
+
+
+CORE_INSTRUCTIONS = """You are a Learning Path Generator specialized in evaluating programming skills and creating personalized learning roadmaps.
+
+Your primary tasks:
+1. Evaluate users on questions about algorithms and data structures from the question bank
+2. Calculate scores for each knowledge area
+3. Generate a personalized 6-week learning roadmap based on evaluation results
+4. Provide detailed feedback on correct and incorrect answers
+5. Return data in proper JSON format
+
+Assessment areas include:
+- Binary Search
+- Two Pointers
+- Breadth First Search (BFS)
+- Depth First Search (DFS)/Backtracking
+- Priority Queue/Heap
+- Graph Algorithms
+- Dynamic Programming
+- Miscellaneous Algorithm Concepts
+
+When evaluating users:
+- Use ONLY the questions and scores given in each message
+- Calculate percentage-based scores for each knowledge area
+- Identify strengths and weaknesses to personalize the learning path
+- Provide explanations for correct answers in the review section
+
+When generating learning paths:
+- Create a 6-week structured roadmap with weekly breakdown
+- Include specific topics based on evaluation results
+- Provide estimated study hours per week
+- Recommend resources and exercises for each topic"""
+
+SYSTEM_PROMPT = """You are a Learning Path Generator specialized in evaluating programming skills and creating personalized learning roadmaps.
+
+You have multiple memory blocks:
+1. core_instructions - Contains your operation guidelines
+2. user_history - Tracks user interactions and evaluations
+3. scoring_logic - Contains scoring weights and recommended levels
+4. roadmap_templates - Contains templates for generating personalized roadmaps
+
+When conducting evaluations:
+1. Use ONLY the questions included in the message
+2. Calculate scores based on the scoring_logic for each knowledge area
+3. After an evaluation, update the user_history with the results
+4. Generate detailed feedback for each question with explanations
+5. Create a personalized learning roadmap based on the evaluation results
+
+Always return data in properly formatted JSON to ensure compatibility with the frontend.
+
+Your tone should be professional, encouraging, and educational."""
+
+LLM_CONFIG = {
+    "model": "claude-3-5-sonnet-20241022",
+    "model_endpoint_type": "anthropic",
+    "temperature": 0.7,
+    "context_window": 16000,
+    "max_tokens": 4000
+}
+
+EMBEDDING_CONFIG = {
+    "embedding_model": "text-embedding-ada-002",
+    "embedding_endpoint_type": "openai",
+    "embedding_dim": 1536
+}
+
+
+def memory_blocks():
+    """Return the memory blocks a new evaluator agent starts with"""
+    return [
+        CreateBlock(
+            label="core_instructions",
+            value=CORE_INSTRUCTIONS
+        ),
+        CreateBlock(
+            label="user_history",
+            value=json.dumps({
+                "evaluations_completed": 0,
+                "last_evaluation": None,
+                "roadmaps_generated": 0
+            })
+        ),
+        CreateBlock(
+            label="scoring_logic",
+            value=json.dumps(SCORING_LOGIC)
+        ),
+        CreateBlock(
+            label="roadmap_templates",
+            value=json.dumps(ROADMAP_TEMPLATES)
+        )
+    ]
+
+
+def agent_settings():
+    """Return the keyword arguments for client.agents.create"""
+    return {
+        "name": "LearningPathGenerator",
+        "system": SYSTEM_PROMPT,
+        "agent_type": "chat_only_agent",
+        "memory_blocks": memory_blocks(),
+        "llm_config": LLM_CONFIG,
+        "embedding_config": EMBEDDING_CONFIG,
+        "description": "An evaluator that assesses programming knowledge and creates personalized learning paths"
+    }
@@ -0,0 +1,144 @@
+"""Pool of identically configured evaluator agents with least-loaded scheduling"""
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from agent_resolver import AgentResolver
+from client_factory import is_not_found
+
+
+class AgentSlot:
+    """One pooled agent: its resolver, current load and health"""
+
+    def __init__(self, index, resolver):
+        self.index = index
+        self.resolver = resolver
+        self.in_flight = 0
+        self.users = 0
+        self.failures = 0
+
+
+class AgentPool:
+    """Spread users across N evaluator agents
+
+    Each user sticks to the agent they were first given, which is the healthy
+    agent with the fewest in-flight calls at that moment (ties go to the agent
+    with fewest users). A call failing because its agent is missing (404) makes
+    the slot verify the agent again; only if the server confirms it is gone is
+    it replaced, by the agent named after the slot (``name``, then
+    ``name-1``, ``name-2``...) or a new one with that name. Outages and
+    timeouts are left to the circuit breaker and never replace an agent.
+    """
+
+    def __init__(self, client, create_agent, size=1, agent_ids=(),
+                 name="LearningPathGenerator", max_users=100000,
+                 revalidate_interval=300, failure_backoff=30):
+        self.client = client
+        self.create_agent = create_agent
+        self.name = name
+        self.max_users = max_users
+        self.revalidate_interval = revalidate_interval
+        self.failure_backoff = failure_backoff
+        agent_ids = list(agent_ids)
+        self.slots = [
+            AgentSlot(index, self._resolver(
+                agent_ids[index] if index < len(agent_ids) else None,
+                name if index == 0 else f"{name}-{index}"))
+            for index in range(max(1, size))
+        ]
+        self._users = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _resolver(self, agent_id, name):
+        return AgentResolver(self.client, agent_id, self.create_agent, name=name,
+                             revalidate_interval=self.revalidate_interval,
+                             failure_backoff=self.failure_backoff)
+
+    def agent_for(self, user_id=None):
+        """Return the agent id for a user, assigning the least-loaded agent once"""
+        with self._lock:
+            index = self._users.get(user_id)
+            candidates = sorted(self.slots, key=lambda slot: (
+                slot.index != index, slot.in_flight, slot.users, slot.index))
+
+        # Fall back to the next least-loaded agent if the sticky one is down
+        for slot in candidates:
+            agent_id = slot.resolver.resolve()
+            if agent_id:
+                if user_id is not None:
+                    self._assign(user_id, slot)
+                return agent_id
+        return None
+
+    def spread(self, count):
+        """Return up to count distinct agent ids, least-loaded first, for concurrent calls"""
+        with self._lock:
+            candidates = sorted(self.slots, key=lambda slot: (
+                slot.in_flight, slot.users, slot.index))
+
+        agent_ids = []
+        for slot in candidates[:count]:
+            agent_id = slot.resolver.resolve()
+            if agent_id:
+                agent_ids.append(agent_id)
+        return agent_ids
+
+    def warm_up(self):
+        """Resolve every pooled agent now so the first requests don't wait on it"""
+        return [slot.resolver.resolve() for slot in self.slots]
+
+    def _assign(self, user_id, slot):
+        with self._lock:
+            previous = self._users.get(user_id)
+            if previous != slot.index:
+                if previous is not None:
+                    self.slots[previous].users -= 1
+                slot.users += 1
+            self._users[user_id] = slot.index
+            self._users.move_to_end(user_id)
+            while len(self._users) > self.max_users:
+                _, evicted = self._users.popitem(last=False)
+                self.slots[evicted].users -= 1
+
+    def _slot_for(self, agent_id):
+        for slot in self.slots:
+            if slot.resolver.agent_id == agent_id:
+                return slot
+        return None
+
+    @contextmanager
+    def track(self, agent_id):
+        """Count a call as in flight on its agent and record whether it failed"""
+        slot = self._slot_for(agent_id)
+        if slot is None:
+            yield
+            return
+
+        with self._lock:
+            slot.in_flight += 1
+        try:
+            yield
+        except Exception as e:
+            if is_not_found(e):
+                with self._lock:
+                    slot.failures += 1
+                print(f"Agent {agent_id} was not found, verifying it again")
+                slot.resolver.invalidate()
+            raise
+        else:
+            with self._lock:
+                slot.failures = 0
+        finally:
+            with self._lock:
+                slot.in_flight -= 1
+
+    def stats(self):
+        """Return each agent's id, load and health"""
+        with self._lock:
+            return [{
+                "agent_id": slot.resolver.agent_id,
+                "in_flight": slot.in_flight,
+                "failures": slot.failures,
+                "replacements": slot.resolver.replacements,
+                "users": slot.users
+            } for slot in self.slots]
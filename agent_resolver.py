@@ -0,0 +1,122 @@
+"""Cached, single-flight resolution of the evaluator agent"""
+import threading
+import time
+
+from client_factory import is_not_found, request_options
+from metrics import LETTA_CALL_LATENCY, track_letta_call
+
+
+class AgentResolver:
+    """Resolve the evaluator agent id without a network call on every request
+
+    A verified agent id is reused for ``revalidate_interval`` seconds. Only one
+    caller at a time retrieves or creates the agent; concurrent callers reuse
+    the previous id while it revalidates, or wait for the result when there is
+    none. After a failed resolution callers get None until ``failure_backoff``
+    seconds have passed, instead of each retrying against a broken server.
+
+    Only an agent the server reports missing (404) is given up. It is then
+    replaced by an existing agent called ``name``, or a new agent with that
+    name, so restarts reuse the agents earlier runs created.
+    """
+
+    def __init__(self, client, agent_id, create_agent, name=None,
+                 revalidate_interval=300, failure_backoff=30):
+        self.client = client
+        self.agent_id = agent_id
+        self.create_agent = create_agent
+        self.name = name
+        self.replacements = 0
+        self.revalidate_interval = revalidate_interval
+        self.failure_backoff = failure_backoff
+        self._verified_at = None
+        self._failed_at = None
+        self._resolving = False
+        self._condition = threading.Condition()
+
+    def resolve(self):
+        """Return a verified agent id, or None if it cannot be resolved"""
+        with self._condition:
+            now = time.monotonic()
+            if self._verified_at is not None and now - self._verified_at < self.revalidate_interval:
+                return self.agent_id
+            if self._failed_at is not None and now - self._failed_at < self.failure_backoff:
+                return None
+
+            if self._resolving:
+                # Keep serving the last verified agent while it is revalidated
+                if self._verified_at is not None:
+                    return self.agent_id
+                while self._resolving:
+                    self._condition.wait()
+                return self.agent_id if self._failed_at is None else None
+
+            self._resolving = True
+            agent_id = self.agent_id
+
+        resolved_id = None
+        try:
+            resolved_id = self._retrieve_or_create(agent_id)
+        finally:
+            with self._condition:
+                if resolved_id:
+                    if agent_id and resolved_id != agent_id:
+                        self.replacements += 1
+                    self.agent_id = resolved_id
+                    self._verified_at = time.monotonic()
+                    self._failed_at = None
+                else:
+                    self._verified_at = None
+                    self._failed_at = time.monotonic()
+                self._resolving = False
+                self._condition.notify_all()
+
+        return resolved_id
+
+    def _retrieve_or_create(self, agent_id):
+        # Try to retrieve the agent to confirm it exists
+        if agent_id:
+            try:
+                with track_letta_call("agent_retrieve"):
+                    self.client.agents.retrieve(
+                        agent_id=agent_id, request_options=request_options("retrieve"))
+                print(f"Using existing agent: {agent_id}")
+                return agent_id
+            except Exception as e:
+                print(f"Error retrieving agent: {e}")
+                # An outage or timeout says nothing about the agent; keep it
+                if not is_not_found(e):
+                    return None
+                print(f"Agent {agent_id} no longer exists, will replace it")
+
+        if self.name:
+            try:
+                existing_id = self._find_by_name(self.name)
+            except Exception as e:
+                print(f"Error looking up agent {self.name}: {e}")
+                return None
+            if existing_id:
+                print(f"Using existing agent {self.name}: {existing_id}")
+                return existing_id
+
+        # Create a new agent; create_agent reports failure by returning None
+        start = time.perf_counter()
+        new_agent_id = self.create_agent(self.name)
+        LETTA_CALL_LATENCY.observe(time.perf_counter() - start, purpose="agent_create",
+                                   outcome="ok" if new_agent_id else "error")
+        if new_agent_id:
+            print(f"New agent created with ID: {new_agent_id}")
+        else:
+            print("Failed to create agent")
+        return new_agent_id
+
+    def _find_by_name(self, name):
+        with track_letta_call("agent_retrieve"):
+            agents = self.client.agents.list(
+                name=name, limit=1, request_options=request_options("retrieve"))
+        return agents[0].id if agents else None
+
+    def invalidate(self):
+        """Force the next resolve() to verify the agent again"""
+        with self._condition:
+            self._verified_at = None
@@ -1,528 +1,147 @@
-from flask import Flask, request, jsonify, render_template, session
-from letta_client import Letta
-from letta_client import MessageCreate, CreateBlock
+from flask import Flask, request, jsonify, render_template, session, g
+import atexit
 import json
 import os
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 # Use the built-in uuid module
 from uuid import uuid4
 from datetime import datetime
+from adaptive import AdaptiveSession
+from agent_pool import AgentPool
+from chat_cache import ChatCache, chat_context_fingerprint
+from chat_history import append_turn, recent_turns
+from circuit_breaker import CircuitBreaker
+from cohort import CohortError, detect_format, read_cohort, stream_ndjson
+from client_factory import create_letta_client, request_options
+from compression import choose_encoding, compress_response
+from degraded import degraded_chat_reply, mark_degraded
+from flows import Call, FlowRunner, Gather, OnDone, Reply, Spawn, Wait
+from json_extract import (FEEDBACK_SCHEMA, ROADMAP_ENRICHMENT_SCHEMA,
+                          JsonExtractionError, extract_json)
+from memory_writer import MemoryWriter
+from metrics import (JSON_EXTRACTION_FAILURES, JSON_EXTRACTION_LATENCY, REGISTRY,
+                     REQUEST_LATENCY, RESPONSE_CHARS, Gauge, track_letta_call)
+from prompts import (chat_prompt, evaluation_feedback_prompt,
+                     roadmap_enrichment_prompt)
+from question_bank import get_bank
+from roadmap_builder import build_roadmap, merge_enrichment
+from roadmap_cache import RoadmapCache, roadmap_fingerprint
+from roadmap_prefetch import RoadmapPrefetcher
+from scoring import score_answers
+from session_store import SessionRecord, create_session_store
+from static_assets import IMMUTABLE, asset_url, get_assets
 
 
 app = Flask(__name__, static_url_path='',
             static_folder='static', template_folder='templates')
 # Secret key for Flask session management
 app.secret_key = os.environ.get('SECRET_KEY', 'dev_secret_key')
+# Templates link static files through the fingerprinted asset manifest
+app.jinja_env.globals['asset_url'] = asset_url
 
-# Initialize Letta client
-client = Letta(base_url=os.environ.get(
-    'LETTA_BASE_URL', 'http://localhost:8283'))
+# Initialize Letta client with a sized keep-alive pool and retries
+client, letta_transport = create_letta_client()
 
 # Set the agent ID directly
 AGENT_ID = "agent-dd9653df-eb47-4de5-8aac-c18187692a3e"
 
-# User sessions to track individual user data
-user_sessions = {}
+# User sessions to track individual user data (backend set by SESSION_STORE)
+user_sessions = create_session_store()
+
+# Scores are computed locally; set LLM_FEEDBACK=0 to skip the agent's
+# personalised feedback and return the deterministic feedback instead
+LLM_FEEDBACK = os.environ.get('LLM_FEEDBACK', '1') == '1'
+
+# An agent handles its messages one at a time, so feedback is only split when
+# the pool has several agents (AGENT_POOL_SIZE > 1): the areas are divided
+# between them, one combined request per agent run concurrently, and groups
+# still running after FEEDBACK_TIMEOUT seconds keep the deterministic
+# feedback. With one agent, or FEEDBACK_FANOUT=0, every area goes in one call.
+FEEDBACK_FANOUT = os.environ.get('FEEDBACK_FANOUT', '1') == '1'
+FEEDBACK_TIMEOUT = float(os.environ.get('FEEDBACK_TIMEOUT', 20))
+FEEDBACK_WORKERS = int(os.environ.get('FEEDBACK_WORKERS', 16))
+feedback_executor = ThreadPoolExecutor(max_workers=FEEDBACK_WORKERS)
+atexit.register(feedback_executor.shutdown, wait=False)
+
+# Batches user_history updates into periodic background block writes
+memory_writer = MemoryWriter(
+    client, interval=float(os.environ.get('MEMORY_FLUSH_INTERVAL', 5)),
+    max_attempts=int(os.environ.get('MEMORY_MAX_ATTEMPTS', 5)),
+    max_queued=int(os.environ.get('MEMORY_MAX_QUEUED', 100)))
+atexit.register(memory_writer.shutdown)
+
+# Generated roadmaps keyed by level, bucketed area scores and profile
+roadmap_cache = RoadmapCache(
+    max_size=int(os.environ.get('ROADMAP_CACHE_SIZE', 512)),
+    ttl=int(os.environ.get('ROADMAP_CACHE_TTL', 86400)))
+
+# Answers to recurring chat questions, matched by question similarity
+# within the same coarse user context
+chat_cache = ChatCache(
+    max_size=int(os.environ.get('CHAT_CACHE_SIZE', 1024)),
+    ttl=int(os.environ.get('CHAT_CACHE_TTL', 21600)),
+    threshold=float(os.environ.get('CHAT_CACHE_THRESHOLD', 0.8)))
+
+# Serve the whole quiz at once ("fixed") or one question at a time chosen by
+# the item response model ("adaptive"), which asks fewer questions
+ASSESSMENT_MODE = os.environ.get('ASSESSMENT_MODE', 'fixed')
+
+# Roadmaps are built locally and returned at once; the agent then fills in
+# topics and resources in the background. Set ROADMAP_ENRICH=0 to skip that.
+ROADMAP_ENRICH = os.environ.get('ROADMAP_ENRICH', '1') == '1'
+roadmap_executor = ThreadPoolExecutor(
+    max_workers=int(os.environ.get('ROADMAP_ENRICH_WORKERS', 4)))
+atexit.register(roadmap_executor.shutdown, wait=False)
+
+# Enrichment starts as soon as an evaluation is stored, since the frontend
+# asks for the roadmap right after; generate_roadmap waits up to
+# ROADMAP_PREFETCH_WAIT seconds for a job still in flight. ROADMAP_PREFETCH=0
+# starts enrichment only when the roadmap is requested.
+ROADMAP_PREFETCH = os.environ.get('ROADMAP_PREFETCH', '1') == '1'
+ROADMAP_PREFETCH_WAIT = float(os.environ.get('ROADMAP_PREFETCH_WAIT', 2))
+roadmap_prefetcher = RoadmapPrefetcher(
+    ttl=int(os.environ.get('ROADMAP_PREFETCH_TTL', 600)))
+
+
+def wait_for_agent(agent_id, timeout=None):
+    """Poll until a new agent can be retrieved, backing off between attempts
+
+    Returns False if it is still not ready after ``timeout`` seconds
+    (AGENT_READY_TIMEOUT); callers then use it anyway, as before.
+    """
+    timeout = float(os.environ.get('AGENT_READY_TIMEOUT', 10)) if timeout is None else timeout
+    deadline = time.monotonic() + timeout
+    delay = 0.05
+    while True:
+        try:
+            client.agents.retrieve(agent_id=agent_id, request_options=request_options("retrieve"))
+            return True
+        except Exception as e:
+            if time.monotonic() + delay > deadline:
+                print(f"Warning: agent {agent_id} not ready after {timeout}s: {e}")
+                return False
+        time.sleep(delay)
+        delay = min(delay * 2, 1.0)
 
 
-def create_evaluator_agent():
+def create_evaluator_agent(name=None):
     """Create a new evaluator agent with predefined questions and scoring logic"""
     try:
-        # Initialize memory blocks for persistent state
-        memory_blocks = [
-            CreateBlock(
-                label="core_instructions",
-                value="""You are a Learning Path Generator specialized in evaluating programming skills and creating personalized learning roadmaps.
-
-Your primary tasks:
-1. Evaluate users based on 16 predefined questions about algorithms and data structures
-2. Calculate scores for each knowledge area
-3. Generate a personalized 6-week learning roadmap based on evaluation results
-4. Provide detailed feedback on correct and incorrect answers
-5. Return data in proper JSON format
-
-Assessment areas include:
-- Binary Search
-- Two Pointers
-- Breadth First Search (BFS)
-- Depth First Search (DFS)/Backtracking
-- Priority Queue/Heap
-- Graph Algorithms
-- Dynamic Programming
-- Miscellaneous Algorithm Concepts
-
-When evaluating users:
-- Use ONLY the predefined questions stored in your assessment_questions_* memory blocks
-- Calculate percentage-based scores for each knowledge area
-- Identify strengths and weaknesses to personalize the learning path
-- Provide explanations for correct answers in the review section
-
-When generating learning paths:
-- Create a 6-week structured roadmap with weekly breakdown
-- Include specific topics based on evaluation results
-- Provide estimated study hours per week
-- Recommend resources and exercises for each topic"""
-            ),
-            # Split assessment questions into multiple blocks to avoid the 5000 character limit
-            CreateBlock(
-                label="assessment_questions_1",
-                value=json.dumps([
-                    {
-                        "id": 1,
-                        "area": "Binary Search",
-                        "question": "Which type of traversal does breadth first search do?",
-                        "options": [
-                            {"id": "A", "text": "Level-order traversal"},
-                            {"id": "B", "text": "In-order traversal"},
-                            {"id": "C", "text": "Post-order traversal"},
-                            {"id": "D", "text": "Pre-order traversal"}
-                        ],
-                        "correctAnswer": "A",
-                        "explanation": "Breadth First Search traverses a tree or graph level by level, which is known as Level-order traversal."
-                    },
-                    {
-                        "id": 2,
-                        "area": "Binary Search",
-                        "question": "Which algorithm should you use to find a node that is close to the root of the tree?",
-                        "options": [
-                            {"id": "A", "text": "Breadth First Search"},
-                            {"id": "B", "text": "Depth First Search"}
-                        ],
-                        "correctAnswer": "A",
-                        "explanation": "Breadth First Search is ideal for finding nodes close to the root since it explores nodes level by level, starting from the root."
-                    },
-                    {
-                        "id": 3,
-                        "area": "Binary Search",
-                        "question": "A person thinks of a number between 1 and 1000. You may ask any number of questions, provided that the question can be answered with either 'yes' or 'no'. What is the minimum number of questions needed to guarantee you know the number?",
-                        "options": [
-                            {"id": "A", "text": "10"},
-                            {"id": "B", "text": "8"},
-                            {"id": "C", "text": "11"},
-                            {"id": "D", "text": "1000"}
-                        ],
-                        "correctAnswer": "A",
-                        "explanation": "Using binary search, you need log₂(1000) ≈ 9.97 questions, which rounds up to 10 questions."
-                    },
-                    {
-                        "id": 4,
-                        "area": "Binary Search",
-                        "question": "What is the best way of checking if an element exists in a sorted array once in terms of time complexity?",
-                        "options": [
-                            {"id": "A", "text": "Linear Search"},
-                            {"id": "B", "text": "Binary Search"},
-                            {"id": "C", "text": "Quick Select"},
-                            {"id": "D", "text": "Hash Set"}
-                        ],
-                        "correctAnswer": "B",
-                        "explanation": "Binary Search has O(log n) time complexity, which is optimal for searching in a sorted array."
-                    }
-                ])
-            ),
-            CreateBlock(
-                label="assessment_questions_2",
-                value=json.dumps([
-                    {
-                        "id": 5,
-                        "area": "DFS/Backtracking",
-                        "question": "Which data structure is used in a depth first search?",
-                        "options": [
-                            {"id": "A", "text": "Stack"},
-                            {"id": "B", "text": "Heap"},
-                            {"id": "C", "text": "Array"},
-                            {"id": "D", "text": "Queue"}
-                        ],
-                        "correctAnswer": "A",
-                        "explanation": "Depth First Search uses a Stack data structure (or recursion, which implicitly uses the call stack)."
-                    },
-                    {
-                        "id": 6,
-                        "area": "DFS/Backtracking",
-                        "question": "Which of the following problems can be solved with backtracking?",
-                        "options": [
-                            {"id": "A", "text": "Generating subsets"},
-                            {"id": "B", "text": "Generating random numbers"},
-                            {"id": "C", "text": "Sorting integers"},
-                            {"id": "D", "text": "Generating permutations"}
-                        ],
-                        "correctAnswer": "A,D",
-                        "explanation": "Backtracking is ideal for generating all possible combinations (subsets) and arrangements (permutations)."
-                    },
-                    {
-                        "id": 7,
-                        "area": "Dynamic Programming",
-                        "question": "What are the two properties the problem needs to have for dynamic programming to be applicable?",
-                        "options": [
-                            {"id": "A", "text": "Optimal substructure"},
-                            {"id": "B", "text": "Overlapping subproblems"},
-                            {"id": "C", "text": "Non-overlapping subproblems"},
-                            {"id": "D", "text": "Constant time subproblems"}
-                        ],
-                        "correctAnswer": "A,B",
-                        "explanation": "Dynamic Programming requires optimal substructure (solutions can be constructed from optimal solutions to subproblems) and overlapping subproblems (same subproblems are solved multiple times)."
-                    },
-                    {
-                        "id": 8,
-                        "area": "Dynamic Programming",
-                        "question": "For the longest increasing subsequence problem, what is the recurrence relation?",
-                        "options": [
-                            {"id": "A", "text": "dp[i] = dp[i] + 1"},
-                            {"id": "B", "text": "dp[i] = dp[i] + dp[i - 1]"},
-                            {"id": "C",
-                                "text": "dp[i] = (dp[i] + 1) for j in 0 to i"},
-                            {"id": "D",
-                                "text": "dp[i] = max(dp[i], dp[j] + 1) for j in 0 to i"}
-                        ],
-                        "correctAnswer": "D",
-                        "explanation": "The recurrence relation for LIS is dp[i] = max(dp[i], dp[j] + 1) for j in 0 to i, where dp[i] represents the length of the LIS ending at index i."
-                    }
-                ])
-            ),
-            CreateBlock(
-                label="assessment_questions_3",
-                value=json.dumps([
-                    {
-                        "id": 9,
-                        "area": "Graph",
-                        "question": "What's the relationship between a tree and a graph?",
-                        "options": [
-                            {"id": "A", "text": "No relationship"},
-                            {"id": "B", "text": "A tree is a special graph"},
-                            {"id": "C", "text": "A graph is a special tree"},
-                            {"id": "D", "text": "They are the same thing"}
-                        ],
-                        "correctAnswer": "B",
-                        "explanation": "A tree is a special type of graph that is connected, acyclic, and has n-1 edges for n nodes."
-                    },
-                    {
-                        "id": 10,
-                        "area": "Graph",
-                        "question": "Which of the traversal algorithms can be used to find whether two nodes are connected?",
-                        "options": [
-                            {"id": "A", "text": "Both BFS and DFS"},
-                            {"id": "B", "text": "Neither BFS nor DFS"},
-                            {"id": "C", "text": "Only DFS"},
-                            {"id": "D", "text": "Only BFS"}
-                        ],
-                        "correctAnswer": "A",
-                        "explanation": "Both BFS and DFS can be used to determine if two nodes are connected in a graph by starting at one node and checking if the other node is reachable."
-                    },
-                    {
-                        "id": 11,
-                        "area": "Miscellaneous",
-                        "question": "Which of the following uses divide and conquer strategy?",
-                        "options": [
-                            {"id": "A", "text": "Merge Sort"},
-                            {"id": "B", "text": "Insertion sort"},
-                            {"id": "C", "text": "Heap sort"},
-                            {"id": "D", "text": "Bubble sort"}
-                        ],
-                        "correctAnswer": "A",
-                        "explanation": "Merge Sort is a classic divide and conquer algorithm that splits the array in half, recursively sorts each half, and then merges the sorted halves."
-                    },
-                    {
-                        "id": 12,
-                        "area": "Miscellaneous",
-                        "question": "How does quick sort divide the problem into subproblems?",
-                        "options": [
-                            {"id": "A", "text": "Divide the array into a stray element and the rest of the array"},
-                            {"id": "B", "text": "Divide the array into two based on whether an element is smaller than an arbitrary value"},
-                            {"id": "C", "text": "Divide the array into two equal halves by index"},
-                            {"id": "D", "text": "Quick sort does not use divide and conquer"}
-                        ],
-                        "correctAnswer": "B",
-                        "explanation": "Quick Sort divides the array into two parts based on a pivot value: elements smaller than the pivot and elements greater than the pivot."
-                    }
-                ])
-            ),
-            CreateBlock(
-                label="assessment_questions_4",
-                value=json.dumps([
-                    {
-                        "id": 13,
-                        "area": "Priority Queue/Heap",
-                        "question": "A heap is a ...?",
-                        "options": [
-                            {"id": "A", "text": "Hash Table"},
-                            {"id": "B", "text": "Array"},
-                            {"id": "C", "text": "Queue"},
-                            {"id": "D", "text": "Tree"}
-                        ],
-                        "correctAnswer": "D",
-                        "explanation": "A heap is a specialized tree-based data structure (specifically a complete binary tree) that satisfies the heap property."
-                    },
-                    {
-                        "id": 14,
-                        "area": "Two Pointers",
-                        "question": "Which two pointer techniques do you use to check if a string is a palindrome?",
-                        "options": [
-                            {"id": "A", "text": "Two pointers moving in opposite direction"},
-                            {"id": "B", "text": "Prefix sum"},
-                            {"id": "C", "text": "Fast-slow pointers"},
-                            {"id": "D", "text": "Sliding window"}
-                        ],
-                        "correctAnswer": "A",
-                        "explanation": "To check if a string is a palindrome, use two pointers - one starting from the beginning and the other from the end, moving towards each other and comparing characters."
-                    },
-                    {
-                        "id": 15,
-                        "area": "Miscellaneous",
-                        "question": "What does the following code do?\n```python\ndef f(arr1, arr2):\n    i, j = 0, 0\n    new_arr = []\n    while i < len(arr1) and j < len(arr2):\n        if arr1[i] < arr2[j]:\n            new_arr.append(arr1[i])\n            i += 1\n        else:\n            new_arr.append(arr2[j])\n            j += 1\n    new_arr.extend(arr1[i:])\n    new_arr.extend(arr2[j:])\n    return new_arr\n```",
-                        "options": [
-                            {"id": "A", "text": "Find the intersection of two arrays"},
-                            {"id": "B", "text": "Finding median values of 2 arrays"},
-                            {"id": "C", "text": "Check if one array is a subsequence of the other"},
-                            {"id": "D", "text": "Merge two sorted arrays"}
-                        ],
-                        "correctAnswer": "D",
-                        "explanation": "This code implements the merge step of merge sort, combining two sorted arrays into a single sorted array by comparing elements and taking the smaller one each time."
-                    },
-                    {
-                        "id": 16,
-                        "area": "BFS",
-                        "question": "What data structure is primarily used in Breadth First Search?",
-                        "options": [
-                            {"id": "A", "text": "Stack"},
-                            {"id": "B", "text": "Queue"},
-                            {"id": "C", "text": "Linked List"},
-                            {"id": "D", "text": "Hash Table"}
-                        ],
-                        "correctAnswer": "B",
-                        "explanation": "Breadth First Search uses a Queue data structure to keep track of nodes to visit next, ensuring that nodes are processed in level order."
-                    }
-                ])
-            ),
-            CreateBlock(
-                label="user_history",
-                value=json.dumps({
-                    "evaluations_completed": 0,
-                    "last_evaluation": None,
-                    "roadmaps_generated": 0
-                })
-            ),
-            CreateBlock(
-                label="scoring_logic",
-                value=json.dumps({
-                    "knowledge_areas": [
-                        "Binary Search",
-                        "Two Pointers",
-                        "BFS",
-                        "DFS/Backtracking",
-                        "Priority Queue/Heap",
-                        "Graph",
-                        "Dynamic Programming",
-                        "Miscellaneous"
-                    ],
-                    "weight_by_area": {
-                        "Binary Search": 1.0,
-                        "Two Pointers": 1.0,
-                        "BFS": 1.0,
-                        "DFS/Backtracking": 1.0,
-                        "Priority Queue/Heap": 1.0,
-                        "Graph": 1.0,
-                        "Dynamic Programming": 1.0,
-                        "Miscellaneous": 1.0
-                    },
-                    "recommended_levels": {
-                        "Binary Search": 80,
-                        "Two Pointers": 75,
-                        "BFS": 70,
-                        "DFS/Backtracking": 65,
-                        "Priority Queue/Heap": 70,
-                        "Graph": 65,
-                        "Dynamic Programming": 60,
-                        "Miscellaneous": 75
-                    }
-                })
-            ),
-            CreateBlock(
-                label="roadmap_templates",
-                value=json.dumps({
-                    "beginner": {
-                        "title": "Beginner's Path to Algorithmic Mastery",
-                        "weekly_structure": [
-                            {
-                                "week": 1,
-                                "focus": "Foundations",
-                                "hours_per_week": 10,
-                                "modules": 3,
-                                "lessons": 6
-                            },
-                            {
-                                "week": 2,
-                                "focus": "Basic Data Structures",
-                                "hours_per_week": 12,
-                                "modules": 4,
-                                "lessons": 8
-                            },
-                            {
-                                "week": 3,
-                                "focus": "Searching Algorithms",
-                                "hours_per_week": 12,
-                                "modules": 3,
-                                "lessons": 9
-                            },
-                            {
-                                "week": 4,
-                                "focus": "Sorting Algorithms",
-                                "hours_per_week": 14,
-                                "modules": 4,
-                                "lessons": 12
-                            },
-                            {
-                                "week": 5,
-                                "focus": "Graph Basics",
-                                "hours_per_week": 14,
-                                "modules": 3,
-                                "lessons": 9
-                            },
-                            {
-                                "week": 6,
-                                "focus": "Introduction to Dynamic Programming",
-                                "hours_per_week": 15,
-                                "modules": 4,
-                                "lessons": 8
-                            }
-                        ]
-                    },
-                    "intermediate": {
-                        "title": "Intermediate Algorithm Advancement",
-                        "weekly_structure": [
-                            {
-                                "week": 1,
-                                "focus": "Advanced Data Structures",
-                                "hours_per_week": 12,
-                                "modules": 4,
-                                "lessons": 8
-                            },
-                            {
-                                "week": 2,
-                                "focus": "Binary Search Applications",
-                                "hours_per_week": 14,
-                                "modules": 3,
-                                "lessons": 9
-                            },
-                            {
-                                "week": 3,
-                                "focus": "Depth-First and Breadth-First Search",
-                                "hours_per_week": 15,
-                                "modules": 4,
-                                "lessons": 12
-                            },
-                            {
-                                "week": 4,
-                                "focus": "Dynamic Programming Patterns",
-                                "hours_per_week": 16,
-                                "modules": 4,
-                                "lessons": 8
-                            },
-                            {
-                                "week": 5,
-                                "focus": "Advanced Graph Algorithms",
-                                "hours_per_week": 15,
-                                "modules": 3,
-                                "lessons": 9
-                            },
-                            {
-                                "week": 6,
-                                "focus": "Problem-Solving Strategies",
-                                "hours_per_week": 14,
-                                "modules": 4,
-                                "lessons": 10
-                            }
-                        ]
-                    },
-                    "advanced": {
-                        "title": "Advanced Algorithm Mastery",
-                        "weekly_structure": [
-                            {
-                                "week": 1,
-                                "focus": "Complex Data Structures",
-                                "hours_per_week": 15,
-                                "modules": 4,
-                                "lessons": 10
-                            },
-                            {
-                                "week": 2,
-                                "focus": "Advanced Binary Search Techniques",
-                                "hours_per_week": 16,
-                                "modules": 3,
-                                "lessons": 9
-                            },
-                            {
-                                "week": 3,
-                                "focus": "Advanced Graph Theory",
-                                "hours_per_week": 18,
-                                "modules": 4,
-                                "lessons": 12
-                            },
-                            {
-                                "week": 4,
-                                "focus": "Dynamic Programming Optimization",
-                                "hours_per_week": 20,
-                                "modules": 5,
-                                "lessons": 15
-                            },
-                            {
-                                "week": 5,
-                                "focus": "Advanced Algorithm Design",
-                                "hours_per_week": 18,
-                                "modules": 4,
-                                "lessons": 12
-                            },
-                            {
-                                "week": 6,
-                                "focus": "Competitive Programming Strategies",
-                                "hours_per_week": 15,
-                                "modules": 4,
-                                "lessons": 10
-                            }
-                        ]
-                    }
-                })
-            )
-        ]
+        # The agent definition is only loaded when one has to be created
+        from agent_config import agent_settings
 
+        settings = agent_settings()
+        if name:
+            settings["name"] = name
         agent = client.agents.create(
-            name="LearningPathGenerator",
-            system="""You are a Learning Path Generator specialized in evaluating programming skills and creating personalized learning roadmaps.
-
-You have multiple memory blocks:
-1. core_instructions - Contains your operation guidelines
-2. assessment_questions_1 through assessment_questions_4 - Contain the 16 predefined assessment questions split across blocks
-3. user_history - Tracks user interactions and evaluations
-4. scoring_logic - Contains scoring weights and recommended levels
-5. roadmap_templates - Contains templates for generating personalized roadmaps
-
-When conducting evaluations:
-1. Use ONLY the questions from the assessment_questions_* memory blocks
-2. Calculate scores based on the scoring_logic for each knowledge area
-3. After an evaluation, update the user_history with the results
-4. Generate detailed feedback for each question with explanations
-5. Create a personalized learning roadmap based on the evaluation results
-
-Always return data in properly formatted JSON to ensure compatibility with the frontend.
-
-Your tone should be professional, encouraging, and educational.""",
-            agent_type="chat_only_agent",
-            memory_blocks=memory_blocks,
-            llm_config={
-                "model": "claude-3-5-sonnet-20241022",
-                "model_endpoint_type": "anthropic",
-                "temperature": 0.7,
-                "context_window": 16000,
-                "max_tokens": 4000
-            },
-            embedding_config={
-                "embedding_model": "text-embedding-ada-002",
-                "embedding_endpoint_type": "openai",
-                "embedding_dim": 1536
-            },
-            description="An evaluator that assesses programming knowledge and creates personalized learning paths"
+            **settings,
+            request_options=request_options("create")
         )
 
-        # Wait a moment for the agent to initialize fully
-        time.sleep(2)
+        # Wait until the agent can be used rather than for a fixed time
+        wait_for_agent(agent.id)
 
         print(f"Agent created successfully with ID: {agent.id}")
         return agent.id
@@ -531,6 +150,13 @@ Your tone should be professional, encouraging, and educational.""",
         return None
 
 
+def user_message(content):
+    """Build a user message for the agent"""
+    # Imported here so letta_client loads with the first agent call, not the app
+    from letta_client import MessageCreate
+    return MessageCreate(role="user", content=content)
+
+
 def extract_assistant_message(response):
     """Extract message content from different response formats"""
     if hasattr(response, 'assistant_message'):
@@ -552,28 +178,83 @@ def extract_assistant_message(response):
     return "No response found"
 
 
-def get_or_create_agent():
-    """Get the existing agent or create a new one if needed"""
-    global AGENT_ID
+# Trips on the failure or slow-call rate of recent Letta calls; while it is
+# open, routes skip the agent and answer from local data, flagged "degraded"
+letta_breaker = CircuitBreaker(
+    "letta",
+    window=float(os.environ.get('BREAKER_WINDOW', 60)),
+    min_calls=int(os.environ.get('BREAKER_MIN_CALLS', 5)),
+    failure_rate=float(os.environ.get('BREAKER_FAILURE_RATE', 0.5)),
+    slow_call_seconds=float(os.environ.get('BREAKER_SLOW_CALL_SECONDS', 15)),
+    slow_call_rate=float(os.environ.get('BREAKER_SLOW_CALL_RATE', 0.5)),
+    open_seconds=float(os.environ.get('BREAKER_OPEN_SECONDS', 30)),
+    probes=int(os.environ.get('BREAKER_PROBES', 2)))
+
+
+# Pool of evaluator agents; each one's verified handle is cached and only
+# one request at a time may create it. AGENT_POOL_IDS reuses existing agents;
+# other slots reuse the agent named AGENT_NAME (then AGENT_NAME-1, ...) so
+# agents created by an earlier run are found again after a restart.
+agent_pool = AgentPool(
+    client, create_evaluator_agent,
+    size=int(os.environ.get('AGENT_POOL_SIZE', 1)),
+    agent_ids=[AGENT_ID] + [agent_id for agent_id in os.environ.get(
+        'AGENT_POOL_IDS', '').split(',') if agent_id and agent_id != AGENT_ID],
+    name=os.environ.get('AGENT_NAME', 'LearningPathGenerator'),
+    revalidate_interval=float(os.environ.get('AGENT_REVALIDATE_INTERVAL', 300)),
+    failure_backoff=float(os.environ.get('AGENT_FAILURE_BACKOFF', 30)))
+
+
+def warm_up():
+    """Load letta_client and resolve every pooled agent once, off the request path"""
+    start = time.perf_counter()
+    client.load()
+    agent_ids = agent_pool.warm_up()
+    print(f"Warm-up finished in {time.perf_counter() - start:.2f}s, agents: {agent_ids}")
+
+
+# Resolve the agents in the background as soon as the app is imported, so
+# the first user request (a serverless cold start) doesn't pay for
+# agents.retrieve; requests arriving meanwhile wait for the same lookup.
+# Set AGENT_WARMUP=0 to resolve agents on first use instead.
+AGENT_WARMUP = os.environ.get('AGENT_WARMUP', '1') == '1'
+if AGENT_WARMUP:
+    threading.Thread(target=warm_up, name="agent-warmup", daemon=True).start()
+
+
+def get_or_create_agent(user_id=None):
+    """Get the user's agent from the pool, creating agents if needed
+
+    Returns None while the Letta circuit is open, so callers fall back to
+    local results instead of waiting on the server.
+    """
+    if not letta_breaker.available():
+        return None
+    return agent_pool.agent_for(user_id)
 
-    # Try to retrieve the agent to confirm it exists
-    try:
-        agent = client.agents.retrieve(agent_id=AGENT_ID)
-        print(f"Using existing agent: {AGENT_ID}")
-        return AGENT_ID
-    except Exception as e:
-        print(f"Error retrieving agent: {e}")
-        print("Will create a new agent")
 
-        # Create a new agent
-        new_agent_id = create_evaluator_agent()
-        if new_agent_id:
-            AGENT_ID = new_agent_id
-            print(f"New agent created with ID: {AGENT_ID}")
-        else:
-            print("Failed to create agent")
+def send_to_agent(agent_id, messages, purpose="chat", **kwargs):
+    """Send messages to an agent, tracking its load and health in the pool
+
+    ``purpose`` labels the call's latency in /metrics. Raises
+    CircuitOpenError without calling Letta while the circuit is open.
+    """
+    with letta_breaker.guard(), agent_pool.track(agent_id), track_letta_call(purpose):
+        response = client.agents.messages.create(
+            agent_id=agent_id, messages=messages,
+            request_options=request_options("message"), **kwargs)
+    RESPONSE_CHARS.observe(len(str(extract_assistant_message(response))), purpose=purpose)
+    return response
+
 
-        return AGENT_ID
+def parse_agent_json(purpose, text, schema):
+    """Extract JSON from an agent reply, recording time taken and failures"""
+    with JSON_EXTRACTION_LATENCY.time(purpose=purpose):
+        try:
+            return extract_json(text, schema)
+        except JsonExtractionError:
+            JSON_EXTRACTION_FAILURES.inc(purpose=purpose)
+            raise
 
 
 def get_user_id():
@@ -582,622 +263,941 @@ def get_user_id():
         session['user_id'] = str(uuid4())
         print(f"Created new user ID: {session['user_id']}")
 
-    user_id = session['user_id']
+    return session['user_id']
+
 
+def load_user_record(user_id):
+    """Get a user's session record, creating it if needed"""
     # Ensure user session data exists
-    if user_id not in user_sessions:
+    record = user_sessions.get(user_id)
+    if record is None:
         print(f"Initializing session data for user: {user_id}")
-        # Initialize user session data
-        user_sessions[user_id] = {
-            'experience': None,
-            'education': None,
-            'goal': None,
-            'questions': [],
-            'answers': [],
-            'score': None,
-            'areas': {},
-            'roadmap': None,
-            'session_start': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        }
+        record = SessionRecord()
+        user_sessions.save(user_id, record)
+
+    return record
+
+
+def get_user_session():
+    """Get the user ID and their session record, creating the record if needed"""
+    user_id = get_user_id()
+    return user_id, load_user_record(user_id)
+
+
+def user_profile(record):
+    """Return the profile fields of a session record"""
+    return {
+        "experience": record.experience,
+        "education": record.education,
+        "goal": record.goal
+    }
+
+
+def session_questions(record, question_ids=None):
+    """Return the questions a quiz's answers were given for, aligned by position
+
+    The ids the browser sends with its answers are used when present, so a
+    quiz is graded against the questions it showed even if the session was
+    cleared or expired meanwhile; answers are still checked against the
+    bank. Without them the session's quiz is used, falling back to the
+    bank's default quiz.
+    """
+    bank = get_bank()
+    if question_ids:
+        # Unknown ids keep their position and are simply not graded
+        return [{"id": question_id} for question_id in question_ids]
+    return bank.questions(record.question_ids) or [
+        bank.record(number) for number in bank.default_quiz()]
+
 
-    return user_id
+def submitted_question_ids(data):
+    """Return the question ids sent with a quiz's answers, or None if absent or malformed"""
+    question_ids = data.get('question_ids')
+    if (isinstance(question_ids, list) and question_ids
+            and all(isinstance(question_id, int) for question_id in question_ids)):
+        return question_ids
+    return None
+
+
+def quiz_for(record):
+    """Return the record numbers of the user's quiz
+
+    A quiz that hasn't been submitted yet is served again, so reloading the
+    page keeps the same questions; otherwise a new one is sampled.
+    """
+    bank = get_bank()
+    if record.question_ids and not record.answers and not record.adaptive:
+        numbers = [bank.number_of(question_id) for question_id in record.question_ids]
+        if None not in numbers:
+            return numbers
+    return bank.quiz()
+
+
+def store_evaluation(user_id, record, evaluation_data):
+    """Store an evaluation in the user's session record"""
+    record.score = evaluation_data.get('score')
+    record.areas = evaluation_data.get('areas', {})
+    record.review = evaluation_data.get('review', [])
+    user_sessions.save(user_id, record)
 
 
 def update_agent_memory(agent_id, user_id, evaluation_data=None):
-    """Update agent's memory with user's evaluation data"""
-    try:
-        # Prepare update for user history
-        if evaluation_data:
-            history_update = {
-                "evaluations_completed": user_sessions[user_id].get('evaluations_completed', 0) + 1,
-                "last_evaluation": {
-                    "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                    "user_id": user_id,
-                    "scores": evaluation_data.get("areas", {}),
-                    "overall_score": evaluation_data.get("score", 0)
-                },
-                "roadmaps_generated": user_sessions[user_id].get('roadmaps_generated', 0) + 1
-            }
-        else:
-            # Just retrieve current history if no new data
-            return True
+    """Queue the user's evaluation for the agent's user_history memory block"""
+    # Just retrieve current history if no new data
+    if not evaluation_data:
+        return True
 
-        # Force memory update by creating a special message that updates memory
-        update_message = MessageCreate(
-            role="user",
-            content=f"""[SYSTEM MEMORY APPEND]
-Please append your user_history memory block with the following information:
+    # Prepare update for user history
+    history_update = {
+        "last_evaluation": {
+            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "user_id": user_id,
+            "scores": {area: data.get("score") for area, data in evaluation_data.get("areas", {}).items()},
+            "overall_score": evaluation_data.get("score", 0)
+        }
+    }
 
-{json.dumps(history_update, indent=2)}
+    # Written in the background, batched with other users' updates
+    memory_writer.enqueue(agent_id, history_update)
+    return True
 
-Please respond with "Memory appended" once you've noted these changes."""
-        )
 
-        # Send the update message without use_assistant_message flag
-        print("Updating agent memory...")
-        response = client.agents.messages.create(
-            agent_id=agent_id,
-            messages=[update_message]
-        )
-        print("Memory update response received")
+def apply_area_feedback(evaluation_data, feedback):
+    """Replace the deterministic feedback of each area the agent commented on"""
+    for area, text in feedback.items():
+        if area in evaluation_data["areas"]:
+            evaluation_data["areas"][area]["feedback"] = text
+
+
+def generate_area_feedback(agent_id, evaluation_data, user_profile):
+    """Flow asking the agent for personalised feedback on locally computed area scores
+
+    The deterministic feedback from score_answers is kept for any area the
+    agent does not return, so a failed call never fails the evaluation.
+    """
+    message = user_message(evaluation_feedback_prompt(evaluation_data, user_profile))
 
-        print(f"Memory updated for user: {user_id}")
+    try:
+        print("Sending feedback request to agent...")
+        response = yield Call(agent_id, [message], purpose="evaluation")
+        print("Feedback response received from agent")
+
+        assistant_msg = extract_assistant_message(response)
+        apply_area_feedback(evaluation_data, parse_agent_json(
+            "evaluation", assistant_msg, FEEDBACK_SCHEMA))
         return True
 
     except Exception as e:
-        print(f"Error updating agent memory: {e}")
+        print(f"Error generating feedback: {e}")
         return False
 
 
+def fan_out_area_feedback(agent_ids, evaluation_data, user_profile):
+    """Flow dividing the areas between agents and asking each for its group's feedback at once"""
+    areas = list(evaluation_data["areas"])
+    groups = [areas[index::len(agent_ids)] for index in range(len(agent_ids))]
+    print(f"Sending feedback requests for {len(areas)} areas to {len(agent_ids)} agents...")
+    replies = yield Gather(
+        [Call(agent_id, [user_message(evaluation_feedback_prompt(
+            evaluation_data, user_profile, areas=group))], purpose="evaluation")
+         for agent_id, group in zip(agent_ids, groups)],
+        timeout=FEEDBACK_TIMEOUT)
+
+    feedback = {}
+    for group, reply in zip(groups, replies):
+        try:
+            if isinstance(reply, Exception):
+                raise reply
+            group_feedback = parse_agent_json("evaluation", extract_assistant_message(reply),
+                                              FEEDBACK_SCHEMA)
+            # Each agent only answers for its own group
+            feedback.update((area, text) for area, text in group_feedback.items() if area in group)
+        except Exception as e:
+            print(f"Error generating feedback for {', '.join(group)}: {e}")
+    apply_area_feedback(evaluation_data, feedback)
+    print(f"Feedback received for {len(feedback)} of {len(areas)} areas")
+    return bool(feedback)
+
+
+# Route logic lives in the handle_* functions and flows below, shared with
+# asgi.py; Flask runs them in the request's worker thread
+flow_runner = FlowRunner(send_to_agent, feedback_executor, roadmap_executor)
+
+
+def respond(reply):
+    """Turn a handler's Reply into a Flask response"""
+    if reply.is_json:
+        response = jsonify(reply.body)
+    else:
+        response = app.response_class(reply.body, mimetype=reply.mimetype)
+    response.status_code = reply.status
+    response.headers.update(reply.headers)
+    if reply.etag:
+        response.set_etag(reply.etag)
+        return response.make_conditional(request)
+    return response
+
+
+def serve(handler, *args):
+    """Run a shared handler or flow and return its Flask response"""
+    return respond(flow_runner.run(handler, *args))
+
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+
+
+@app.after_request
+def record_request_latency(response):
+    # Streaming responses are timed up to their first byte; the upstream
+    # stream itself is measured under letta_call_duration_seconds
+    start = g.pop('request_start', None)
+    if start is not None:
+        REQUEST_LATENCY.observe(
+            time.perf_counter() - start,
+            route=request.url_rule.rule if request.url_rule else "unmatched",
+            method=request.method, status=response.status_code)
+    return response
+
+
+@app.after_request
+def compress_large_responses(response):
+    # JSON and HTML bodies over COMPRESS_MIN_BYTES; streams are left alone
+    return compress_response(response, request.headers.get('Accept-Encoding'))
+
+
 @app.route('/')
 def index():
-    # Get or create user ID
-    user_id = get_user_id()
+    # Get or create user ID and pass user session data to the template
+    user_id, user_data = get_user_session()
+    return render_template('index.html', user_data=user_data,
+                           assessment_mode=ASSESSMENT_MODE)
 
-    # Pass user session data to the template
-    user_data = user_sessions.get(user_id, {})
-    return render_template('index.html', user_data=user_data)
 
+def handle_asset(name, accept_encoding):
+    """Serve a fingerprinted asset in the best encoding the client accepts"""
+    # Names change with content, so any copy can be cached for good
+    assets = get_assets()
+    encoding = choose_encoding(accept_encoding, assets.encodings)
+    data = assets.variant(name, encoding)
+    if data is None:
+        return Reply("Not found", 404, mimetype='text/html')
+    headers = {'Vary': 'Accept-Encoding', 'Cache-Control': IMMUTABLE}
+    if encoding:
+        headers['Content-Encoding'] = encoding
+    return Reply(data, mimetype=assets.mimetype(name), headers=headers)
 
-@app.route('/api/save_profile', methods=['POST'])
-def save_profile():
-    """Save initial user profile information"""
-    data = request.json
+
+@app.route('/dist/<path:name>')
+def fingerprinted_asset(name):
+    return serve(handle_asset, name, request.headers.get('Accept-Encoding'))
+
+
+def handle_save_profile(user_id, data):
+    """Store the profile fields sent by the browser"""
     experience = data.get('experience')
     education = data.get('education')
     goal = data.get('goal')
 
     if not all([experience, education, goal]):
-        return jsonify({"error": "All profile fields are required"}), 400
-
-    # Get user ID
-    user_id = get_user_id()
+        return Reply({"error": "All profile fields are required"}, 400)
 
-    # Ensure user session exists (should be created by get_user_id, but double-check)
-    if user_id not in user_sessions:
-        # Re-initialize session data if it's missing
-        user_sessions[user_id] = {
-            'experience': None,
-            'education': None,
-            'goal': None,
-            'questions': [],
-            'answers': [],
-            'score': None,
-            'areas': {},
-            'roadmap': None,
-            'session_start': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        }
+    record = load_user_record(user_id)
 
     # Save profile data
-    user_sessions[user_id]['experience'] = experience
-    user_sessions[user_id]['education'] = education
-    user_sessions[user_id]['goal'] = goal
+    record.experience = experience
+    record.education = education
+    record.goal = goal
+    user_sessions.save(user_id, record)
 
-    return jsonify({"success": True})
+    return Reply({"success": True})
 
 
-@app.route('/api/get_questions', methods=['GET'])
-def get_questions():
-    """Get assessment questions from the agent"""
-    # Get or create agent
-    agent_id = get_or_create_agent()
-    if not agent_id:
-        return jsonify({"error": "Failed to create or retrieve agent"}), 500
+@app.route('/api/save_profile', methods=['POST'])
+def save_profile():
+    """Save initial user profile information"""
+    return serve(handle_save_profile, get_user_id(), request.json)
 
-    # Get user ID
-    user_id = get_user_id()
+
+def handle_get_questions(user_id):
+    """Serve the user's quiz and remember its question ids for scoring"""
+    record = load_user_record(user_id)
     print(f"Getting questions for user: {user_id}")
 
-    # Create message to get questions
-    message = MessageCreate(
-        role="user",
-        content="""Perform a comprehensive memory block search:
-1. Carefully archive and preserve existing assessment questions 
-2. Verify core_instructions for question generation guidelines
-3. Ensure NO EXISTING QUESTIONS ARE DELETED during retrieval
-4. Maintain historical question context
-5. Use archival retrieval methodology
-        
-        Now Please combine all the questions from your assessment_questions_1, assessment_questions_2, assessment_questions_3, and assessment_questions_4 memory blocks and Return ONLY a JSON object with this structure:
-{
-  "questions": [
-    {
-      "id": 1,
-      "question": "Question text",
-      "options": [
-        {"id": "A", "text": "Option A"},
-        {"id": "B", "text": "Option B"},
-        {"id": "C", "text": "Option C"},
-        {"id": "D", "text": "Option D"}
-      ],
-      "correctAnswer": "A"
-    }
-    // ... more questions
-  ]
-}
-        
+    # Store question ids in user session for evaluation
+    bank = get_bank()
+    numbers = quiz_for(record)
+    question_ids = [bank.record(number)['id'] for number in numbers]
+    if question_ids != record.question_ids or record.adaptive:
+        record.question_ids = question_ids
+        record.adaptive = False
+        user_sessions.save(user_id, record)
 
-Do not include any additional text or markdown code blocks."""
-    )
+    # Questions are serialised once each, letting clients revalidate with the ETag;
+    # quizzes differ per user and change when the session is cleared, so the
+    # browser must check its copy on every load
+    body, etag = bank.payload_json(numbers)
+    return Reply(body, etag=etag, headers={'Cache-Control': 'private, no-cache'})
 
-    try:
-        # Send message to agent
-        print("Sending message to agent...")
-        response = client.agents.messages.create(
-            agent_id=agent_id,
-            messages=[message],
-            use_assistant_message=True
-        )
-        print("Response received from agent")
 
-        # Extract the message content
-        assistant_msg = extract_assistant_message(response)
+@app.route('/api/get_questions', methods=['GET'])
+def get_questions():
+    """Get assessment questions from the local question bank"""
+    return serve(handle_get_questions, get_user_id())
 
-        # Remove any potential markdown code block markers
-        if assistant_msg.startswith("```json"):
-            assistant_msg = assistant_msg[7:]
-        if assistant_msg.endswith("```"):
-            assistant_msg = assistant_msg[:-3]
 
-        # Parse the JSON
-        try:
-            questions_data = json.loads(assistant_msg.strip())
+def handle_submit_answers(user_id, data):
+    """Flow scoring a submitted quiz and adding the agent's feedback"""
+    answers = data.get('answers')
 
-            # Store questions in user session
-            user_sessions[user_id]['questions'] = questions_data.get(
-                'questions', [])
+    if not answers:
+        return Reply({"error": "Answers are required"}, 400)
 
-            return jsonify(questions_data)
-        except json.JSONDecodeError as e:
-            print(f"JSON parsing error: {e}")
-            print(f"Raw response: {assistant_msg}")
-            return jsonify({"error": "Failed to parse questions data"}), 500
+    record = load_user_record(user_id)
+    print(f"Submitting answers for user: {user_id}")
 
-    except Exception as e:
-        print(f"Error getting questions: {e}")
-        return jsonify({"error": str(e)}), 500
+    # The browser sends the ids of the quiz it showed, which may predate a
+    # cleared or expired session
+    question_ids = submitted_question_ids(data)
+    if question_ids:
+        record.question_ids = question_ids
+        record.adaptive = False
+
+    # Save answers
+    record.answers = answers
+    user_sessions.save(user_id, record)
+
+    # Score locally: every question carries its correct answer and area
+    evaluation_data = score_answers(session_questions(record, question_ids), answers)
+
+    return (yield from finish_evaluation(user_id, record, evaluation_data))
 
 
 @app.route('/api/submit_answers', methods=['POST'])
 def submit_answers():
     """Submit user answers for evaluation"""
-    data = request.json
-    answers = data.get('answers')
+    return serve(handle_submit_answers, get_user_id(), request.json)
 
-    if not answers:
-        return jsonify({"error": "Answers are required"}), 400
 
-    # Get user ID
-    user_id = get_user_id()
-    print(f"Submitting answers for user: {user_id}")
+def finish_evaluation(user_id, record, evaluation_data):
+    """Flow adding the agent's feedback to a local evaluation, storing it and replying with it"""
+    # Get or create agent
+    agent_id = get_or_create_agent(user_id)
+    if not agent_id:
+        # Scores and the deterministic feedback need no agent
+        print("Agent unavailable, returning the local evaluation")
+        store_evaluation(user_id, record, evaluation_data)
+        return Reply(mark_degraded(evaluation_data))
 
-    # Verify the user session exists
-    if user_id not in user_sessions:
-        print(
-            f"Warning: User session not found for ID {user_id}, reinitializing")
-        user_sessions[user_id] = {
-            'experience': None,
-            'education': None,
-            'goal': None,
-            'questions': [],
-            'answers': [],
-            'score': None,
-            'areas': {},
-            'roadmap': None,
-            'session_start': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        }
+    try:
+        # Only the free-text feedback comes from the agent
+        personalised = True
+        agent_ids = (agent_pool.spread(len(evaluation_data["areas"]))
+                     if LLM_FEEDBACK and FEEDBACK_FANOUT else [])
+        if len(agent_ids) > 1:
+            personalised = yield from fan_out_area_feedback(
+                agent_ids, evaluation_data, user_profile(record))
+        elif LLM_FEEDBACK:
+            personalised = yield from generate_area_feedback(
+                agent_id, evaluation_data, user_profile(record))
+        if not personalised:
+            mark_degraded(evaluation_data)
 
-    # Save answers
-    user_sessions[user_id]['answers'] = answers
+        # Store evaluation in user session
+        store_evaluation(user_id, record, evaluation_data)
 
-    # Get or create agent
-    agent_id = get_or_create_agent()
-    if not agent_id:
-        return jsonify({"error": "Failed to create or retrieve agent"}), 500
-
-    # Get questions from user session
-    questions = user_sessions[user_id].get('questions', [])
-    if not questions:
-        return jsonify({"error": "No questions found for evaluation"}), 400
-
-    # Create input for evaluation
-    evaluation_input = {
-        "questions": questions,
-        "answers": answers,
-        "user_profile": {
-            "experience": user_sessions[user_id].get('experience'),
-            "education": user_sessions[user_id].get('education'),
-            "goal": user_sessions[user_id].get('goal')
-        }
-    }
+        # Update agent memory with evaluation data
+        update_agent_memory(agent_id, user_id, evaluation_data)
 
-    # Create message for evaluation
-    message = MessageCreate(
-        role="user",
-        content=f""" Comprehensive Memory Block Evaluation Protocol:
-
-Memory Search Guidelines:
-1. Conduct thorough archival search across memory blocks
-2. Review scoring_logic for persistent knowledge area weights
-3. Examine user_history for previous interaction context
-4. Verify core_instructions for evaluation methodology
-
-Archival Retrieval Instructions:
-- Preserve ALL historical evaluation data
-- Append new evaluation results to existing records
-- Maintain comprehensive user interaction history
-
-Now, evaluate the user's answers based on the following data:
-        Please evaluate the user's answers based on the following data:
-
-{json.dumps(evaluation_input, indent=2)}
-
-For each knowledge area, calculate the percentage of correct answers.
-Create a detailed evaluation with the following structure:
-1. Overall score (percentage of all correct answers)
-2. Area-by-area breakdown with scores and personalized feedback
-3. Compare the user's scores with the recommended levels
-
-Return the evaluation as a JSON object with this structure:
-{{
-  "score": 75,
-  "areas": {{
-    "Binary Search": {{
-      "score": 80,
-      "recommended": 80,
-      "feedback": "You have a good understanding of binary search concepts."
-    }},
-    ...other areas...
-  }},
-  "review": [
-    {{
-      "question_id": 1,
-      "correct": true,
-      "user_answer": "A",
-      "explanation": "Detailed explanation here..."
-    }},
-    ...other questions...
-  ]
-}}
-
-Only respond with the JSON object, no additional text."""
-    )
+        yield from prefetch_roadmap(user_id, agent_id, record)
 
-    try:
-        # Send message to agent
-        print("Sending evaluation request to agent...")
-        response = client.agents.messages.create(
-            agent_id=agent_id,
-            messages=[message]
-        )
-        print("Evaluation response received from agent")
+        return Reply(evaluation_data)
 
-        assistant_msg = extract_assistant_message(response)
+    except Exception as e:
+        # The scores are already computed, so the user still gets them; the
+        # error itself is only logged
+        print(f"Error evaluating answers, returning the local evaluation: {e!r}")
+        store_evaluation(user_id, record, evaluation_data)
+        return Reply(mark_degraded(evaluation_data))
 
-        # Process the response to extract JSON
-        try:
-            # Find JSON content
-            if "```json" in assistant_msg:
-                json_start = assistant_msg.find("```json") + 7
-                json_end = assistant_msg.find("```", json_start)
-                json_content = assistant_msg[json_start:json_end].strip()
-                evaluation_data = json.loads(json_content)
-            else:
-                # Try to extract JSON directly
-                first_brace = assistant_msg.find('{')
-                last_brace = assistant_msg.rfind('}')
 
-                if first_brace >= 0 and last_brace > first_brace:
-                    json_content = assistant_msg[first_brace:last_brace+1]
-                    evaluation_data = json.loads(json_content)
-                else:
-                    evaluation_data = json.loads(assistant_msg)
+def pending_adaptive_question(record, question_id):
+    """Return whether question_id is the adaptive question waiting for an answer"""
+    return (record.adaptive and len(record.question_ids) == len(record.answers) + 1
+            and record.question_ids[-1] == question_id)
 
-            # Store evaluation in user session
-            user_sessions[user_id]['score'] = evaluation_data.get('score')
-            user_sessions[user_id]['areas'] = evaluation_data.get('areas', {})
-            user_sessions[user_id]['review'] = evaluation_data.get(
-                'review', [])
 
-            # Update agent memory with evaluation data
-            update_agent_memory(agent_id, user_id, evaluation_data)
+def next_adaptive_question(user_id, record, assessment):
+    """Pick the next adaptive question and return the JSON body serving it, or None when done"""
+    bank = get_bank()
+    number = assessment.next_question()
+    if number is None:
+        return None
 
-            return jsonify(evaluation_data)
-        except json.JSONDecodeError as e:
-            print(f"JSON parsing error: {e}")
-            print(f"Raw response: {assistant_msg}")
-            return jsonify({"error": "Failed to parse evaluation data"}), 500
+    record.question_ids.append(bank.record(number)['id'])
+    user_sessions.save(user_id, record)
+    return (f'{{"question":{bank.public_json(number, with_answer=False)},'
+            f'"progress":{json.dumps(assessment.progress())}}}')
 
-    except Exception as e:
-        print(f"Error evaluating answers: {e}")
-        return jsonify({"error": str(e)}), 500
 
+def handle_adaptive_start(user_id):
+    """Reset the user's assessment to adaptive mode and serve its first question"""
+    record = load_user_record(user_id)
+    print(f"Starting adaptive assessment for user: {user_id}")
 
-@app.route('/api/generate_roadmap', methods=['GET'])
-def generate_roadmap():
-    """Generate a personalized learning roadmap based on evaluation results"""
-    # Get user ID
-    user_id = get_user_id()
+    record.adaptive = True
+    record.question_ids = []
+    record.answers = []
+    body = next_adaptive_question(user_id, record, AdaptiveSession())
+    if body is None:
+        return Reply({"error": "The question bank is empty"}, 500)
+    return Reply(body)
+
+
+@app.route('/api/adaptive/start', methods=['POST'])
+def adaptive_start():
+    """Start an adaptive assessment and return its first question"""
+    return serve(handle_adaptive_start, get_user_id())
+
+
+def handle_adaptive_answer(user_id, data):
+    """Flow recording an adaptive answer, then serving the next question or the evaluation"""
+    record = load_user_record(user_id)
+    if not pending_adaptive_question(record, data.get('question_id')):
+        return Reply({"error": "No adaptive question is waiting for this answer"}, 400)
+
+    record.answers.append(data.get('answer'))
+    assessment = AdaptiveSession.replay(record.question_ids, record.answers)
+    body = next_adaptive_question(user_id, record, assessment)
+    if body is not None:
+        return Reply(body)
+
+    print(f"Adaptive assessment finished for user {user_id} "
+          f"after {len(record.answers)} questions")
+    user_sessions.save(user_id, record)
+    return (yield from finish_evaluation(user_id, record, assessment.evaluation()))
+
+
+@app.route('/api/adaptive/answer', methods=['POST'])
+def adaptive_answer():
+    """Answer the current adaptive question and get the next one, or the evaluation once done"""
+    return serve(handle_adaptive_answer, get_user_id(), request.json or {})
+
+
+def handle_generate_roadmap(user_id):
+    """Flow building the user's roadmap and starting or claiming its enrichment"""
     print(f"Generating roadmap for user: {user_id}")
 
     # Verify the user session exists
-    if user_id not in user_sessions:
-        print(
-            f"Warning: User session not found for ID {user_id}, reinitializing")
-        return jsonify({"error": "Session expired. Please complete the evaluation first"}), 400
+    record = user_sessions.get(user_id)
+    if record is None:
+        print(f"Warning: User session not found for ID {user_id}")
+        return Reply({"error": "Session expired. Please complete the evaluation first"}, 400)
 
     # Check if user has completed the evaluation
-    if not user_sessions[user_id].get('score'):
-        return jsonify({"error": "Please complete the evaluation first"}), 400
-
-    # Get or create agent
-    agent_id = get_or_create_agent()
-    if not agent_id:
-        return jsonify({"error": "Failed to create or retrieve agent"}), 500
+    if record.score is None:
+        return Reply({"error": "Please complete the evaluation first"}, 400)
 
     # Create input for roadmap generation
-    roadmap_input = {
-        "user_profile": {
-            "experience": user_sessions[user_id].get('experience'),
-            "education": user_sessions[user_id].get('education'),
-            "goal": user_sessions[user_id].get('goal')
-        },
+    roadmap_input = roadmap_input_for(record)
+    cache_key = roadmap_fingerprint(roadmap_input)
+
+    # Enrichment may already have been started when the evaluation was stored
+    job = roadmap_prefetcher.claim(user_id, cache_key)
+    if job is not None:
+        done = yield Wait(job.future, ROADMAP_PREFETCH_WAIT)
+        print(f"Prefetched roadmap claimed, enrichment {'done' if done else 'in flight'}: "
+              f"{roadmap_prefetcher.stats()}")
+        roadmap_data = job.future.result() if done else job.roadmap
+        store_roadmap(user_id, record, roadmap_data)
+        if not done:
+            yield OnDone(job.future, store_enriched_roadmap, user_id, job.roadmap)
+        agent_id = get_or_create_agent(user_id)
+        if agent_id:
+            memory_writer.enqueue(agent_id, {"roadmaps_generated": 1})
+        return Reply(roadmap_data)
+
+    # Users with an equivalent profile share a cached, already enriched roadmap
+    roadmap_data = roadmap_cache.get(cache_key)
+    if roadmap_data is not None:
+        print(f"Roadmap cache hit: {roadmap_cache.stats()}")
+        roadmap_data['id'] = uuid4().hex
+        roadmap_data['overall_score'] = roadmap_input['evaluation']['score']
+        store_roadmap(user_id, record, roadmap_data)
+        return Reply(roadmap_data)
+
+    # Build the roadmap skeleton locally from roadmap_templates
+    roadmap_data = build_roadmap(roadmap_input)
+
+    agent_id = get_or_create_agent(user_id) if ROADMAP_ENRICH else None
+    if agent_id:
+        yield Spawn(enrich_roadmap, user_id, agent_id, roadmap_data, roadmap_input, cache_key)
+        memory_writer.enqueue(agent_id, {"roadmaps_generated": 1})
+    else:
+        roadmap_data['enrichment'] = "skipped"
+        if ROADMAP_ENRICH:
+            mark_degraded(roadmap_data)
+
+    # Store roadmap in user session
+    store_roadmap(user_id, record, roadmap_data)
+
+    return Reply(roadmap_data)
+
+
+@app.route('/api/generate_roadmap', methods=['GET'])
+def generate_roadmap():
+    """Generate a personalized learning roadmap based on evaluation results"""
+    return serve(handle_generate_roadmap, get_user_id())
+
+
+def roadmap_input_for(record):
+    """Return the profile and evaluation a roadmap is built from"""
+    return {
+        "user_profile": user_profile(record),
         "evaluation": {
-            "score": user_sessions[user_id].get('score'),
-            "areas": user_sessions[user_id].get('areas', {})
+            "score": record.score,
+            "areas": record.areas
         }
     }
 
-    # Create message for roadmap generation
-    message = MessageCreate(
-        role="user",
-        content=f""" Memory Block Archival Search:
-1. Conduct extensive review of roadmap_templates
-2. Archive and preserve existing roadmap structures
-3. Examine scoring_logic for persistent knowledge weightings
-4. Review user_history for comprehensive interaction context
-5. Verify core_instructions for roadmap generation methodology
-Please generate a personalized 6-week learning roadmap based on the following evaluation:
-
-{json.dumps(roadmap_input, indent=2)}
-
-Use the roadmap_templates in your memory to select an appropriate template based on the user's overall score:
-- Below 50%: beginner template
-- 50-75%: intermediate template
-- Above 75%: advanced template
-
-Then, customize the template based on the user's strengths and weaknesses in different knowledge areas.
-
-Return the roadmap as a JSON object with this structure:
-{{
-  "title": "Here's a Straightforward Roadmap to Success",
-  "level": "Intermediate",
-  "overall_score": 75,
-  "weeks": [
-    {{
-      "week": 1,
-      "focus": "Advanced Data Structures",
-      "hours": 12,
-      "modules": 4,
-      "lessons": 8,
-      "topics": [
-        "Priority Queues",
-        "Advanced Hash Tables",
-        "Segment Trees"
-      ],
-      "resources": [
-        {{
-          "type": "Tutorial",
-          "title": "Introduction to Advanced Data Structures",
-          "url": "https://example.com/tutorial"
-        }}
-      ]
-    }},
-    ...other weeks...
-  ]
-}}
-
-Ensure that:
-1. Each week addresses specific knowledge areas that need improvement
-2. The roadmap is progressive and builds skills week by week
-3. Resources are specific and relevant to the topics
-4. The hours, modules, and lessons are realistic based on the template
-
-Only respond with the JSON object, no additional text."""
-    )
+
+def store_roadmap(user_id, record, roadmap_data):
+    """Store a new roadmap in the user's session record"""
+    record.roadmap = roadmap_data
+    record.roadmaps_generated += 1
+    user_sessions.save(user_id, record)
+
+
+def store_enriched_roadmap(user_id, roadmap_data, enriched):
+    """Replace a roadmap with its enriched version if the session still holds it
+
+    A cleared session or a newer roadmap is never overwritten.
+    """
+    record = user_sessions.get(user_id)
+    if record is not None and record.roadmap and record.roadmap.get('id') == roadmap_data['id']:
+        record.roadmap = enriched
+        user_sessions.save(user_id, record)
+
+
+def prefetch_roadmap(user_id, agent_id, record):
+    """Flow starting to enrich the user's roadmap before the frontend asks for it"""
+    roadmap_prefetcher.cancel(user_id)
+    if not (ROADMAP_ENRICH and ROADMAP_PREFETCH):
+        return
+
+    roadmap_input = roadmap_input_for(record)
+    cache_key = roadmap_fingerprint(roadmap_input)
+    # A cached roadmap is served at once anyway
+    if cache_key in roadmap_cache:
+        return
+
+    roadmap_data = build_roadmap(roadmap_input)
+    future = yield Spawn(enriched_roadmap, agent_id, roadmap_data, roadmap_input, cache_key)
+    roadmap_prefetcher.add(user_id, cache_key, roadmap_data, future)
+
+
+def enrich_roadmap(user_id, agent_id, roadmap_data, roadmap_input, cache_key):
+    """Flow enriching a roadmap and storing the result in the user's session"""
+    enriched = yield from enriched_roadmap(agent_id, roadmap_data, roadmap_input, cache_key)
+    store_enriched_roadmap(user_id, roadmap_data, enriched)
+
+
+def enriched_roadmap(agent_id, roadmap_data, roadmap_input, cache_key):
+    """Flow asking the agent for each week's topics and resources, returning the enriched roadmap"""
+    message = user_message(roadmap_enrichment_prompt(roadmap_data, roadmap_input))
 
     try:
-        # Send message to agent without use_assistant_message flag
-        print("Sending roadmap request to agent...")
-        response = client.agents.messages.create(
-            agent_id=agent_id,
-            messages=[message]
-        )
-        print("Roadmap response received from agent")
+        print("Sending roadmap enrichment request to agent...")
+        response = yield Call(agent_id, [message], purpose="roadmap")
+        print("Roadmap enrichment received from agent")
 
         assistant_msg = extract_assistant_message(response)
+        enrichment = parse_agent_json("roadmap", assistant_msg, ROADMAP_ENRICHMENT_SCHEMA)
+        enriched = merge_enrichment(roadmap_data, enrichment)
 
-        # Process the response to extract JSON
-        try:
-            # Find JSON content
-            if "```json" in assistant_msg:
-                json_start = assistant_msg.find("```json") + 7
-                json_end = assistant_msg.find("```", json_start)
-                json_content = assistant_msg[json_start:json_end].strip()
-                roadmap_data = json.loads(json_content)
-            else:
-                # Try to extract JSON directly
-                first_brace = assistant_msg.find('{')
-                last_brace = assistant_msg.rfind('}')
+        # Cache the roadmap for users with an equivalent profile
+        roadmap_cache.put(cache_key, enriched)
+    except Exception as e:
+        print(f"Error enriching roadmap: {e}")
+        enriched = dict(roadmap_data, enrichment="failed")
 
-                if first_brace >= 0 and last_brace > first_brace:
-                    json_content = assistant_msg[first_brace:last_brace+1]
-                    roadmap_data = json.loads(json_content)
-                else:
-                    roadmap_data = json.loads(assistant_msg)
+    return enriched
 
-            # Store roadmap in user session
-            user_sessions[user_id]['roadmap'] = roadmap_data
-            user_sessions[user_id]['roadmaps_generated'] = user_sessions[user_id].get(
-                'roadmaps_generated', 0) + 1
 
-            return jsonify(roadmap_data)
-        except json.JSONDecodeError as e:
-            print(f"JSON parsing error: {e}")
-            print(f"Raw response: {assistant_msg}")
-            return jsonify({"error": "Failed to parse roadmap data"}), 500
+def handle_get_roadmap(user_id):
+    """Serve the roadmap stored in the user's session"""
+    record = user_sessions.get(user_id)
+    if record is None or not record.roadmap:
+        return Reply({"error": "No roadmap generated yet"}, 404)
+    return Reply(record.roadmap, headers={'Cache-Control': 'no-store'})
 
-    except Exception as e:
-        print(f"Error generating roadmap: {e}")
-        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/roadmap', methods=['GET'])
+def get_roadmap():
+    """Return the user's current roadmap; poll until "enrichment" is no longer pending"""
+    return serve(handle_get_roadmap, get_user_id())
+
+
+def cohort_feedback(evaluation_data, profile):
+    """Personalise one cohort member's feedback with the least-loaded agent"""
+    agent_id = get_or_create_agent()
+    if agent_id:
+        flow_runner.run(generate_area_feedback, agent_id, evaluation_data, profile)
+
+
+def cohort_unauthorized(authorization):
+    """Return a 401 Reply unless the request carries COHORT_TOKEN, when it is set"""
+    token = os.environ.get('COHORT_TOKEN')
+    if token and authorization != f"Bearer {token}":
+        return Reply({"error": "Unauthorized"}, 401)
+    return None
+
+
+def handle_cohort_evaluate(args, content_type, text):
+    """Parse an uploaded cohort and reply with a stream of its NDJSON results"""
+    fmt = args.get('format') or detect_format(content_type)
+    try:
+        questions, users = read_cohort(text, fmt)
+    except CohortError as e:
+        return Reply({"error": str(e)}, 400)
+
+    max_users = int(os.environ.get('COHORT_MAX_USERS', 1000))
+    if len(users) > max_users:
+        return Reply({"error": f"At most {max_users} users per request"}, 413)
+
+    workers = max(1, min(args.get('workers', 4, type=int),
+                         int(os.environ.get('COHORT_MAX_WORKERS', 8))))
+    feedback = cohort_feedback if args.get('feedback') == '1' else None
+    print(f"Evaluating cohort of {len(users)} users (feedback: {bool(feedback)})")
+
+    return Reply(stream_ndjson(questions, users, feedback=feedback, roadmap_cache=roadmap_cache,
+                               workers=workers),
+                 mimetype='application/x-ndjson')
+
+
+@app.route('/api/cohort/evaluate', methods=['POST'])
+def evaluate_cohort_upload():
+    """Evaluate a whole cohort from a CSV or JSONL body, streaming NDJSON results
+
+    Query parameters: format (csv or jsonl, default from the content type),
+    feedback=1 to add the agent's personalised feedback, and workers for
+    the number of concurrent agent calls (capped by COHORT_MAX_WORKERS).
+    When COHORT_TOKEN is set, requests must send it as a bearer token.
+    """
+    reply = cohort_unauthorized(request.headers.get('Authorization'))
+    if reply is None:
+        reply = handle_cohort_evaluate(request.args, request.content_type,
+                                       request.get_data(as_text=True))
+    return respond(reply)
+
+
+def handle_clear_session(user_id):
+    """Reset the user's session and drop any roadmap being prefetched for it"""
+    roadmap_prefetcher.cancel(user_id)
+    user_sessions.save(user_id, SessionRecord())
+    return Reply({"success": True})
 
 
 @app.route('/api/clear_session', methods=['POST'])
 def clear_session():
     """Clear the current user session for testing"""
-    # Get user ID
-    user_id = get_user_id()
+    return serve(handle_clear_session, get_user_id())
 
-    # Reset session data
-    user_sessions[user_id] = {
-        'experience': None,
-        'education': None,
-        'goal': None,
-        'questions': [],
-        'answers': [],
-        'score': None,
-        'areas': {},
-        'roadmap': None,
-        'session_start': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    }
 
-    return jsonify({"success": True})
+def build_chat_message(message, context, record=None):
+    """Build the agent message for a chat question, its user context and chat so far"""
+    return user_message(chat_prompt(message, context,
+                                    summary=record.chat_summary if record else "",
+                                    recent=recent_turns(record)))
 
 
-@app.route('/api/chat', methods=['POST'])
-def chat_with_agent():
-    """Send a chat message to the agent and get a response"""
-    data = request.json
+def record_chat(user_id, message, assistant_msg):
+    """Append a question and the assistant's reply to the user's bounded chat history"""
+    # The session may have expired while the agent was replying
+    record = user_sessions.get(user_id) or SessionRecord()
+
+    # Add to chat history
+    append_turn(record, message, assistant_msg)
+
+    user_sessions.save(user_id, record)
+
+
+def message_text(content):
+    """Return the text of a message's content, which may be a list of parts"""
+    if isinstance(content, list):
+        parts = []
+        for item in content:
+            if isinstance(item, dict):
+                parts.append(item.get('text') or '')
+            else:
+                parts.append(getattr(item, 'text', '') or '')
+        return ''.join(parts)
+    return content or ''
+
+
+def sse_event(data):
+    """Format a dict as a server-sent event"""
+    return f"data: {json.dumps(data)}\n\n"
+
+
+def cached_chat_events(answer):
+    """Return the server-sent events for a chat answer served from the cache"""
+    return [sse_event({"delta": answer}),
+            sse_event({"done": True, "response": answer, "cached": True})]
+
+
+def degraded_chat_events(context):
+    """Return the server-sent events for a local reply while the agent is unavailable"""
+    reply = degraded_chat_reply(context)
+    return [sse_event({"delta": reply}),
+            sse_event({"done": True, "response": reply, "degraded": True})]
+
+
+def chat_cache_key(context, record):
+    """Return the chat cache key for a user's context, or None once they have chat history
+
+    Answers that follow earlier turns or a summary depend on that conversation.
+    """
+    if record is not None and (record.chat_summary or recent_turns(record)):
+        return None
+    return chat_context_fingerprint(context)
+
+
+def cache_chat_answer(message, context_key, assistant_msg):
+    """Cache a chat answer unless the agent returned nothing usable"""
+    if assistant_msg and assistant_msg != "No response found":
+        chat_cache.put(message, context_key, assistant_msg)
+
+
+@app.route('/api/agent_pool_status', methods=['GET'])
+def agent_pool_status():
+    """Report each pooled agent's load and health"""
+    return jsonify(agent_pool.stats())
+
+
+@app.route('/api/http_pool_status', methods=['GET'])
+def http_pool_status():
+    """Report Letta connection pool utilisation and retry counts"""
+    return jsonify(letta_transport.stats())
+
+
+@app.route('/api/circuit_status', methods=['GET'])
+def circuit_status():
+    """Report the Letta circuit breaker's state and recent call outcomes"""
+    return jsonify(letta_breaker.stats())
+
+
+@app.route('/api/memory_status', methods=['GET'])
+def memory_status():
+    """Report the background memory writer's queue depth and lag"""
+    return jsonify(memory_writer.stats())
+
+
+# Transports whose in-flight requests letta_http_in_flight adds up; the ASGI
+# app adds its async transport while it serves
+letta_transports = [letta_transport]
+
+REGISTRY.register(Gauge(
+    "user_sessions", "Sessions held by the session store",
+    callback=lambda: len(user_sessions)))
+REGISTRY.register(Gauge(
+    "letta_http_in_flight", "Requests in flight on the Letta connection pools",
+    callback=lambda: sum(transport.stats()["in_flight"] for transport in letta_transports)))
+REGISTRY.register(Gauge(
+    "agent_in_flight", "Calls in flight per pooled agent", ["agent_id"],
+    callback=lambda: {(slot["agent_id"] or "unresolved",): slot["in_flight"]
+                      for slot in agent_pool.stats()}))
+REGISTRY.register(Gauge(
+    "chat_cache_lookups", "Chat cache lookups by result", ["result"],
+    callback=lambda: {(result,): chat_cache.stats()[result]
+                      for result in ("exact_hits", "near_hits", "misses", "skipped")}))
+REGISTRY.register(Gauge(
+    "chat_cache_hit_ratio", "Share of chat cache lookups answered from cache",
+    callback=lambda: chat_cache.stats()["hit_rate"]))
+REGISTRY.register(Gauge(
+    "chat_cache_entries", "Answers held by the chat cache",
+    callback=lambda: chat_cache.stats()["size"]))
+REGISTRY.register(Gauge(
+    "letta_circuit_open", "1 while the Letta circuit is open or half-open, else 0",
+    callback=lambda: int(letta_breaker.state != "closed")))
+REGISTRY.register(Gauge(
+    "memory_queue_depth", "Memory updates waiting to be written",
+    callback=lambda: memory_writer.stats()["queue_depth"]))
+
+
+def handle_metrics():
+    """Render the metrics registry in the Prometheus text format"""
+    return Reply(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Expose metrics in the Prometheus text format"""
+    return serve(handle_metrics)
+
+
+def handle_chat(user_id, data):
+    """Flow answering a chat message from the cache, the agent or locally"""
     message = data.get('message')
     context = data.get('context', {})
 
     if not message:
-        return jsonify({"error": "Message is required"}), 400
+        return Reply({"error": "Message is required"}, 400)
 
-    # Get user ID
-    user_id = get_user_id()
     print(f"Chat message from user: {user_id}")
 
+    # Recurring questions are answered from the cache
+    record = user_sessions.get(user_id)
+    context_key = chat_cache_key(context, record)
+    cached_msg = chat_cache.get(message, context_key)
+    if cached_msg is not None:
+        print(f"Chat cache hit: {chat_cache.stats()}")
+        record_chat(user_id, message, cached_msg)
+        return Reply({"response": cached_msg, "cached": True})
+
     # Get or create agent
-    agent_id = get_or_create_agent()
+    agent_id = get_or_create_agent(user_id)
     if not agent_id:
-        return jsonify({"error": "Failed to create or retrieve agent"}), 500
-
-    # Add context about the user and their progress
-    context_prompt = ""
-    if context.get('experience'):
-        context_prompt += f"User experience level: {context.get('experience')}\n"
-    if context.get('education'):
-        context_prompt += f"Computer science background: {context.get('education')}\n"
-    if context.get('goal'):
-        context_prompt += f"User's goal: {context.get('goal')}\n"
-
-    # Add evaluation results if available
-    if context.get('evaluationResults'):
-        results = context.get('evaluationResults')
-        context_prompt += f"\nEvaluation results:\n"
-        context_prompt += f"Overall score: {results.get('score')}%\n"
-        context_prompt += "Knowledge area scores:\n"
-        for area, data in results.get('areas', {}).items():
-            context_prompt += f"- {area}: {data.get('score')}% (recommended: {data.get('recommended')}%)\n"
-
-    # Add roadmap info if available
-    if context.get('roadmapData'):
-        roadmap = context.get('roadmapData')
-        context_prompt += f"\nCurrent learning path: {roadmap.get('title')}\n"
-        context_prompt += f"Level: {roadmap.get('level')}\n"
-
-    # Create the full message with context
-    formatted_message = f"""
-[CONVERSATION CONTEXT]
-{context_prompt}
-
-[USER QUESTION]
-{message}
-
-Please respond conversationally as the Learning Path Generator assistant. Format any code with markdown code blocks using triple backticks. Keep responses concise, educational and encouraging. If the user asks about technical concepts, provide accurate but accessible explanations.
-"""
-
-    # Create message for agent
-    chat_message = MessageCreate(
-        role="user",
-        content=formatted_message
-    )
+        return Reply(mark_degraded({"response": degraded_chat_reply(context)}))
+
+    chat_message = build_chat_message(message, context, record)
 
     try:
         # Send message to agent
         print("Sending chat message to agent...")
-        response = client.agents.messages.create(
-            agent_id=agent_id,
-            messages=[chat_message]
-        )
+        response = yield Call(agent_id, [chat_message])
         print("Chat response received from agent")
 
         # Extract the assistant message
         assistant_msg = extract_assistant_message(response)
 
-        # Save chat to user session if not already tracking chats
-        if 'chat_history' not in user_sessions[user_id]:
-            user_sessions[user_id]['chat_history'] = []
+        record_chat(user_id, message, assistant_msg)
+        cache_chat_answer(message, context_key, assistant_msg)
 
-        # Add to chat history
-        user_sessions[user_id]['chat_history'].append({
-            'role': 'user',
-            'content': message,
-            'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        })
-
-        user_sessions[user_id]['chat_history'].append({
-            'role': 'assistant',
-            'content': assistant_msg,
-            'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        })
-
-        return jsonify({
+        return Reply({
             "response": assistant_msg
         })
 
     except Exception as e:
         print(f"Error chatting with agent: {e}")
-        return jsonify({"error": str(e)}), 500
+        return Reply(mark_degraded({"response": degraded_chat_reply(context)}))
+
+
+@app.route('/api/chat', methods=['POST'])
+def chat_with_agent():
+    """Send a chat message to the agent and get a response"""
+    return serve(handle_chat, get_user_id(), request.json)
+
+
+class ChatStream:
+    """A chat message to stream from the agent, and what its reply is recorded against"""
+
+    def __init__(self, user_id, agent_id, message, chat_message, context, context_key):
+        self.user_id = user_id
+        self.agent_id = agent_id
+        self.message = message
+        self.chat_message = chat_message
+        self.context = context
+        self.context_key = context_key
+
+
+def event_stream(events):
+    """Return a Reply streaming server-sent events"""
+    return Reply(events, mimetype='text/event-stream',
+                 headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+def handle_chat_stream(user_id, data):
+    """Return a Reply for a chat message answered without the agent, else a ChatStream"""
+    message = data.get('message')
+    context = data.get('context', {})
+
+    if not message:
+        return Reply({"error": "Message is required"}, 400)
+
+    print(f"Streaming chat message from user: {user_id}")
+
+    # Recurring questions are answered from the cache as a single event
+    record = user_sessions.get(user_id)
+    context_key = chat_cache_key(context, record)
+    cached_msg = chat_cache.get(message, context_key)
+    if cached_msg is not None:
+        print(f"Chat cache hit: {chat_cache.stats()}")
+        record_chat(user_id, message, cached_msg)
+        return event_stream(cached_chat_events(cached_msg))
+
+    # Get or create agent
+    agent_id = get_or_create_agent(user_id)
+    if not agent_id:
+        return event_stream(degraded_chat_events(context))
+
+    return ChatStream(user_id, agent_id, message, build_chat_message(message, context, record),
+                      context, context_key)
+
+
+def chat_stream_delta(chunk):
+    """Return the assistant text carried by a streamed chunk, or an empty string"""
+    if getattr(chunk, 'message_type', None) != 'assistant_message':
+        return ''
+    return message_text(chunk.content)
+
+
+def finish_chat_stream(stream, chunks):
+    """Record and cache a streamed reply, returning its final event"""
+    assistant_msg = ''.join(chunks)
+    print("Chat stream finished")
+    record_chat(stream.user_id, stream.message, assistant_msg)
+    cache_chat_answer(stream.message, stream.context_key, assistant_msg)
+    return sse_event({"done": True, "response": assistant_msg})
+
+
+def failed_chat_stream(stream, chunks, error):
+    """Return the events ending a stream that failed, degraded if nothing was sent yet"""
+    print(f"Error streaming chat with agent: {error}")
+    if chunks:
+        return [sse_event({"error": str(error)})]
+    return degraded_chat_events(stream.context)
+
+
+@app.route('/api/chat/stream', methods=['POST'])
+def chat_with_agent_stream():
+    """Stream the agent's chat reply to the browser as server-sent events
+
+    Each event carries a "delta" of assistant text; the final event has
+    "done" set and the full "response", which is also saved to chat_history.
+    """
+    stream = handle_chat_stream(get_user_id(), request.json)
+    if isinstance(stream, Reply):
+        return respond(stream)
+
+    def generate():
+        chunks = []
+        try:
+            print("Streaming chat message to agent...")
+            # A stream lasts as long as the reply, so only its errors count
+            with (letta_breaker.guard(slow_after=0), agent_pool.track(stream.agent_id),
+                  track_letta_call("chat_stream")):
+                upstream = client.agents.messages.create_stream(
+                    agent_id=stream.agent_id,
+                    messages=[stream.chat_message],
+                    stream_tokens=True,
+                    request_options=request_options("stream")
+                )
+                for chunk in upstream:
+                    delta = chat_stream_delta(chunk)
+                    if delta:
+                        chunks.append(delta)
+                        yield sse_event({"delta": delta})
+
+            yield finish_chat_stream(stream, chunks)
+
+        except Exception as e:
+            yield from failed_chat_stream(stream, chunks, e)
+
+    return respond(event_stream(generate()))
 
 
 if __name__ == '__main__':
-    # Check if the agent exists at startup
-    try:
-        agent = client.agents.retrieve(agent_id=AGENT_ID)
-        print(f"Confirmed existing agent: {AGENT_ID}")
-    except Exception as e:
-        print(f"Warning: Could not retrieve agent: {e}")
-        print("A new agent will be created when needed.")
+    # The agent is checked, and created if needed, by the warm-up thread
     app.run(debug=True, port=5003)
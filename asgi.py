@@ -0,0 +1,297 @@
+"""Async (ASGI) serving mode, awaiting Letta calls instead of holding a worker thread each
+
+Serve with an ASGI server, e.g.:
+
+    hypercorn asgi:app --bind 0.0.0.0:5003
+
+One process can then hold as many concurrent evaluations as the Letta
+connection pool allows, so raise LETTA_MAX_CONNECTIONS (and
+LETTA_MAX_KEEPALIVE) to the concurrency you expect.
+
+The route logic is app.py's: its handle_* functions and flows run through
+AsyncFlowRunner (see flows.py), which keeps session store and cache access
+in worker threads and awaits the agent calls with AsyncLetta. This module
+only adapts requests and responses. The Flask app in app.py stays the WSGI
+entry point used by api/index.py.
+"""
+import asyncio
+import time
+from uuid import uuid4
+
+from quart import Quart, g, jsonify, make_response, render_template, request, session
+from quart.wrappers.response import DataBody
+
+from app import (ASSESSMENT_MODE, FEEDBACK_WORKERS, agent_pool, chat_stream_delta,
+                 cohort_unauthorized, event_stream, extract_assistant_message,
+                 failed_chat_stream, finish_chat_stream, handle_adaptive_answer,
+                 handle_adaptive_start, handle_asset, handle_chat, handle_chat_stream,
+                 handle_clear_session, handle_cohort_evaluate, handle_generate_roadmap,
+                 handle_get_questions, handle_get_roadmap, handle_metrics, handle_save_profile,
+                 handle_submit_answers, letta_breaker, letta_transport, letta_transports,
+                 load_user_record, memory_writer, sse_event)
+from app import app as flask_app
+from client_factory import create_async_letta_client, request_options
+from compression import choose_encoding, encode_response, wants_compression
+from flows import AsyncFlowRunner, Reply
+from metrics import REQUEST_LATENCY, RESPONSE_CHARS, track_letta_call
+from static_assets import asset_url
+
+
+app = Quart(__name__, static_url_path='',
+            static_folder='static', template_folder='templates')
+# Same key as the Flask app so session cookies work with either
+app.secret_key = flask_app.secret_key
+app.jinja_env.globals['asset_url'] = asset_url
+
+# Created when serving starts, inside the event loop that uses it
+async_client = None
+async_transport = None
+
+
+@app.before_serving
+async def start_letta_client():
+    global async_client, async_transport
+    async_client, async_transport = create_async_letta_client()
+    # Counted by app.py's letta_http_in_flight gauge alongside the sync pool
+    letta_transports.append(async_transport)
+
+
+@app.after_serving
+async def close_letta_client():
+    letta_transports.remove(async_transport)
+    await async_transport.aclose()
+
+
+async def send_to_agent(agent_id, messages, purpose="chat", **kwargs):
+    """Send messages to an agent, tracking its load and health in the pool"""
+    with letta_breaker.guard(), agent_pool.track(agent_id), track_letta_call(purpose):
+        response = await async_client.agents.messages.create(
+            agent_id=agent_id, messages=messages,
+            request_options=request_options("message"), **kwargs)
+    RESPONSE_CHARS.observe(len(str(extract_assistant_message(response))), purpose=purpose)
+    return response
+
+
+# Gathered feedback requests in flight across all evaluations are capped
+# at FEEDBACK_WORKERS, as the Flask app's feedback executor is
+runner = AsyncFlowRunner(send_to_agent, FEEDBACK_WORKERS)
+
+
+def get_user_id():
+    """Get or create user ID from session"""
+    if 'user_id' not in session:
+        session['user_id'] = str(uuid4())
+        print(f"Created new user ID: {session['user_id']}")
+
+    return session['user_id']
+
+
+async def stream_body(body):
+    """Yield a streamed Reply body as bytes, pulling sync iterators in a thread"""
+    if hasattr(body, '__aiter__'):
+        async for chunk in body:
+            yield chunk.encode()
+        return
+
+    chunks = iter(body)
+    while True:
+        chunk = await asyncio.to_thread(next, chunks, None)
+        if chunk is None:
+            return
+        yield chunk.encode()
+
+
+async def respond(reply):
+    """Turn a handler's Reply into a Quart response"""
+    if reply.is_json:
+        response = jsonify(reply.body)
+    elif reply.is_stream:
+        response = await make_response(stream_body(reply.body))
+        # Streams last as long as the agent's reply or the cohort takes
+        response.timeout = None
+    else:
+        response = await make_response(reply.body)
+    response.status_code = reply.status
+    response.mimetype = reply.mimetype
+    response.headers.update(reply.headers)
+    if reply.etag:
+        response.set_etag(reply.etag)
+        return await response.make_conditional(request)
+    return response
+
+
+async def serve(handler, *args):
+    """Run a shared handler or flow and return its Quart response"""
+    return await respond(await runner.run(handler, *args))
+
+
+@app.before_request
+async def start_request_timer():
+    g.request_start = time.perf_counter()
+
+
+@app.after_request
+async def record_request_latency(response):
+    start = g.pop('request_start', None)
+    if start is not None:
+        REQUEST_LATENCY.observe(
+            time.perf_counter() - start,
+            route=request.url_rule.rule if request.url_rule else "unmatched",
+            method=request.method, status=response.status_code)
+    return response
+
+
+@app.after_request
+async def compress_large_responses(response):
+    # Only buffered bodies; SSE and NDJSON streams are left alone
+    if not isinstance(response.response, DataBody) or not wants_compression(response):
+        return response
+    encoding = choose_encoding(request.headers.get('Accept-Encoding'))
+    if encoding is None:
+        response.vary.add('Accept-Encoding')
+        return response
+    return encode_response(response, await response.get_data(), encoding)
+
+
+@app.route('/')
+async def index():
+    # Get or create user ID and pass user session data to the template
+    user_data = await asyncio.to_thread(load_user_record, get_user_id())
+    return await render_template('index.html', user_data=user_data,
+                                 assessment_mode=ASSESSMENT_MODE)
+
+
+@app.route('/dist/<path:name>')
+async def fingerprinted_asset(name):
+    return await serve(handle_asset, name, request.headers.get('Accept-Encoding'))
+
+
+@app.route('/api/save_profile', methods=['POST'])
+async def save_profile():
+    """Save initial user profile information"""
+    return await serve(handle_save_profile, get_user_id(), await request.get_json())
+
+
+@app.route('/api/get_questions', methods=['GET'])
+async def get_questions():
+    """Get assessment questions from the local question bank"""
+    return await serve(handle_get_questions, get_user_id())
+
+
+@app.route('/api/submit_answers', methods=['POST'])
+async def submit_answers():
+    """Submit user answers for evaluation"""
+    return await serve(handle_submit_answers, get_user_id(), await request.get_json())
+
+
+@app.route('/api/adaptive/start', methods=['POST'])
+async def adaptive_start():
+    """Start an adaptive assessment and return its first question"""
+    return await serve(handle_adaptive_start, get_user_id())
+
+
+@app.route('/api/adaptive/answer', methods=['POST'])
+async def adaptive_answer():
+    """Answer the current adaptive question and get the next one, or the evaluation once done"""
+    return await serve(handle_adaptive_answer, get_user_id(), await request.get_json() or {})
+
+
+@app.route('/api/generate_roadmap', methods=['GET'])
+async def generate_roadmap():
+    """Generate a personalized learning roadmap based on evaluation results"""
+    return await serve(handle_generate_roadmap, get_user_id())
+
+
+@app.route('/api/roadmap', methods=['GET'])
+async def get_roadmap():
+    """Return the user's current roadmap; poll until "enrichment" is no longer pending"""
+    return await serve(handle_get_roadmap, get_user_id())
+
+
+@app.route('/api/cohort/evaluate', methods=['POST'])
+async def evaluate_cohort_upload():
+    """Evaluate a whole cohort from a CSV or JSONL body, streaming NDJSON results
+
+    Takes the same query parameters and bearer token as the Flask route.
+    """
+    reply = cohort_unauthorized(request.headers.get('Authorization'))
+    if reply is None:
+        reply = await runner.run(handle_cohort_evaluate, request.args, request.content_type,
+                                 await request.get_data(as_text=True))
+    return await respond(reply)
+
+
+@app.route('/api/clear_session', methods=['POST'])
+async def clear_session():
+    """Clear the current user session for testing"""
+    return await serve(handle_clear_session, get_user_id())
+
+
+@app.route('/api/agent_pool_status', methods=['GET'])
+async def agent_pool_status():
+    """Report each pooled agent's load and health"""
+    return jsonify(agent_pool.stats())
+
+
+@app.route('/api/http_pool_status', methods=['GET'])
+async def http_pool_status():
+    """Report the async Letta pool, plus the sync pool used for memory writes"""
+    return jsonify(dict(async_transport.stats(), sync=letta_transport.stats()))
+
+
+@app.route('/api/circuit_status', methods=['GET'])
+async def circuit_status():
+    """Report the Letta circuit breaker's state and recent call outcomes"""
+    return jsonify(letta_breaker.stats())
+
+
+@app.route('/api/memory_status', methods=['GET'])
+async def memory_status():
+    """Report the background memory writer's queue depth and lag"""
+    return jsonify(memory_writer.stats())
+
+
+@app.route('/metrics', methods=['GET'])
+async def metrics():
+    """Expose metrics in the Prometheus text format"""
+    return await serve(handle_metrics)
+
+
+@app.route('/api/chat', methods=['POST'])
+async def chat_with_agent():
+    """Send a chat message to the agent and get a response"""
+    return await serve(handle_chat, get_user_id(), await request.get_json())
+
+
+@app.route('/api/chat/stream', methods=['POST'])
+async def chat_with_agent_stream():
+    """Stream the agent's chat reply to the browser as server-sent events"""
+    stream = await runner.run(handle_chat_stream, get_user_id(), await request.get_json())
+    if isinstance(stream, Reply):
+        return await respond(stream)
+
+    async def generate():
+        chunks = []
+        try:
+            print("Streaming chat message to agent...")
+            with (letta_breaker.guard(slow_after=0), agent_pool.track(stream.agent_id),
+                  track_letta_call("chat_stream")):
+                upstream = async_client.agents.messages.create_stream(
+                    agent_id=stream.agent_id,
+                    messages=[stream.chat_message],
+                    stream_tokens=True,
+                    request_options=request_options("stream")
+                )
+                async for chunk in upstream:
+                    delta = chat_stream_delta(chunk)
+                    if delta:
+                        chunks.append(delta)
+                        yield sse_event({"delta": delta})
+
+            yield await asyncio.to_thread(finish_chat_stream, stream, chunks)
+
+        except Exception as e:
+            for event in failed_chat_stream(stream, chunks, e):
+                yield event
+
+    return await respond(event_stream(generate()))
@@ -0,0 +1,245 @@
+"""Near-duplicate chat answer cache using a local MinHash/LSH index"""
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from roadmap_cache import bucket_score, roadmap_level
+from scoring import SCORING_LOGIC
+
+
+# MinHash signature length and LSH banding; 16 bands of 4 rows make
+# questions whose word bigrams have Jaccard similarity around 0.5 or more
+# likely candidates, which are then checked exactly against the threshold
+NUM_HASHES = 64
+BANDS = 16
+ROWS = NUM_HASHES // BANDS
+
+_PRIME = (1 << 61) - 1
+_rng = random.Random(7919)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME))
+                 for _ in range(NUM_HASHES)]
+
+_WORD = re.compile(r"[a-z0-9+#]+")
+
+# Words that carry no meaning for matching questions
+STOPWORDS = frozenset("""
+a an the and or but of to in on for with about as at by from into is are was were be been
+being do does did can could would should will shall may might must i me my you your we us
+our please pls tell give show explain describe what whats which how why when where who
+vs versus between difference differences there here some any just really also
+""".split())
+
+# Questions referring back to the conversation can't be answered from cache
+REFERENTIAL = frozenset("it this that these those above previous again earlier last more".split())
+
+# Questions about the user or their own work ("which areas am I weakest in?",
+# "how do I fix my code?") depend on who asks, so other users must not get them
+PERSONAL = frozenset("i im ive id me my mine myself".split())
+
+# Words too generic to identify a question on their own ("give an example")
+GENERIC = frozenset("example code help hint tip detail step idea problem question".split())
+
+# Languages and technologies; a question about another one needs its own
+# answer however similar the rest of the wording is
+TECHNOLOGIES = frozenset("""
+python java javascript js typescript ts c c++ cpp c# csharp go golang rust ruby kotlin swift
+php scala r sql haskell perl lua dart elixir julia matlab bash shell powershell
+react angular vue node nodejs django flask spring rails pandas numpy
+""".split())
+
+
+def _stem(word):
+    """Fold simple plurals, e.g. heaps -> heap"""
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def question_tokens(question):
+    """Return the normalised content words of a question in order, or None if it is uncacheable
+
+    Order is kept: "convert a string to an int" and "convert an int to a
+    string" are different questions.
+    """
+    words = _WORD.findall(question.lower().replace("'", ""))
+    if any(word in REFERENTIAL or word in PERSONAL for word in words):
+        return None
+    tokens = tuple(_stem(word) for word in words if word not in STOPWORDS)
+    return tokens if set(tokens) - GENERIC else None
+
+
+def shingles(tokens):
+    """Return the word bigrams of a question's tokens, or its only word"""
+    if len(tokens) < 2:
+        return frozenset(tokens)
+    return frozenset(zip(tokens, tokens[1:]))
+
+
+def same_technologies(left, right):
+    """Return whether two questions' differing words include no language or technology"""
+    return not (set(left) ^ set(right)) & TECHNOLOGIES
+
+
+def chat_context_fingerprint(context):
+    """Return a coarse key for the chat context: profile, level, area scores and roadmap"""
+    context = context or {}
+    results = context.get('evaluationResults') or {}
+    roadmap = context.get('roadmapData') or {}
+    score = results.get('score')
+    areas = results.get('areas') or {}
+    return json.dumps([
+        str(context.get('experience') or "").lower(),
+        str(context.get('education') or "").lower(),
+        str(context.get('goal') or "").lower(),
+        roadmap_level(score) if score is not None else "",
+        [bucket_score((areas.get(area) or {}).get('score')) if area in areas else None
+         for area in SCORING_LOGIC["knowledge_areas"]],
+        str(roadmap.get('level') or "").lower()
+    ], separators=(",", ":"))
+
+
+def _shingle_hash(shingle):
+    text = " ".join(shingle) if isinstance(shingle, tuple) else shingle
+    return int.from_bytes(hashlib.blake2b(text.encode(), digest_size=8).digest(), "big")
+
+
+def minhash(shingle_set):
+    """Return the MinHash signature of a set of shingles"""
+    hashes = [_shingle_hash(shingle) for shingle in shingle_set]
+    return tuple(min((a * value + b) % _PRIME for value in hashes)
+                 for a, b in _PERMUTATIONS)
+
+
+def jaccard(left, right):
+    """Return the Jaccard similarity of two sets"""
+    if not left and not right:
+        return 1.0
+    return len(left & right) / len(left | right)
+
+
+class ChatCache:
+    """Thread-safe LRU + TTL cache of chat answers matched by question similarity
+
+    Entries are looked up by context fingerprint and the normalised question
+    words in order; a question matches a cached one in the same context when
+    the Jaccard similarity of their word bigrams is at least ``threshold``
+    and the words they differ in name no language or technology.
+    """
+
+    def __init__(self, max_size=1024, ttl=21600, threshold=0.8):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.threshold = threshold
+        self.exact_hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self.skipped = 0
+        self._entries = OrderedDict()
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _bands(context_key, signature):
+        return [(context_key, band, signature[band * ROWS:(band + 1) * ROWS])
+                for band in range(BANDS)]
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        for bucket in self._bands(key[0], entry["signature"]):
+            keys = self._buckets.get(bucket)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._buckets[bucket]
+
+    def get(self, question, context_key):
+        """Return a cached answer for an equivalent question, or None
+
+        A context_key of None marks a conversation that must not use the cache.
+        """
+        tokens = question_tokens(question)
+        if tokens is None or context_key is None or self.max_size <= 0:
+            with self._lock:
+                self.skipped += 1
+            return None
+
+        key = (context_key, tokens)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            near = False
+            if entry is None:
+                # Candidates share at least one LSH band with the question
+                question_shingles = shingles(tokens)
+                signature = minhash(question_shingles)
+                candidates = set()
+                for bucket in self._bands(context_key, signature):
+                    candidates |= self._buckets.get(bucket, set())
+                scored = [(jaccard(question_shingles, shingles(candidate[1])), candidate)
+                          for candidate in candidates
+                          if same_technologies(tokens, candidate[1])]
+                similarity, best = max(scored, default=(0.0, None))
+                if best is not None and similarity >= self.threshold:
+                    key, entry, near = best, self._entries[best], True
+
+            if entry is not None and entry["expires"] < now:
+                self._remove(key)
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            if near:
+                self.near_hits += 1
+            else:
+                self.exact_hits += 1
+            return entry["answer"]
+
+    def put(self, question, context_key, answer):
+        """Cache an answer, evicting the least recently used entries"""
+        tokens = question_tokens(question)
+        if tokens is None or context_key is None or self.max_size <= 0 or not answer:
+            return
+
+        key = (context_key, tokens)
+        signature = minhash(shingles(tokens))
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = {
+                "answer": answer,
+                "signature": signature,
+                "expires": time.monotonic() + self.ttl
+            }
+            for bucket in self._bands(context_key, signature):
+                self._buckets.setdefault(bucket, set()).add(key)
+            while len(self._entries) > self.max_size:
+                self._remove(next(iter(self._entries)))
+
+    def clear(self):
+        """Remove every entry and reset the counters"""
+        with self._lock:
+            self._entries.clear()
+            self._buckets.clear()
+            self.exact_hits = self.near_hits = self.misses = self.skipped = 0
+
+    def stats(self):
+        """Return size and hit/miss counters"""
+        with self._lock:
+            hits = self.exact_hits + self.near_hits
+            lookups = hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "exact_hits": self.exact_hits,
+                "near_hits": self.near_hits,
+                "misses": self.misses,
+                "skipped": self.skipped,
+                "hit_rate": round(hits / lookups, 3) if lookups else 0.0
+            }
@@ -0,0 +1,94 @@
+"""Bounded per-session chat history with a rolling summary of older turns"""
+import os
+import re
+from datetime import datetime
+
+
+# Turns (a question and its reply) kept verbatim per session
+MAX_TURNS = int(os.environ.get('CHAT_HISTORY_TURNS', 10))
+
+# Most recent turns quoted in chat prompts
+PROMPT_TURNS = int(os.environ.get('CHAT_PROMPT_TURNS', 2))
+
+# The rolling summary keeps its newest lines within this many characters
+SUMMARY_CHARS = int(os.environ.get('CHAT_SUMMARY_CHARS', 600))
+
+# Longest question or reply excerpt, in characters, in a summary line or a quoted turn
+SUMMARY_QUESTION_CHARS = 100
+SUMMARY_ANSWER_CHARS = 120
+PROMPT_TURN_CHARS = 300
+
+_CODE_BLOCK = re.compile(r"```.*?(```|$)", re.S)
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s")
+
+
+def _clip(text, limit):
+    """Collapse whitespace and cut text to limit characters on a word boundary"""
+    text = " ".join(text.split())
+    if len(text) <= limit:
+        return text
+    return text[:limit].rsplit(" ", 1)[0] + "..."
+
+
+def _first_sentence(text):
+    """Return the first sentence of a reply, ignoring code blocks"""
+    text = " ".join(_CODE_BLOCK.sub(" ", text or "").split())
+    return _SENTENCE_END.split(text, 1)[0]
+
+
+def summary_line(question, answer):
+    """Return a one-line digest of a turn: the question and the gist of the reply"""
+    line = f"Q: {_clip(question, SUMMARY_QUESTION_CHARS)}"
+    gist = _first_sentence(answer)
+    if gist:
+        line += f" -> A: {_clip(gist, SUMMARY_ANSWER_CHARS)}"
+    return line
+
+
+def fold_summary(summary, entries, limit=None):
+    """Add evicted history entries to the summary, dropping its oldest lines past limit"""
+    limit = SUMMARY_CHARS if limit is None else limit
+    lines = summary.splitlines() if summary else []
+
+    question = None
+    for entry in entries:
+        if entry['role'] == 'user':
+            if question is not None:
+                lines.append(summary_line(question, ""))
+            question = entry['content']
+        elif question is not None:
+            lines.append(summary_line(question, entry['content']))
+            question = None
+    if question is not None:
+        lines.append(summary_line(question, ""))
+
+    while lines and len("\n".join(lines)) > limit:
+        lines.pop(0)
+    return "\n".join(lines)
+
+
+def append_turn(record, message, reply, max_turns=None):
+    """Add a turn to the record's history, folding the oldest turns into its summary"""
+    max_turns = MAX_TURNS if max_turns is None else max_turns
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    record.chat_history.append({'role': 'user', 'content': message, 'timestamp': timestamp})
+    record.chat_history.append({'role': 'assistant', 'content': reply, 'timestamp': timestamp})
+
+    overflow = len(record.chat_history) - 2 * max_turns
+    if overflow > 0:
+        evicted = record.chat_history[:overflow]
+        del record.chat_history[:overflow]
+        record.chat_summary = fold_summary(record.chat_summary, evicted)
+
+
+def recent_turns(record, turns=None):
+    """Return the last few history entries as "User:"/"Assistant:" lines for a prompt"""
+    turns = PROMPT_TURNS if turns is None else turns
+    if record is None or turns <= 0:
+        return ""
+    lines = []
+    for entry in record.chat_history[-2 * turns:]:
+        speaker = "User" if entry['role'] == 'user' else "Assistant"
+        text = _CODE_BLOCK.sub(" [code] ", entry['content'] or '')
+        lines.append(f"{speaker}: {_clip(text, PROMPT_TURN_CHARS)}")
+    return "\n".join(lines)
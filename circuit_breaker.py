@@ -0,0 +1,155 @@
+"""Circuit breaker for calls to the Letta server
+
+Closed, every call goes through and its outcome and duration are recorded
+over a sliding window. Once the window holds at least ``min_calls`` calls and
+either the share of failures or the share of calls slower than
+``slow_call_seconds`` reaches its threshold, the circuit opens: calls fail
+at once with CircuitOpenError and routes serve local results instead. After
+``open_seconds`` it turns half-open and lets up to ``probes`` calls through;
+if they all succeed in time it closes, and any failure opens it again.
+"""
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling the upstream service while the circuit is open"""
+
+
+class CircuitBreaker:
+    """Thread-safe breaker tripping on the error rate or slow-call rate of recent calls"""
+
+    def __init__(self, name, window=60, min_calls=5, failure_rate=0.5,
+                 slow_call_seconds=15, slow_call_rate=0.5, open_seconds=30, probes=2):
+        self.name = name
+        self.window = window
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate = slow_call_rate
+        self.open_seconds = open_seconds
+        self.probes = probes
+        self.opened = 0
+        self.rejected = 0
+        self._state = CLOSED
+        self._opened_at = None
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        self._calls = deque()
+        self._lock = threading.Lock()
+
+    def _current_state(self, now):
+        if self._state == OPEN and now - self._opened_at >= self.open_seconds:
+            self._state = HALF_OPEN
+            self._probes_in_flight = 0
+            self._probe_successes = 0
+            print(f"Circuit {self.name} half-open, probing")
+        return self._state
+
+    def _open(self, now, reason):
+        if self._state != OPEN:
+            self.opened += 1
+            print(f"Circuit {self.name} opened: {reason}")
+        self._state = OPEN
+        self._opened_at = now
+        self._calls.clear()
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state(time.monotonic())
+
+    def available(self):
+        """Return whether a call would be let through now, without reserving it"""
+        with self._lock:
+            state = self._current_state(time.monotonic())
+            return state == CLOSED or (state == HALF_OPEN and self._probes_in_flight < self.probes)
+
+    def before_call(self):
+        """Admit a call, returning whether it is a half-open probe
+
+        Raises CircuitOpenError if the circuit is open or its probes are taken.
+        """
+        with self._lock:
+            state = self._current_state(time.monotonic())
+            if state == CLOSED:
+                return False
+            if state == HALF_OPEN and self._probes_in_flight < self.probes:
+                self._probes_in_flight += 1
+                return True
+            self.rejected += 1
+        raise CircuitOpenError(f"Circuit {self.name} is open")
+
+    def after_call(self, probe, failed, duration, slow_after=None):
+        """Record a call's outcome; slow_after overrides slow_call_seconds, or 0 to ignore duration"""
+        slow_after = self.slow_call_seconds if slow_after is None else slow_after
+        slow = bool(slow_after) and duration > slow_after
+        now = time.monotonic()
+        with self._lock:
+            if probe:
+                self._probes_in_flight -= 1
+                if self._state != HALF_OPEN:
+                    return
+                if failed or slow:
+                    self._open(now, "probe " + ("failed" if failed else f"took {duration:.1f}s"))
+                    return
+                self._probe_successes += 1
+                if self._probe_successes >= self.probes:
+                    self._state = CLOSED
+                    print(f"Circuit {self.name} closed")
+                return
+
+            if self._state != CLOSED:
+                return
+            self._calls.append((now, failed, slow))
+            while self._calls and now - self._calls[0][0] > self.window:
+                self._calls.popleft()
+            if len(self._calls) < self.min_calls:
+                return
+            failures = sum(1 for _, call_failed, _ in self._calls if call_failed)
+            slow_calls = sum(1 for _, _, call_slow in self._calls if call_slow)
+            if failures >= self.failure_rate * len(self._calls):
+                self._open(now, f"{failures} of the last {len(self._calls)} calls failed")
+            elif slow_calls >= self.slow_call_rate * len(self._calls):
+                self._open(now, f"{slow_calls} of the last {len(self._calls)} calls "
+                                f"took over {self.slow_call_seconds}s")
+
+    @contextmanager
+    def guard(self, slow_after=None):
+        """Run a call through the breaker, raising CircuitOpenError if it is open
+
+        An exception from the call counts as a failure; a generator closed
+        early (e.g. a client leaving a stream) does not.
+        """
+        probe = self.before_call()
+        start = time.monotonic()
+        failed = False
+        try:
+            yield
+        except Exception:
+            failed = True
+            raise
+        finally:
+            self.after_call(probe, failed, time.monotonic() - start, slow_after)
+
+    def stats(self):
+        """Return the state, recent call counts and trip counters"""
+        with self._lock:
+            state = self._current_state(time.monotonic())
+            return {
+                "state": state,
+                "recent_calls": len(self._calls),
+                "recent_failures": sum(1 for _, failed, _ in self._calls if failed),
+                "recent_slow_calls": sum(1 for _, _, slow in self._calls if slow),
+                "opened": self.opened,
+                "rejected": self.rejected,
+                "retry_in": round(max(0.0, self._opened_at + self.open_seconds - time.monotonic()), 1)
+                if state == OPEN else 0.0
+            }
@@ -0,0 +1,259 @@
+"""Letta client construction with a tuned connection pool, timeouts and retries"""
+import asyncio
+import os
+import random
+import threading
+import time
+
+import httpx
+
+
+# Seconds allowed for each kind of upstream call, overridable with
+# LETTA_TIMEOUT_<OPERATION>; retrieving an agent should be quick, while
+# LLM-backed message calls can legitimately take minutes
+DEFAULT_TIMEOUTS = {
+    "retrieve": 5,
+    "create": 30,
+    "message": 120,
+    "stream": 300,
+    "blocks": 10
+}
+
+# Only requests that can safely be repeated are retried
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+RETRY_STATUSES = {408, 429, 502, 503, 504}
+
+
+def operation_timeout(operation):
+    """Return the timeout in seconds for an operation"""
+    return float(os.environ.get(f"LETTA_TIMEOUT_{operation.upper()}", DEFAULT_TIMEOUTS[operation]))
+
+
+def build_timeout(operation):
+    """Return an httpx timeout for an operation, keeping connect and pool waits short"""
+    return httpx.Timeout(
+        operation_timeout(operation),
+        connect=float(os.environ.get('LETTA_CONNECT_TIMEOUT', 3)),
+        # Waiting for a free pooled connection should fail fast, not pin a
+        # worker thread behind a slow Letta server
+        pool=float(os.environ.get('LETTA_POOL_TIMEOUT', 5))
+    )
+
+
+def request_options(operation):
+    """Return Letta request_options applying the operation's timeouts"""
+    # The SDK hands this value straight to httpx, which accepts a Timeout
+    return {"timeout_in_seconds": build_timeout(operation)}
+
+
+def is_not_found(error):
+    """Return whether a Letta call failed because the resource does not exist"""
+    return getattr(error, "status_code", None) == 404
+
+
+RETRY_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.ReadTimeout,
+                httpx.RemoteProtocolError)
+
+
+class RetryPolicy:
+    """Retry decisions, backoff and pool counters shared by the sync and async transports"""
+
+    def _init_retries(self, max_retries, backoff, max_backoff):
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.requests = 0
+        self.retries = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._lock = threading.Lock()
+
+    def _delay(self, attempt):
+        # Full jitter keeps retries from many workers from arriving together
+        return random.uniform(0, min(self.max_backoff, self.backoff * (2 ** attempt)))
+
+    def _started(self):
+        with self._lock:
+            self.requests += 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def _finished(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def _retry_error(self, request, attempt):
+        """Return True to retry after a connection error, counting it otherwise"""
+        if request.method in IDEMPOTENT_METHODS and attempt < self.max_retries:
+            with self._lock:
+                self.retries += 1
+            return True
+        with self._lock:
+            self.errors += 1
+        return False
+
+    def _retry_response(self, request, response, attempt):
+        """Return True to retry after a retryable status code"""
+        if (request.method in IDEMPOTENT_METHODS and response.status_code in RETRY_STATUSES
+                and attempt < self.max_retries):
+            with self._lock:
+                self.retries += 1
+            return True
+        return False
+
+    def stats(self):
+        """Return request/retry counters and connection pool utilisation"""
+        connections = list(self._pool.connections)
+        idle = sum(1 for connection in connections if connection.is_idle())
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "retries": self.retries,
+                "errors": self.errors,
+                "in_flight": self.in_flight,
+                "peak_in_flight": self.peak_in_flight,
+                "connections": len(connections),
+                "idle_connections": idle,
+                "max_connections": self._pool._max_connections
+            }
+
+
+class RetryingTransport(RetryPolicy, httpx.HTTPTransport):
+    """HTTP transport that retries idempotent requests and counts pool usage"""
+
+    def __init__(self, max_retries=2, backoff=0.25, max_backoff=4.0, **kwargs):
+        super().__init__(**kwargs)
+        self._init_retries(max_retries, backoff, max_backoff)
+
+    def handle_request(self, request):
+        self._started()
+        try:
+            attempt = 0
+            while True:
+                try:
+                    response = super().handle_request(request)
+                except RETRY_ERRORS:
+                    if not self._retry_error(request, attempt):
+                        raise
+                else:
+                    if not self._retry_response(request, response, attempt):
+                        return response
+                    response.close()
+
+                time.sleep(self._delay(attempt))
+                attempt += 1
+        finally:
+            self._finished()
+
+
+class AsyncRetryingTransport(RetryPolicy, httpx.AsyncHTTPTransport):
+    """Async counterpart of RetryingTransport for the ASGI app"""
+
+    def __init__(self, max_retries=2, backoff=0.25, max_backoff=4.0, **kwargs):
+        super().__init__(**kwargs)
+        self._init_retries(max_retries, backoff, max_backoff)
+
+    async def handle_async_request(self, request):
+        self._started()
+        try:
+            attempt = 0
+            while True:
+                try:
+                    response = await super().handle_async_request(request)
+                except RETRY_ERRORS:
+                    if not self._retry_error(request, attempt):
+                        raise
+                else:
+                    if not self._retry_response(request, response, attempt):
+                        return response
+                    await response.aclose()
+
+                await asyncio.sleep(self._delay(attempt))
+                attempt += 1
+        finally:
+            self._finished()
+
+
+def _pool_limits():
+    return httpx.Limits(
+        max_connections=int(os.environ.get('LETTA_MAX_CONNECTIONS', 32)),
+        max_keepalive_connections=int(
+            os.environ.get('LETTA_MAX_KEEPALIVE', 16)),
+        keepalive_expiry=float(os.environ.get('LETTA_KEEPALIVE_EXPIRY', 30))
+    )
+
+
+class LazyClient:
+    """Stand-in that builds the real client on first attribute access
+
+    Importing letta_client takes a few hundred milliseconds, so deferring it
+    lets the app start, and serve routes that never reach the agent, without it.
+    """
+
+    def __init__(self, build):
+        self._build = build
+        self._client = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Return the real client, building it once"""
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = self._build()
+        return self._client
+
+    def __getattr__(self, name):
+        return getattr(self.load(), name)
+
+
+def create_letta_client():
+    """Build a Letta client from LETTA_* environment settings
+
+    Returns the client and its transport, whose stats() reports pool usage.
+    The client is a LazyClient: letta_client is imported on its first use.
+    """
+    transport = RetryingTransport(
+        max_retries=int(os.environ.get('LETTA_MAX_RETRIES', 2)),
+        limits=_pool_limits()
+    )
+    httpx_client = httpx.Client(
+        transport=transport,
+        timeout=build_timeout("message"),
+        follow_redirects=True
+    )
+
+    def build():
+        from letta_client import Letta
+        return Letta(
+            base_url=os.environ.get('LETTA_BASE_URL', 'http://localhost:8283'),
+            token=os.environ.get('LETTA_TOKEN'),
+            httpx_client=httpx_client
+        )
+
+    return LazyClient(build), transport
+
+
+def create_async_letta_client():
+    """Build an AsyncLetta client with the same settings as create_letta_client
+
+    Must be called inside the event loop that will use it.
+    """
+    from letta_client import AsyncLetta
+
+    transport = AsyncRetryingTransport(
+        max_retries=int(os.environ.get('LETTA_MAX_RETRIES', 2)),
+        limits=_pool_limits()
+    )
+    httpx_client = httpx.AsyncClient(
+        transport=transport,
+        timeout=build_timeout("message"),
+        follow_redirects=True
+    )
+    client = AsyncLetta(
+        base_url=os.environ.get('LETTA_BASE_URL', 'http://localhost:8283'),
+        token=os.environ.get('LETTA_TOKEN'),
+        httpx_client=httpx_client
+    )
+    return client, transport
@@ -0,0 +1,226 @@
+"""Bulk evaluation of a cohort of users from CSV or JSONL, streamed as NDJSON
+
+Each input row holds a profile (id, experience, education, goal) and an
+answer set, given as:
+
+- JSONL: "answers" as a list in the order of the bank's default quiz, or an
+  object keyed by question id
+- CSV: an "answers" column separated by "|" (e.g. "A|C|A,D|...") in default
+  quiz order, or one column per question named q1, q2, ... by question id
+
+Questions named by id may be any in the bank; they are graded after the
+default quiz's questions.
+
+Usage:
+    python cohort.py cohort.csv > results.ndjson
+    python cohort.py cohort.jsonl --feedback --workers 8 --output results.ndjson
+
+Only NDJSON is written to stdout; progress and errors go to stderr.
+"""
+import argparse
+import contextlib
+import csv
+import io
+import json
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from question_bank import get_bank
+from roadmap_builder import build_roadmap
+from roadmap_cache import roadmap_fingerprint, roadmap_level
+from scoring import score_cohort
+
+
+PROFILE_FIELDS = ("experience", "education", "goal")
+
+
+class CohortError(ValueError):
+    """Raised when a cohort file row can't be understood"""
+
+
+def _question_ids(named_ids):
+    """Return the default quiz's ids followed by any other ids the file names"""
+    bank = get_bank()
+    question_ids = [bank.record(number)["id"] for number in bank.default_quiz()]
+    unknown = sorted(question_id for question_id in named_ids if bank.number_of(question_id) is None)
+    if unknown:
+        raise CohortError(f"Unknown question ids: {unknown}")
+    return question_ids + sorted(set(named_ids) - set(question_ids))
+
+
+def _question_id(key):
+    try:
+        return int(str(key).lstrip("q"))
+    except ValueError:
+        raise CohortError(f"Invalid question id {key!r}")
+
+
+def _csv_rows(text):
+    reader = csv.DictReader(io.StringIO(text))
+    columns = {_question_id(name): name for name in reader.fieldnames or ()
+               if name.startswith("q") and name[1:].isdigit()}
+    question_ids = _question_ids(columns)
+    rows = []
+    for line, row in enumerate(reader, start=2):
+        if row.get("answers") is not None:
+            answers = [answer.strip() or None for answer in row["answers"].split("|")]
+        else:
+            answers = [(row.get(columns.get(question_id, "")) or "").strip() or None
+                       for question_id in question_ids]
+        rows.append((line, row, answers))
+    return question_ids, rows
+
+
+def _jsonl_rows(text):
+    parsed = []
+    named = set()
+    for line, raw in enumerate(text.splitlines(), start=1):
+        if not raw.strip():
+            continue
+        try:
+            row = json.loads(raw)
+        except json.JSONDecodeError as e:
+            raise CohortError(f"Row {line}: invalid JSON ({e})")
+        answers = row.get("answers")
+        if isinstance(answers, dict):
+            answers = {_question_id(key): value for key, value in answers.items()}
+            named.update(answers)
+        elif not isinstance(answers, list):
+            raise CohortError(f"Row {line}: answers must be a list or an object keyed by question id")
+        parsed.append((line, row, answers))
+
+    question_ids = _question_ids(named)
+    rows = []
+    for line, row, answers in parsed:
+        if isinstance(answers, dict):
+            answers = [answers.get(question_id) for question_id in question_ids]
+        rows.append((line, row, answers))
+    return question_ids, rows
+
+
+def read_cohort(text, fmt):
+    """Parse a cohort file ("csv" or "jsonl") into its questions and user rows"""
+    question_ids, rows = _csv_rows(text) if fmt == "csv" else _jsonl_rows(text)
+    users = []
+    for line, row, answers in rows:
+        users.append({
+            "id": str(row.get("id") or line),
+            "profile": {field: row.get(field) for field in PROFILE_FIELDS},
+            "answers": answers
+        })
+    return get_bank().questions(question_ids), users
+
+
+def detect_format(name_or_type):
+    """Return "csv" or "jsonl" from a file name or content type"""
+    return "csv" if "csv" in (name_or_type or "").lower() else "jsonl"
+
+
+def evaluate_cohort(questions, users, feedback=None, roadmap_cache=None, workers=4):
+    """Score every user and yield one result dict per user, in input order
+
+    Each user's answers are aligned with ``questions``.
+    ``feedback(evaluation, profile)`` is optional LLM work that personalises
+    an evaluation in place; at most ``workers`` calls run at once, and
+    results are yielded as soon as every earlier user is done. Roadmaps are
+    built locally, or taken from ``roadmap_cache`` when an equivalent
+    profile already has an enriched one.
+    """
+    evaluations = score_cohort(questions, [user["answers"] for user in users])
+
+    def result(user, evaluation):
+        if feedback is not None:
+            try:
+                feedback(evaluation, user["profile"])
+            except Exception as e:
+                print(f"Error generating feedback for {user['id']}: {e}", file=sys.stderr)
+
+        roadmap_input = {
+            "user_profile": user["profile"],
+            "evaluation": {"score": evaluation["score"], "areas": evaluation["areas"]}
+        }
+        roadmap = roadmap_cache.get(roadmap_fingerprint(roadmap_input)) if roadmap_cache else None
+        if roadmap is None:
+            roadmap = dict(build_roadmap(roadmap_input), enrichment="skipped")
+        roadmap["overall_score"] = evaluation["score"]
+
+        return {"id": user["id"], "profile": user["profile"],
+                "evaluation": evaluation, "roadmap": roadmap}
+
+    if feedback is None:
+        for user, evaluation in zip(users, evaluations):
+            yield result(user, evaluation)
+        return
+
+    # Keep a bounded window of submitted work so memory stays flat
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for user, evaluation in zip(users, evaluations):
+            pending.append(executor.submit(result, user, evaluation))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def cohort_summary(scores, elapsed):
+    """Return the closing summary line: counts, mean score and level mix"""
+    levels = {}
+    for score in scores:
+        level = roadmap_level(score)
+        levels[level] = levels.get(level, 0) + 1
+    return {"summary": {
+        "users": len(scores),
+        "mean_score": round(sum(scores) / len(scores), 1) if scores else 0,
+        "levels": levels,
+        "elapsed": round(elapsed, 3)
+    }}
+
+
+def stream_ndjson(questions, users, **kwargs):
+    """Yield NDJSON lines for each user's result followed by a summary line"""
+    start = time.perf_counter()
+    scores = []
+    for item in evaluate_cohort(questions, users, **kwargs):
+        scores.append(item["evaluation"]["score"])
+        yield json.dumps(item) + "\n"
+    yield json.dumps(cohort_summary(scores, time.perf_counter() - start)) + "\n"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate a cohort file and write NDJSON results")
+    parser.add_argument("path", help="CSV or JSONL cohort file, or - for stdin")
+    parser.add_argument("--format", choices=["csv", "jsonl"],
+                        help="input format (default: from the file extension)")
+    parser.add_argument("--feedback", action="store_true",
+                        help="ask the evaluator agent for personalised feedback per user")
+    parser.add_argument("--workers", type=int, default=4,
+                        help="concurrent agent calls when --feedback is set")
+    parser.add_argument("--output", help="write NDJSON here instead of stdout")
+    args = parser.parse_args()
+
+    text = sys.stdin.read() if args.path == "-" else open(args.path).read()
+    questions, users = read_cohort(text, args.format or detect_format(args.path))
+
+    out = open(args.output, "w") if args.output else sys.stdout
+    # The app and its background threads print progress; keep it out of the results
+    with contextlib.redirect_stdout(sys.stderr):
+        try:
+            feedback = None
+            if args.feedback:
+                # Only load the Letta client and agent pool when the agent is needed
+                from app import cohort_feedback
+                feedback = cohort_feedback
+
+            for line in stream_ndjson(questions, users, feedback=feedback, workers=args.workers):
+                out.write(line)
+            out.flush()
+        finally:
+            if args.output:
+                out.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Content-Encoding negotiation and compression for responses and static assets
+
+gzip is always available; brotli is used as well when the optional brotli
+package is installed.
+"""
+import gzip
+import os
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+# Smaller bodies go out as they are; compressing them saves less than it costs
+COMPRESS_MIN_BYTES = int(os.environ.get('COMPRESS_MIN_BYTES', 1024))
+
+# Dynamic responses favour speed; static assets are compressed once at build time
+GZIP_LEVEL = int(os.environ.get('COMPRESS_GZIP_LEVEL', 6))
+BROTLI_QUALITY = int(os.environ.get('COMPRESS_BROTLI_QUALITY', 5))
+
+COMPRESSIBLE_TYPES = ('application/json', 'text/html')
+
+# Preferred first
+ENCODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def accepted_encodings(header):
+    """Parse an Accept-Encoding header into {coding: q-value}"""
+    accepted = {}
+    for part in (header or '').split(','):
+        coding, _, params = part.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(';'):
+            name, _, value = param.strip().partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[coding] = quality
+    return accepted
+
+
+def choose_encoding(header, available=ENCODINGS):
+    """Return the preferred coding in available that the client accepts, or None"""
+    accepted = accepted_encodings(header)
+    for coding in available:
+        if accepted.get(coding, accepted.get('*', 0.0)) > 0:
+            return coding
+    return None
+
+
+def compress(data, encoding, best=False):
+    """Compress bytes with gzip or br; best trades speed for size, for build-time use"""
+    if encoding == 'gzip':
+        # mtime=0 keeps the output identical for identical input
+        return gzip.compress(data, compresslevel=9 if best else GZIP_LEVEL, mtime=0)
+    if encoding == 'br' and brotli is not None:
+        return brotli.compress(data, quality=11 if best else BROTLI_QUALITY)
+    raise ValueError(f"Unsupported content encoding {encoding!r}")
+
+
+def wants_compression(response):
+    """Return whether a buffered response is a candidate for compression"""
+    return (response.status_code == 200
+            and response.mimetype in COMPRESSIBLE_TYPES
+            and 'Content-Encoding' not in response.headers
+            and (response.content_length or 0) >= COMPRESS_MIN_BYTES)
+
+
+def encode_response(response, data, encoding):
+    """Replace a response body with its compressed form and fix up its headers"""
+    response.set_data(compress(data, encoding))
+    response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    # The compressed bytes differ from the identity representation, so keep the
+    # ETag for conditional requests but only as a weak validator
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def compress_response(response, accept_encoding):
+    """Compress a Flask response in place when it is large enough and the client accepts it"""
+    if response.is_streamed or response.direct_passthrough or not wants_compression(response):
+        return response
+    encoding = choose_encoding(accept_encoding)
+    if encoding is None:
+        response.vary.add('Accept-Encoding')
+        return response
+    return encode_response(response, response.get_data(), encoding)
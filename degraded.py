@@ -0,0 +1,43 @@
+"""Local responses for when the agent is unavailable (circuit open or the call failed)
+
+Scores, feedback and roadmap skeletons are computed locally anyway; only
+chat needs a stand-in reply. Responses built without the agent carry
+"degraded": true so the frontend can say so.
+"""
+
+
+def mark_degraded(payload):
+    """Flag a response body as served without the agent"""
+    payload["degraded"] = True
+    return payload
+
+
+def _weakest_areas(evaluation, count=2):
+    """Return the areas furthest below their recommended level"""
+    gaps = []
+    for area, data in (evaluation or {}).get("areas", {}).items():
+        try:
+            gap = float(data.get("recommended") or 0) - float(data.get("score") or 0)
+        except (AttributeError, TypeError, ValueError):
+            continue
+        if gap > 0:
+            gaps.append((gap, area))
+    return [area for _, area in sorted(gaps, reverse=True)[:count]]
+
+
+def degraded_chat_reply(context):
+    """Return a stand-in chat reply pointing at the user's own results and roadmap"""
+    parts = ["The learning assistant is unavailable right now, so this is an automatic reply."]
+
+    weakest = _weakest_areas(context.get("evaluationResults"))
+    if weakest:
+        parts.append(f"Based on your assessment, {' and '.join(weakest)} "
+                     f"{'is' if len(weakest) == 1 else 'are'} the best place to focus next.")
+
+    weeks = (context.get("roadmapData") or {}).get("weeks") or []
+    if weeks and isinstance(weeks[0], dict) and weeks[0].get("focus"):
+        parts.append(f"Your roadmap starts with {weeks[0]['focus']}; its practice sets "
+                     "are a good way to keep going.")
+
+    parts.append("Please ask again in a minute for a full answer.")
+    return " ".join(parts)
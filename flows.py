@@ -0,0 +1,231 @@
+"""Route logic shared by the Flask app (app.py) and the ASGI app (asgi.py)
+
+A route's logic is a plain function returning a Reply, or a generator (a
+"flow") that also yields an effect whenever it needs the agent or has to
+wait, and gets the effect's result sent back:
+
+    response = yield Call(agent_id, messages, purpose="chat")
+
+FlowRunner runs flows inline, blocking its worker thread on each effect.
+AsyncFlowRunner runs the code between effects in a worker thread, so
+session store, bank and cache access never blocks the event loop, and
+awaits the agent calls themselves with AsyncLetta. The frameworks only
+turn the request into arguments and the Reply into a response.
+"""
+import asyncio
+import inspect
+from concurrent.futures import wait
+
+
+class Reply:
+    """A framework-neutral response
+
+    body is a dict or list sent as JSON, a str or bytes sent as is, or any
+    other iterable of str chunks, which is streamed. etag makes the response
+    conditional on the request's If-None-Match.
+    """
+
+    def __init__(self, body, status=200, mimetype='application/json', headers=None, etag=None):
+        self.body = body
+        self.status = status
+        self.mimetype = mimetype
+        self.headers = headers or {}
+        self.etag = etag
+
+    @property
+    def is_json(self):
+        return self.mimetype == 'application/json' and isinstance(self.body, (dict, list))
+
+    @property
+    def is_stream(self):
+        return not (self.is_json or isinstance(self.body, (str, bytes)))
+
+
+class Call:
+    """Effect: send messages to an agent; resolves to its response or raises"""
+
+    def __init__(self, agent_id, messages, purpose="chat"):
+        self.agent_id = agent_id
+        self.messages = messages
+        self.purpose = purpose
+
+
+class Gather:
+    """Effect: run calls concurrently for up to timeout seconds
+
+    Resolves to one entry per call, in order: its response, the exception it
+    raised, or a TimeoutError if it was still running.
+    """
+
+    def __init__(self, calls, timeout=None):
+        self.calls = list(calls)
+        self.timeout = timeout
+
+
+class Spawn:
+    """Effect: run handler(*args) in the background; resolves to a future of its result
+
+    The future is a concurrent.futures.Future or an asyncio.Task, either of
+    which RoadmapPrefetcher accepts.
+    """
+
+    def __init__(self, handler, *args):
+        self.handler = handler
+        self.args = args
+
+
+class Wait:
+    """Effect: wait up to timeout seconds for a Spawn future; resolves to whether it is done"""
+
+    def __init__(self, future, timeout):
+        self.future = future
+        self.timeout = timeout
+
+
+class OnDone:
+    """Effect: once a Spawn future succeeds, run handler(*args, result) in the background"""
+
+    def __init__(self, future, handler, *args):
+        self.future = future
+        self.handler = handler
+        self.args = args
+
+
+class _Finished:
+    def __init__(self, value):
+        self.value = value
+
+
+def _step(flow, value, error):
+    """Advance a flow to its next effect, or wrap its return value in _Finished"""
+    try:
+        if error is not None:
+            return flow.throw(error)
+        return flow.send(value)
+    except StopIteration as stop:
+        return _Finished(stop.value)
+
+
+class FlowRunner:
+    """Run handlers and flows in the calling thread with the sync Letta client
+
+    Gathered calls go to ``executor``; spawned flows run on ``background``.
+    """
+
+    def __init__(self, send, executor, background):
+        self.send = send
+        self.executor = executor
+        self.background = background
+
+    def run(self, handler, *args):
+        """Call a handler and, if it is a flow, drive it to its result"""
+        flow = handler(*args)
+        if not inspect.isgenerator(flow):
+            return flow
+
+        value, error = None, None
+        while True:
+            effect = _step(flow, value, error)
+            if isinstance(effect, _Finished):
+                return effect.value
+            try:
+                value, error = self._resolve(effect), None
+            except Exception as e:
+                value, error = None, e
+
+    def _call(self, call):
+        return self.send(call.agent_id, call.messages, purpose=call.purpose)
+
+    def _resolve(self, effect):
+        if isinstance(effect, Call):
+            return self._call(effect)
+        if isinstance(effect, Gather):
+            futures = [self.executor.submit(self._call, call) for call in effect.calls]
+            done, pending = wait(futures, timeout=effect.timeout)
+            for future in pending:
+                future.cancel()
+            return [(future.exception() or future.result()) if future in done
+                    else TimeoutError(f"No reply within {effect.timeout}s")
+                    for future in futures]
+        if isinstance(effect, Spawn):
+            return self.background.submit(self.run, effect.handler, *effect.args)
+        if isinstance(effect, Wait):
+            done, _ = wait([effect.future], timeout=effect.timeout)
+            return bool(done)
+        if isinstance(effect, OnDone):
+            # Runs in the thread finishing the future, not on a pool worker
+            def finished(future):
+                if not future.cancelled() and future.exception() is None:
+                    self.run(effect.handler, *effect.args, future.result())
+            effect.future.add_done_callback(finished)
+            return None
+        raise TypeError(f"Unknown effect {effect!r}")
+
+
+class AsyncFlowRunner:
+    """Run handlers and flows on the event loop with AsyncLetta
+
+    Handler and flow code runs in worker threads; ``send`` is awaited on the
+    loop. At most ``max_gathered`` gathered calls are in flight at once.
+    """
+
+    def __init__(self, send, max_gathered):
+        self.send = send
+        self.gathered_slots = asyncio.Semaphore(max_gathered)
+        # Keep references to background tasks until they finish
+        self.background_tasks = set()
+
+    async def run(self, handler, *args):
+        """Call a handler in a thread and, if it is a flow, drive it to its result"""
+        flow = await asyncio.to_thread(handler, *args)
+        if not inspect.isgenerator(flow):
+            return flow
+
+        value, error = None, None
+        while True:
+            effect = await asyncio.to_thread(_step, flow, value, error)
+            if isinstance(effect, _Finished):
+                return effect.value
+            try:
+                value, error = await self._resolve(effect), None
+            except Exception as e:
+                value, error = None, e
+
+    async def _call(self, call):
+        return await self.send(call.agent_id, call.messages, purpose=call.purpose)
+
+    def _background(self, coroutine):
+        task = asyncio.create_task(coroutine)
+        self.background_tasks.add(task)
+        task.add_done_callback(self.background_tasks.discard)
+        return task
+
+    async def _gathered_call(self, call):
+        async with self.gathered_slots:
+            return await self._call(call)
+
+    async def _resolve(self, effect):
+        if isinstance(effect, Call):
+            return await self._call(effect)
+        if isinstance(effect, Gather):
+            tasks = [asyncio.create_task(self._gathered_call(call)) for call in effect.calls]
+            if not tasks:
+                return []
+            done, pending = await asyncio.wait(tasks, timeout=effect.timeout)
+            for task in pending:
+                task.cancel()
+            return [(task.exception() or task.result()) if task in done
+                    else TimeoutError(f"No reply within {effect.timeout}s")
+                    for task in tasks]
+        if isinstance(effect, Spawn):
+            return self._background(self.run(effect.handler, *effect.args))
+        if isinstance(effect, Wait):
+            done, _ = await asyncio.wait({effect.future}, timeout=effect.timeout)
+            return bool(done)
+        if isinstance(effect, OnDone):
+            def finished(task):
+                if not task.cancelled() and task.exception() is None:
+                    self._background(self.run(effect.handler, *effect.args, task.result()))
+            effect.future.add_done_callback(finished)
+            return None
+        raise TypeError(f"Unknown effect {effect!r}")
@@ -0,0 +1,260 @@
+"""Incremental extraction, repair and validation of JSON in agent responses"""
+import json
+
+
+class JsonExtractionError(ValueError):
+    """Raised when no usable JSON value can be recovered from a response"""
+
+
+_CLOSERS = {"{": "}", "[": "]"}
+
+
+class JsonScanner:
+    """Scan text for the first JSON object or array, one chunk at a time
+
+    Feed chunks as they arrive; ``complete`` becomes True once the value's
+    brackets balance. Trailing commas are removed while scanning, and
+    ``value()`` closes a truncated value at the last complete element so a
+    partial response can still be used. ``start`` is the offset of the
+    opening bracket in the text fed so far.
+    """
+
+    def __init__(self, root="{["):
+        self.root = root
+        self.complete = False
+        self.start = None
+        self._fed = 0
+        self._out = []
+        self._stack = []
+        self._in_string = False
+        self._escape = False
+        # (output length, open brackets) after which the prefix is a complete value
+        self._cuts = []
+
+    @property
+    def started(self):
+        """True once the opening bracket has been seen"""
+        return bool(self._out)
+
+    def feed(self, chunk):
+        """Consume the next chunk of text"""
+        offset = self._fed
+        self._fed += len(chunk)
+        for index, char in enumerate(chunk):
+            if self.complete:
+                return
+            if not self._stack:
+                if char in self.root:
+                    self.start = offset + index
+                    self._open(char)
+                continue
+
+            self._out.append(char)
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in _CLOSERS:
+                self._out.pop()
+                self._open(char)
+            elif char in "}]":
+                self._out.pop()
+                self._close()
+            elif char == ",":
+                self._cuts.append((len(self._out) - 1, tuple(self._stack)))
+
+    def _open(self, char):
+        self._out.append(char)
+        self._stack.append(char)
+        self._cuts.append((len(self._out), tuple(self._stack)))
+
+    def _close(self):
+        self._strip_trailing_comma(self._out)
+        self._out.append(_CLOSERS[self._stack.pop()])
+        # Cut points inside the container just closed are no longer needed
+        while self._cuts and len(self._cuts[-1][1]) > len(self._stack):
+            self._cuts.pop()
+        if not self._stack:
+            self.complete = True
+
+    @staticmethod
+    def _strip_trailing_comma(out):
+        end = len(out)
+        while end and out[end - 1].isspace():
+            end -= 1
+        if end and out[end - 1] == ",":
+            del out[end - 1:]
+
+    def value(self):
+        """Return the parsed value, repairing a truncated one if necessary"""
+        if not self._out:
+            raise JsonExtractionError("No JSON object found in response")
+
+        text = "".join(self._out)
+        if self.complete:
+            try:
+                return json.loads(text)
+            except json.JSONDecodeError as e:
+                raise JsonExtractionError(f"Invalid JSON in response: {e}")
+
+        # Truncated: first try closing everything as is, then cut back to the
+        # last complete element at each level until something parses
+        candidates = [(self._out + (['"'] if self._in_string else []),
+                       tuple(self._stack))]
+        candidates += [(self._out[:cut], stack)
+                       for cut, stack in reversed(self._cuts)]
+        for out, stack in candidates:
+            out = list(out)
+            self._strip_trailing_comma(out)
+            closed = "".join(out) + "".join(_CLOSERS[c] for c in reversed(stack))
+            try:
+                return json.loads(closed)
+            except json.JSONDecodeError:
+                continue
+        raise JsonExtractionError("Could not repair truncated JSON in response")
+
+
+def _strip_fences(text):
+    """Return the contents of the first markdown code fence, if there is one"""
+    fence = text.find("```")
+    if fence < 0:
+        return text
+    start = text.find("\n", fence)
+    if start < 0:
+        return text[fence + 3:]
+    end = text.find("```", start)
+    return text[start + 1:end if end >= 0 else len(text)]
+
+
+def _candidates(text, root):
+    """Yield a scanner for each value in text, resuming after the last one's opening bracket
+
+    Prose may contain stray brackets ("use { and } for blocks"), so a
+    candidate that fails leaves the next one to be tried.
+    """
+    offset = 0
+    while True:
+        scanner = JsonScanner(root)
+        scanner.feed(text[offset:])
+        if not scanner.started:
+            return
+        yield scanner
+        offset += scanner.start + 1
+
+
+def validate(value, schema, path="$"):
+    """Check value against a schema, returning (cleaned value, list of problems)
+
+    A schema is a type (str, int, float, bool), a one-element list giving the
+    item schema, or a dict of required keys; a dict with the single key "*"
+    matches any keys. Numbers given as strings are coerced, and list items
+    that don't match are dropped rather than failing the whole value.
+    """
+    problems = []
+
+    if isinstance(schema, dict):
+        if not isinstance(value, dict):
+            raise JsonExtractionError(f"{path}: expected object")
+        if set(schema) == {"*"}:
+            cleaned = {}
+            for key, item in value.items():
+                try:
+                    cleaned[key], item_problems = validate(
+                        item, schema["*"], f"{path}.{key}")
+                    problems += item_problems
+                except JsonExtractionError as e:
+                    problems.append(str(e))
+            return cleaned, problems
+
+        cleaned = dict(value)
+        for key, item_schema in schema.items():
+            if key not in value:
+                raise JsonExtractionError(f"{path}.{key}: missing")
+            cleaned[key], item_problems = validate(
+                value[key], item_schema, f"{path}.{key}")
+            problems += item_problems
+        return cleaned, problems
+
+    if isinstance(schema, list):
+        if not isinstance(value, list):
+            raise JsonExtractionError(f"{path}: expected array")
+        cleaned = []
+        for index, item in enumerate(value):
+            try:
+                item, item_problems = validate(
+                    item, schema[0], f"{path}[{index}]")
+                cleaned.append(item)
+                problems += item_problems
+            except JsonExtractionError as e:
+                problems.append(f"dropped {e}")
+        return cleaned, problems
+
+    if schema in (int, float):
+        if isinstance(value, bool):
+            raise JsonExtractionError(f"{path}: expected number")
+        if isinstance(value, (int, float)):
+            return schema(value), problems
+        try:
+            return schema(float(str(value).strip().rstrip("%"))), problems
+        except ValueError:
+            raise JsonExtractionError(f"{path}: expected number")
+
+    if not isinstance(value, schema):
+        raise JsonExtractionError(f"{path}: expected {schema.__name__}")
+    return value, problems
+
+
+def extract_json(text, schema=None):
+    """Extract, repair and optionally validate the JSON value in a response"""
+    if not isinstance(text, str):
+        raise JsonExtractionError("Response is not text")
+
+    root = "{" if isinstance(schema, dict) else "[" if isinstance(schema, list) else "{["
+    # The JSON may sit outside the fence, e.g. after a fenced example
+    sources = [_strip_fences(text), text] if "```" in text else [text]
+
+    error = None
+    empty = None
+    for source in sources:
+        for scanner in _candidates(source, root):
+            try:
+                value = scanner.value()
+                problems = []
+                if schema is not None:
+                    value, problems = validate(value, schema)
+            except JsonExtractionError as e:
+                # Report the first candidate's problem if none of them works
+                error = error or e
+                continue
+
+            # An empty value is often prose ("{}") or a stray bracket cut back
+            # to nothing, so a later candidate is preferred
+            if not value:
+                empty = value if empty is None else empty
+                continue
+            if not scanner.complete:
+                print("Repaired truncated JSON in agent response")
+            if problems:
+                print(f"Repaired JSON schema problems: {problems}")
+            return value
+
+    if empty is not None:
+        return empty
+    raise error or JsonExtractionError("No JSON object found in response")
+
+
+# Schemas for the JSON each endpoint expects from the agent
+FEEDBACK_SCHEMA = {"*": str}
+
+ROADMAP_ENRICHMENT_SCHEMA = {
+    "weeks": [{
+        "week": int,
+        "topics": [str],
+        "resources": [{"type": str, "title": str}]
+    }]
+}
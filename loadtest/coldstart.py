@@ -0,0 +1,139 @@
+"""Cold-start benchmark: import time and time to first response in fresh processes
+
+Each run starts a new interpreter, imports app the way the serverless entry
+point does, then times the first page, the first agent lookup and, with
+--chat, the first chat reply. Pass limits to fail on regressions.
+
+Usage, against the fake Letta server:
+    python -m loadtest.fake_letta --port 8283 &
+    LETTA_BASE_URL=http://localhost:8283 python -m loadtest.coldstart --runs 10 --chat
+    python -m loadtest.coldstart --max-import-ms 400 --importtime 15
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+from loadtest.run import percentile
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs inside the fresh interpreter and writes its timings as JSON to the
+# file named by its first argument; stdout is left to the app, whose warm-up
+# thread may print there at any time
+CHILD = r"""
+import json, sys, time
+start = time.perf_counter()
+import app
+timings = {"import": time.perf_counter() - start,
+           "letta_client_loaded": "letta_client" in sys.modules}
+client = app.app.test_client()
+client.get("/")
+timings["first_page"] = time.perf_counter() - start
+app.get_or_create_agent("coldstart")
+timings["first_agent"] = time.perf_counter() - start
+if CHAT:
+    client.post("/api/chat", json={"message": "How do I recognise a dynamic programming problem?"})
+    timings["first_chat"] = time.perf_counter() - start
+with open(sys.argv[1], "w") as f:
+    json.dump(timings, f)
+"""
+
+STAGES = ("import", "first_page", "first_agent", "first_chat", "process")
+
+
+def run_once(chat, env):
+    """Run one cold start and return its timings in seconds"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "timings.json")
+        start = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, "-c", CHILD.replace("CHAT", repr(chat)), path],
+            cwd=ROOT, env=env, capture_output=True, text=True)
+        elapsed = time.perf_counter() - start
+        try:
+            with open(path) as f:
+                timings = json.load(f)
+        except (OSError, ValueError):
+            raise RuntimeError(f"Cold start failed:\n{result.stderr[-2000:]}")
+    timings["process"] = elapsed
+    return timings
+
+
+def slowest_imports(count, env):
+    """Return the modules with the largest cumulative import time, in ms"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app"],
+                            cwd=ROOT, env=env, capture_output=True, text=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        match = re.match(r"import time:\s+(\d+) \|\s+(\d+) \|(\s+)(\S+)", line)
+        if match:
+            depth = (len(match.group(3)) - 1) // 2
+            rows.append((int(match.group(2)) / 1000, depth, match.group(4)))
+    return sorted(rows, reverse=True)[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="fresh processes to start")
+    parser.add_argument("--chat", action="store_true",
+                        help="also time the first /api/chat reply")
+    parser.add_argument("--no-warmup", action="store_true",
+                        help="run with AGENT_WARMUP=0 to compare")
+    parser.add_argument("--importtime", type=int, default=0, metavar="N",
+                        help="list the N slowest imports")
+    parser.add_argument("--max-import-ms", type=float,
+                        help="fail if the median import time exceeds this")
+    parser.add_argument("--max-first-agent-ms", type=float,
+                        help="fail if the median time to the first agent lookup exceeds this")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    if args.no_warmup:
+        env["AGENT_WARMUP"] = "0"
+
+    runs = [run_once(args.chat, env) for _ in range(args.runs)]
+    rows = []
+    for stage in STAGES:
+        samples = sorted(run[stage] for run in runs if stage in run)
+        if samples:
+            rows.append({
+                "stage": stage,
+                "p50_ms": round(percentile(samples, 50) * 1000, 1),
+                "p95_ms": round(percentile(samples, 95) * 1000, 1),
+                "max_ms": round(samples[-1] * 1000, 1)
+            })
+    # The warm-up thread loads letta_client on purpose, so only check without it
+    eager = sum(run["letta_client_loaded"] for run in runs) if args.no_warmup else 0
+    imports = slowest_imports(args.importtime, env) if args.importtime else []
+
+    if args.json:
+        print(json.dumps({"runs": len(runs), "rows": rows, "letta_client_at_import": eager,
+                          "imports": imports}, indent=2))
+    else:
+        print(f"{len(runs)} cold starts (warm-up {'off' if args.no_warmup else 'on'})")
+        print(f"{'stage':<14}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}")
+        for row in rows:
+            print(f"{row['stage']:<14}{row['p50_ms']:>10}{row['p95_ms']:>10}{row['max_ms']:>10}")
+        if eager:
+            print(f"Warning: letta_client was imported with app in {eager} of {len(runs)} runs")
+        for cumulative, depth, module in imports:
+            print(f"{cumulative:>9.1f} ms  {'  ' * depth}{module}")
+
+    medians = {row["stage"]: row["p50_ms"] for row in rows}
+    failed = False
+    for stage, limit in (("import", args.max_import_ms), ("first_agent", args.max_first_agent_ms)):
+        if limit is not None and medians.get(stage, 0) > limit:
+            print(f"FAIL: median {stage} {medians[stage]} ms exceeds {limit} ms")
+            failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+"""Stand-in Letta server for local load testing without an LLM
+
+Implements the endpoints app.py uses (agents retrieve/create, messages
+create/stream and core-memory blocks) with configurable latency and canned or
+templated replies.
+
+Usage:
+    python -m loadtest.fake_letta --port 8283 --message-latency lognormal:2,0.4
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from uuid import uuid4
+
+from flask import Flask, Response, jsonify, request
+
+from scoring import SCORING_LOGIC
+
+
+def parse_latency(spec):
+    """Turn a latency spec into a function returning seconds to wait
+
+    Specs: "fixed:S", "uniform:LOW,HIGH" or "lognormal:MEDIAN,SIGMA".
+    """
+    kind, _, args = spec.partition(":")
+    values = [float(value) for value in args.split(",") if value]
+    if kind == "fixed":
+        return lambda: values[0]
+    if kind == "uniform":
+        return lambda: random.uniform(values[0], values[1])
+    if kind == "lognormal":
+        median, sigma = values
+        return lambda: median * random.lognormvariate(0, sigma)
+    raise ValueError(f"Unknown latency spec: {spec}")
+
+
+AREAS = SCORING_LOGIC["knowledge_areas"]
+
+
+def default_reply(prompt):
+    """Return a plausible canned reply for the kind of prompt app.py sends"""
+    if "roadmap_templates" in prompt:
+        weeks = re.findall(r'\[(\d+),"([^"]+)"', prompt)
+        return json.dumps({"weeks": [{
+            "week": int(week),
+            "topics": [f"{focus}: part {part}" for part in (1, 2, 3)],
+            "resources": [{"type": "Tutorial", "title": f"{focus} guide",
+                           "url": "https://example.com"}]
+        } for week, focus in weeks]})
+    if "feedback on this user's" in prompt:
+        area = next((area for area in AREAS if area in prompt), "this area")
+        return json.dumps({"feedback": f"Keep practising {area}."})
+    if "feedback for each knowledge area" in prompt:
+        areas = [area for area in AREAS if area in prompt] or AREAS
+        return json.dumps({area: f"Keep practising {area}." for area in areas})
+    return ("Here's a quick explanation.\n```python\ndef bfs(graph, start):\n"
+            "    ...\n```\nLet me know if you'd like more detail.")
+
+
+class FakeLetta:
+    """In-memory agents plus the Flask app serving the Letta API subset"""
+
+    def __init__(self, latencies=None, replies=(), stream_chunk=12, seed_agents=()):
+        self.latencies = latencies or {}
+        self.replies = [(re.compile(pattern), reply) for pattern, reply in replies]
+        self.stream_chunk = stream_chunk
+        self.agents = {agent_id: {"id": agent_id, "name": "seed", "blocks": {}}
+                       for agent_id in seed_agents}
+        self.calls = {}
+        self._lock = threading.Lock()
+        self.app = self._build_app()
+
+    def _wait(self, operation):
+        with self._lock:
+            self.calls[operation] = self.calls.get(operation, 0) + 1
+        sampler = self.latencies.get(operation)
+        if sampler:
+            time.sleep(max(0.0, sampler()))
+
+    def reply_for(self, agent_id, prompt):
+        """Pick a configured reply template for a prompt, or a canned default"""
+        for pattern, reply in self.replies:
+            if pattern.search(prompt):
+                return reply.replace("{agent_id}", agent_id)
+        return default_reply(prompt)
+
+    @staticmethod
+    def _message(content):
+        return {
+            "id": f"message-{uuid4()}",
+            "date": datetime.now(timezone.utc).isoformat(),
+            "message_type": "assistant_message",
+            "content": content
+        }
+
+    @staticmethod
+    def _agent_json(agent):
+        return {"id": agent["id"], "name": agent["name"]}
+
+    def _build_app(self):
+        app = Flask("fake_letta")
+
+        @app.route("/v1/agents/", methods=["POST"])
+        def create_agent():
+            self._wait("create")
+            data = request.json or {}
+            agent = {
+                "id": f"agent-{uuid4()}",
+                "name": data.get("name", "agent"),
+                "blocks": {block["label"]: block["value"]
+                           for block in data.get("memory_blocks", [])}
+            }
+            with self._lock:
+                self.agents[agent["id"]] = agent
+            return jsonify(self._agent_json(agent))
+
+        @app.route("/v1/agents/", methods=["GET"])
+        def list_agents():
+            self._wait("list")
+            name = request.args.get("name")
+            limit = request.args.get("limit", type=int)
+            agents = [self._agent_json(agent) for agent in list(self.agents.values())
+                      if name is None or agent["name"] == name]
+            return jsonify(agents[:limit] if limit else agents)
+
+        @app.route("/v1/agents/<agent_id>", methods=["GET"])
+        def retrieve_agent(agent_id):
+            self._wait("retrieve")
+            agent = self.agents.get(agent_id)
+            if agent is None:
+                return jsonify({"detail": "Agent not found"}), 404
+            return jsonify(self._agent_json(agent))
+
+        @app.route("/v1/agents/<agent_id>/messages", methods=["POST"])
+        def create_message(agent_id):
+            if agent_id not in self.agents:
+                return jsonify({"detail": "Agent not found"}), 404
+            self._wait("message")
+            prompt = "\n".join(message.get("content") or ""
+                               for message in request.json.get("messages", []))
+            return jsonify({
+                "messages": [self._message(self.reply_for(agent_id, prompt))],
+                "usage": {"prompt_tokens": len(prompt) // 4}
+            })
+
+        @app.route("/v1/agents/<agent_id>/messages/stream", methods=["POST"])
+        def stream_message(agent_id):
+            if agent_id not in self.agents:
+                return jsonify({"detail": "Agent not found"}), 404
+            prompt = "\n".join(message.get("content") or ""
+                               for message in request.json.get("messages", []))
+            reply = self.reply_for(agent_id, prompt)
+
+            def generate():
+                # Time to first token, then the rest spread across chunks
+                self._wait("stream")
+                for start in range(0, len(reply), self.stream_chunk):
+                    self._wait("stream_chunk")
+                    chunk = reply[start:start + self.stream_chunk]
+                    yield f"data: {json.dumps(self._message(chunk))}\n\n"
+                yield "data: [DONE]\n\n"
+
+            return Response(generate(), mimetype="text/event-stream")
+
+        @app.route("/v1/agents/<agent_id>/core-memory/blocks/<path:label>",
+                   methods=["GET", "PATCH"])
+        def memory_block(agent_id, label):
+            self._wait("blocks")
+            agent = self.agents.get(agent_id)
+            if agent is None:
+                return jsonify({"detail": "Agent not found"}), 404
+            if request.method == "PATCH":
+                agent["blocks"][label] = request.json.get("value", "")
+            return jsonify({"id": f"block-{label}", "label": label,
+                            "value": agent["blocks"].get(label, "")})
+
+        @app.route("/_stats", methods=["GET"])
+        def stats():
+            return jsonify({"agents": len(self.agents), "calls": self.calls})
+
+        return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8283)
+    parser.add_argument("--retrieve-latency", default="fixed:0.01")
+    parser.add_argument("--create-latency", default="fixed:0.2")
+    parser.add_argument("--message-latency", default="lognormal:2,0.4",
+                        help="latency of messages.create (the LLM call)")
+    parser.add_argument("--stream-latency", default="lognormal:0.5,0.3",
+                        help="time to first streamed token")
+    parser.add_argument("--chunk-latency", default="fixed:0.02",
+                        help="delay between streamed chunks")
+    parser.add_argument("--blocks-latency", default="fixed:0.01")
+    parser.add_argument("--replies",
+                        help='JSON file of [["regex", "reply template"], ...]; '
+                             '"{agent_id}" is substituted')
+    parser.add_argument("--seed-agent", action="append", default=[],
+                        help="agent id that already exists")
+    args = parser.parse_args()
+
+    replies = []
+    if args.replies:
+        with open(args.replies) as f:
+            replies = json.load(f)
+
+    fake = FakeLetta(
+        latencies={
+            "retrieve": parse_latency(args.retrieve_latency),
+            "create": parse_latency(args.create_latency),
+            "message": parse_latency(args.message_latency),
+            "stream": parse_latency(args.stream_latency),
+            "stream_chunk": parse_latency(args.chunk_latency),
+            "blocks": parse_latency(args.blocks_latency)
+        },
+        replies=replies,
+        seed_agents=args.seed_agent
+    )
+    fake.app.run(port=args.port, threaded=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""End-to-end load test of the learning path generator
+
+Each virtual user runs the full journey (save_profile, get_questions,
+submit_answers, generate_roadmap, chat) with its own cookie session, and the
+driver reports p50/p95/p99 latency, errors and throughput per route.
+
+Usage, against the fake Letta server:
+    python -m loadtest.fake_letta --port 8283 &
+    LETTA_BASE_URL=http://localhost:8283 python app.py &
+    python -m loadtest.run --base-url http://localhost:5003 --users 200 --concurrency 20
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+
+PROFILES = {
+    "experience": ["0-1", "1-3", "3-5", "5-10", "10+"],
+    "education": ["yes", "no"],
+    "goal": ["interview", "preparing", "fun"]
+}
+
+CHAT_MESSAGES = [
+    "Can you explain how BFS differs from DFS?",
+    "What should I focus on this week?",
+    "How do I recognise a dynamic programming problem?",
+    "Give me a binary search template in Python."
+]
+
+
+def percentile(samples, pct):
+    """Return the nearest-rank percentile of a sorted list of samples"""
+    if not samples:
+        return 0.0
+    rank = max(1, round(pct / 100 * len(samples)))
+    return samples[min(rank, len(samples)) - 1]
+
+
+class Recorder:
+    """Thread-safe per-route latency and error collection"""
+
+    def __init__(self):
+        self.latencies = {}
+        self.errors = {}
+        self._lock = threading.Lock()
+
+    def record(self, route, seconds, ok):
+        with self._lock:
+            self.latencies.setdefault(route, []).append(seconds)
+            if not ok:
+                self.errors[route] = self.errors.get(route, 0) + 1
+
+    def report(self, elapsed):
+        """Return one summary row per route"""
+        rows = []
+        for route, samples in self.latencies.items():
+            samples = sorted(samples)
+            rows.append({
+                "route": route,
+                "requests": len(samples),
+                "errors": self.errors.get(route, 0),
+                "p50_ms": round(percentile(samples, 50) * 1000, 1),
+                "p95_ms": round(percentile(samples, 95) * 1000, 1),
+                "p99_ms": round(percentile(samples, 99) * 1000, 1),
+                "rps": round(len(samples) / elapsed, 2) if elapsed else 0.0
+            })
+        return rows
+
+
+def timed(recorder, route, call):
+    """Run one request, recording its latency and whether it succeeded"""
+    start = time.perf_counter()
+    ok = False
+    try:
+        response = call()
+        ok = response.status_code < 400
+        return response
+    except httpx.HTTPError as e:
+        print(f"{route} failed: {e}")
+        return None
+    finally:
+        recorder.record(route, time.perf_counter() - start, ok)
+
+
+def read_stream(response, start):
+    """Consume an SSE chat stream and return (time to first event, ok)"""
+    first_event = None
+    ok = True
+    for line in response.iter_lines():
+        if not line.startswith("data: "):
+            continue
+        if first_event is None:
+            first_event = time.perf_counter() - start
+        if "error" in json.loads(line[len("data: "):]):
+            ok = False
+    return first_event, ok
+
+
+def run_user(base_url, recorder, stream_chat, timeout):
+    """Walk one user through the whole journey"""
+    with httpx.Client(base_url=base_url, timeout=timeout) as http:
+        profile = {key: random.choice(values) for key, values in PROFILES.items()}
+        timed(recorder, "save_profile", lambda: http.post("/api/save_profile", json=profile))
+
+        response = timed(recorder, "get_questions", lambda: http.get("/api/get_questions"))
+        if response is None or response.status_code >= 400:
+            return
+        questions = response.json()["questions"]
+
+        # Mostly right answers, with a few misses so scores vary
+        answers = [q["correctAnswer"] if random.random() < 0.6 else random.choice(q["options"])["id"]
+                   for q in questions]
+        timed(recorder, "submit_answers",
+              lambda: http.post("/api/submit_answers", json={"answers": answers}))
+
+        response = timed(recorder, "generate_roadmap", lambda: http.get("/api/generate_roadmap"))
+        roadmap = response.json() if response is not None and response.status_code < 400 else {}
+
+        chat = {"message": random.choice(CHAT_MESSAGES), "context": {"roadmapData": roadmap}}
+        if not stream_chat:
+            timed(recorder, "chat", lambda: http.post("/api/chat", json=chat))
+            return
+
+        start = time.perf_counter()
+        try:
+            with http.stream("POST", "/api/chat/stream", json=chat) as response:
+                first_event, ok = read_stream(response, start)
+                ok = ok and response.status_code < 400
+        except httpx.HTTPError as e:
+            print(f"chat_stream failed: {e}")
+            first_event, ok = None, False
+        recorder.record("chat_stream", time.perf_counter() - start, ok)
+        if first_event is not None:
+            recorder.record("chat_stream_first_event", first_event, ok)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://localhost:5003")
+    parser.add_argument("--users", type=int, default=50,
+                        help="number of user journeys to run")
+    parser.add_argument("--concurrency", type=int, default=10,
+                        help="journeys running at the same time")
+    parser.add_argument("--stream-chat", action="store_true",
+                        help="use /api/chat/stream instead of /api/chat")
+    parser.add_argument("--timeout", type=float, default=300)
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    recorder = Recorder()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        futures = [executor.submit(run_user, args.base_url, recorder,
+                                   args.stream_chat, args.timeout)
+                   for _ in range(args.users)]
+        for future in futures:
+            future.result()
+    elapsed = time.perf_counter() - start
+
+    rows = recorder.report(elapsed)
+    if args.json:
+        print(json.dumps({"elapsed": elapsed, "routes": rows}, indent=2))
+        return
+
+    print(f"{args.users} journeys, concurrency {args.concurrency}, {elapsed:.1f}s")
+    print(f"{'route':<24}{'reqs':>6}{'errs':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>8}")
+    for row in rows:
+        print(f"{row['route']:<24}{row['requests']:>6}{row['errors']:>6}"
+              f"{row['p50_ms']:>10}{row['p95_ms']:>10}{row['p99_ms']:>10}{row['rps']:>8}")
+
+
+if __name__ == "__main__":
+    main()
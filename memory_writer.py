@@ -0,0 +1,161 @@
+"""Background writer that batches user_history updates into agent memory"""
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from client_factory import is_not_found, request_options
+from metrics import track_letta_call
+
+
+DEFAULT_HISTORY = {
+    "evaluations_completed": 0,
+    "last_evaluation": None,
+    "roadmaps_generated": 0
+}
+
+
+def merge_history(history, updates):
+    """Fold a batch of pending updates into a user_history block value"""
+    merged = dict(DEFAULT_HISTORY)
+    merged.update(history or {})
+    for update in updates:
+        if update.get("last_evaluation"):
+            merged["evaluations_completed"] = (
+                merged.get("evaluations_completed") or 0) + 1
+            merged["last_evaluation"] = update["last_evaluation"]
+        merged["roadmaps_generated"] = (
+            merged.get("roadmaps_generated") or 0) + update.get("roadmaps_generated", 0)
+    return merged
+
+
+class MemoryWriter:
+    """Coalesce user_history updates from many users into periodic block writes
+
+    Updates are queued per agent and flushed every ``interval`` seconds by a
+    thread pool, writing the block directly through the blocks API instead of
+    asking the model to do it. A failed batch is retried on later flushes up
+    to ``max_attempts`` times; each agent keeps at most ``max_queued``
+    updates, dropping the oldest, and updates for a deleted agent are dropped.
+    """
+
+    def __init__(self, client, interval=5.0, max_workers=2, max_attempts=5, max_queued=100):
+        self.client = client
+        self.interval = interval
+        self.max_attempts = max_attempts
+        self.max_queued = max_queued
+        self.writes = 0
+        self.failures = 0
+        self.dropped = 0
+        self._pending = {}
+        self._attempts = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="memory-writer")
+        self._stop = threading.Event()
+        self._thread = None
+
+    def enqueue(self, agent_id, update):
+        """Queue a history update for the agent's next batched write"""
+        with self._lock:
+            items = self._pending.setdefault(agent_id, [])
+            items.append((time.monotonic(), update))
+            self._trim(agent_id, items)
+            if self._thread is None and not self._stop.is_set():
+                self._thread = threading.Thread(
+                    target=self._run, name="memory-writer-timer", daemon=True)
+                self._thread.start()
+
+    def _trim(self, agent_id, items):
+        # Called with the lock held; keeps the newest max_queued updates
+        excess = len(items) - self.max_queued
+        if excess > 0:
+            del items[:excess]
+            self.dropped += excess
+            print(f"Memory queue for agent {agent_id} is full, dropped {excess} oldest updates")
+
+    def _drop(self, agent_id, items, reason):
+        with self._lock:
+            self._attempts.pop(agent_id, None)
+            self.dropped += len(items)
+        print(f"Dropped {len(items)} memory updates for agent {agent_id}: {reason}")
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.flush()
+
+    def _take_pending(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        return pending
+
+    def flush(self):
+        """Submit one write per agent with pending updates and return the futures"""
+        return [self._executor.submit(self._write, agent_id, items)
+                for agent_id, items in self._take_pending().items()]
+
+    def _write(self, agent_id, items):
+        updates = [update for _, update in items]
+        try:
+            with track_letta_call("memory"):
+                block = self.client.agents.blocks.retrieve(
+                    agent_id=agent_id, block_label="user_history",
+                    request_options=request_options("blocks"))
+                try:
+                    history = json.loads(block.value)
+                except (TypeError, ValueError):
+                    history = {}
+
+                self.client.agents.blocks.modify(
+                    agent_id=agent_id,
+                    block_label="user_history",
+                    value=json.dumps(merge_history(history, updates)),
+                    request_options=request_options("blocks")
+                )
+            self.writes += 1
+            with self._lock:
+                self._attempts.pop(agent_id, None)
+            print(f"Memory updated for agent {agent_id} with {len(updates)} updates")
+            return True
+
+        except Exception as e:
+            print(f"Error updating agent memory: {e}")
+            self.failures += 1
+            if is_not_found(e):
+                self._drop(agent_id, items, "the agent no longer exists")
+                return False
+            with self._lock:
+                attempts = self._attempts.get(agent_id, 0) + 1
+                if attempts < self.max_attempts:
+                    # Put the batch back so the next flush retries it
+                    self._attempts[agent_id] = attempts
+                    requeued = items + self._pending.get(agent_id, [])
+                    self._trim(agent_id, requeued)
+                    self._pending[agent_id] = requeued
+                    return False
+            self._drop(agent_id, items, f"gave up after {attempts} attempts")
+            return False
+
+    def stats(self):
+        """Return queue depth, age of the oldest pending update and counters"""
+        with self._lock:
+            queued = [enqueued for items in self._pending.values()
+                      for enqueued, _ in items]
+        return {
+            "queue_depth": len(queued),
+            "lag_seconds": round(time.monotonic() - min(queued), 3) if queued else 0.0,
+            "writes": self.writes,
+            "failures": self.failures,
+            "dropped": self.dropped
+        }
+
+    def shutdown(self):
+        """Stop the timer, write everything still queued and wait for it"""
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        self._executor.shutdown(wait=True)
+
+        # The pool no longer accepts work at interpreter exit, so write inline
+        for agent_id, items in self._take_pending().items():
+            self._write(agent_id, items)
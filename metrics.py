@@ -0,0 +1,216 @@
+"""Prometheus-style metrics rendered in the text exposition format"""
+import threading
+import time
+from contextlib import contextmanager
+
+
+# Seconds; spans fast local routes up to multi-minute LLM calls
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+# Tokens or characters
+SIZE_BUCKETS = (50, 100, 200, 400, 800, 1600, 3200, 6400, 12800)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """Base for a named metric family with a fixed set of label names"""
+
+    kind = "untyped"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self):
+        """Return (suffix, label values, extra labels, value) tuples"""
+        with self._lock:
+            return [("", key, (), value) for key, value in self._values.items()]
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}",
+                 f"# TYPE {self.name} {self.kind}"]
+        for suffix, key, extra, value in self.samples():
+            lines.append(f"{self.name}{suffix}{_format_labels(self.labelnames, key, extra)} "
+                         f"{_format_value(value)}")
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    """Monotonically increasing count"""
+
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    """Value that goes up and down, set directly or read from a callback
+
+    A callback returns either a number, or a dict mapping label value tuples
+    to numbers for labelled gauges.
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name, documentation, labelnames=(), callback=None):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def samples(self):
+        if self.callback is None:
+            return super().samples()
+        try:
+            value = self.callback()
+        except Exception as e:
+            print(f"Error reading metric {self.name}: {e}")
+            return []
+        if isinstance(value, dict):
+            return [("", tuple(key), (), item) for key, item in value.items()]
+        return [("", (), (), value)]
+
+
+class Histogram(Metric):
+    """Distribution of observations in cumulative buckets"""
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * len(self.buckets), 0.0))
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+                    break
+            self._values[key] = (counts, total + value)
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of the with-block in seconds"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self):
+        with self._lock:
+            values = [(key, list(counts), total) for key, (counts, total) in self._values.items()]
+
+        samples = []
+        for key, counts, total in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                samples.append(("_bucket", key, (("le", _format_value(bound)),), cumulative))
+            samples.append(("_sum", key, (), total))
+            samples.append(("_count", key, (), cumulative))
+        return samples
+
+
+class Registry:
+    """Collection of metrics rendered together"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        """Add a metric, replacing any earlier one with the same name"""
+        with self._lock:
+            self._metrics[metric.name] = metric
+        return metric
+
+    def render(self):
+        """Return every metric in the Prometheus text exposition format"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+REGISTRY = Registry()
+
+REQUEST_LATENCY = REGISTRY.register(Histogram(
+    "http_request_duration_seconds", "Flask request latency by route",
+    ["route", "method", "status"]))
+
+LETTA_CALL_LATENCY = REGISTRY.register(Histogram(
+    "letta_call_duration_seconds", "Letta API call latency by purpose",
+    ["purpose", "outcome"]))
+
+LETTA_IN_FLIGHT = REGISTRY.register(Gauge(
+    "letta_calls_in_flight", "Letta API calls currently waiting on the server",
+    ["purpose"]))
+
+JSON_EXTRACTION_LATENCY = REGISTRY.register(Histogram(
+    "json_extraction_duration_seconds", "Time to extract and validate JSON from agent replies",
+    ["purpose"], buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1)))
+
+JSON_EXTRACTION_FAILURES = REGISTRY.register(Counter(
+    "json_extraction_failures_total", "Agent replies with no usable JSON", ["purpose"]))
+
+PROMPT_TOKENS = REGISTRY.register(Histogram(
+    "prompt_tokens", "Estimated tokens in prompts sent to the agent",
+    ["route"], buckets=SIZE_BUCKETS))
+
+RESPONSE_CHARS = REGISTRY.register(Histogram(
+    "letta_response_chars", "Characters in assistant replies", ["purpose"], buckets=SIZE_BUCKETS))
+
+
+@contextmanager
+def track_letta_call(purpose):
+    """Count a Letta call as in flight and observe its latency and outcome"""
+    LETTA_IN_FLIGHT.inc(purpose=purpose)
+    start = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    finally:
+        LETTA_IN_FLIGHT.dec(purpose=purpose)
+        LETTA_CALL_LATENCY.observe(time.perf_counter() - start,
+                                   purpose=purpose, outcome=outcome)
@@ -0,0 +1,174 @@
+"""Compact, token-budgeted prompts for the evaluator agent"""
+import json
+import os
+import re
+import threading
+
+from metrics import PROMPT_TOKENS
+from question_bank import get_bank
+
+
+# Per-route input token budgets, overridable with PROMPT_BUDGET_<ROUTE>
+DEFAULT_BUDGETS = {
+    "evaluation": 400,
+    "roadmap": 600,
+    "chat": 800
+}
+
+# Words, numbers and individual punctuation marks are each roughly one token;
+# long words are split into ~4 character pieces like BPE tokenizers do
+_TOKEN_PATTERN = re.compile(r"[A-Za-z]+|\d+|[^\sA-Za-z\d]")
+
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+def count_tokens(text):
+    """Estimate the number of LLM tokens in text without a tokenizer dependency"""
+    return sum(max(1, (len(piece) + 3) // 4) if piece.isalpha() else 1
+               for piece in _TOKEN_PATTERN.findall(text))
+
+
+def compact_json(data):
+    """Serialise data with no indentation or spaces after separators"""
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+
+
+def token_budget(route):
+    """Return the configured token budget for a route"""
+    return int(os.environ.get(f"PROMPT_BUDGET_{route.upper()}", DEFAULT_BUDGETS[route]))
+
+
+def prompt_stats():
+    """Return per-route prompt counts and token totals"""
+    with _stats_lock:
+        return {route: dict(stats) for route, stats in _stats.items()}
+
+
+def fit_prompt(route, required, optional=(), optional_first=False):
+    """Join prompt sections, dropping optional ones from the end until it fits
+
+    Sections in ``required`` are always kept; ``optional`` sections are ordered
+    from most to least important and placed after the required ones, or
+    before them with ``optional_first``. The final size is logged per route.
+    """
+    def join(kept):
+        sections = kept + list(required) if optional_first else list(required) + kept
+        return "\n\n".join(sections)
+
+    budget = token_budget(route)
+    optional = [section for section in optional if section]
+    total_optional = len(optional)
+    prompt = join(optional)
+    tokens = count_tokens(prompt)
+
+    while tokens > budget and optional:
+        optional.pop()
+        prompt = join(optional)
+        tokens = count_tokens(prompt)
+
+    dropped = total_optional - len(optional)
+    with _stats_lock:
+        stats = _stats.setdefault(
+            route, {"prompts": 0, "tokens": 0, "over_budget": 0})
+        stats["prompts"] += 1
+        stats["tokens"] += tokens
+        stats["last_tokens"] = tokens
+        if tokens > budget:
+            stats["over_budget"] += 1
+    PROMPT_TOKENS.observe(tokens, route=route)
+
+    print(f"Prompt size for {route}: {tokens} tokens, {len(prompt)} chars "
+          f"(budget {budget}, dropped {dropped} sections)")
+    return prompt
+
+
+def _missed_questions(evaluation_data):
+    """Return [area, question excerpt] for each missed question of an evaluation"""
+    # Questions aren't in the agent's memory, so the missed ones are quoted briefly
+    bank = get_bank()
+    missed = []
+    for item in evaluation_data.get("review", []):
+        question = None if item["correct"] else bank.get(item["question_id"])
+        if question is not None:
+            missed.append([question["area"], question["question"].split("\n")[0][:60]])
+    return missed
+
+
+def evaluation_feedback_prompt(evaluation_data, user_profile, areas=None):
+    """Ask for per-area feedback on locally computed scores, for all areas or only those given"""
+    area_scores = {
+        area: [data["score"], data["recommended"]]
+        for area, data in evaluation_data["areas"].items()
+        if areas is None or area in areas
+    }
+    missed = [[area, question] for area, question in _missed_questions(evaluation_data)
+              if area in area_scores]
+
+    return fit_prompt("evaluation", [
+        "Write one or two sentences of personalised, encouraging feedback for each knowledge area.",
+        f"Profile:{compact_json(user_profile)}\nArea [score,recommended]:{compact_json(area_scores)}",
+        "Return ONLY a JSON object mapping each area name to its feedback string."
+    ], [
+        f"Missed questions [area,question]:{compact_json(missed[:5])}"
+    ])
+
+
+def roadmap_enrichment_prompt(roadmap, roadmap_input):
+    """Ask for topics and resources for the weeks of a locally built roadmap"""
+    evaluation = roadmap_input["evaluation"]
+    area_scores = {area: data.get("score")
+                   for area, data in evaluation.get("areas", {}).items()}
+    weeks = [[week["week"], week["focus"], week["areas"]] for week in roadmap["weeks"]]
+
+    return fit_prompt("roadmap", [
+        f"Personalise this {roadmap['level']} roadmap built from roadmap_templates "
+        "by choosing topics and learning resources for each week.",
+        f"Weeks [week,focus,areas]:{compact_json(weeks)}\nArea scores:{compact_json(area_scores)}",
+        "Return ONLY a JSON object: "
+        '{"weeks":[{"week":int,"topics":[str],"resources":[{"type":str,"title":str,"url":str}]}]}. '
+        "Give 3-5 topics per week, focused on the weakest areas, and resources specific to the topics."
+    ], [
+        f"Profile:{compact_json(roadmap_input['user_profile'])}"
+    ])
+
+
+def chat_prompt(message, context, summary="", recent=""):
+    """Build a chat prompt, keeping the user's question and trimming context first
+
+    ``summary`` digests the user's earlier turns and ``recent`` quotes the
+    last few, so the agent follows this user's conversation without relying
+    on the shared agent's own message history.
+    """
+    profile_lines = []
+    if context.get('experience'):
+        profile_lines.append(f"Experience: {context.get('experience')}")
+    if context.get('education'):
+        profile_lines.append(f"CS background: {context.get('education')}")
+    if context.get('goal'):
+        profile_lines.append(f"Goal: {context.get('goal')}")
+
+    evaluation_section = ""
+    if context.get('evaluationResults'):
+        results = context.get('evaluationResults')
+        area_scores = {area: [data.get('score'), data.get('recommended')]
+                       for area, data in results.get('areas', {}).items()}
+        evaluation_section = (f"Overall score: {results.get('score')}%\n"
+                              f"Area [score,recommended]:{compact_json(area_scores)}")
+
+    roadmap_section = ""
+    if context.get('roadmapData'):
+        roadmap = context.get('roadmapData')
+        roadmap_section = f"Learning path: {roadmap.get('title')} ({roadmap.get('level')})"
+
+    return fit_prompt("chat", [
+        "[USER QUESTION]\n" + message,
+        "Respond conversationally as the Learning Path Generator assistant: concise, educational and "
+        "encouraging, with code in triple-backtick markdown blocks."
+    ], [
+        "[CONTEXT]\n" + "\n".join(profile_lines) if profile_lines else "",
+        "[RECENT TURNS]\n" + recent if recent else "",
+        evaluation_section,
+        "[EARLIER IN THIS CHAT]\n" + summary if summary else "",
+        roadmap_section
+    ], optional_first=True)
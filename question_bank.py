@@ -0,0 +1,286 @@
+"""Assessment question bank: a versioned JSON source compiled to an indexed file
+
+data/questions.json is the source of truth: {"version": int, "questions": [...]},
+each question carrying an id, area, difficulty (1 easy to 3 hard), options,
+correctAnswer and explanation. Bump "version" whenever a question, option or
+answer changes so cached copies are invalidated.
+
+The source is compiled to data/questions.idx, which is memory-mapped and read
+on demand instead of being parsed whole:
+
+    header    magic, format and the length of the table of contents
+    toc       JSON: bank version, source hash, record count, bucket ranges
+    ids       uint32 question id per record, ascending
+    offsets   uint64 offset and uint32 length per record
+    buckets   uint32 record numbers grouped by area, then difficulty
+    records   compact JSON of each question
+
+Compile ahead of a deploy with ``python question_bank.py``; otherwise a
+missing or stale index is rebuilt on first use (in memory if the directory
+is read-only).
+"""
+import bisect
+import hashlib
+import json
+import mmap
+import os
+import random
+import struct
+import sys
+import threading
+from functools import lru_cache
+
+
+BANK_PATH = os.environ.get(
+    'QUESTION_BANK_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'questions.json'))
+INDEX_PATH = os.environ.get('QUESTION_INDEX_PATH', os.path.splitext(BANK_PATH)[0] + '.idx')
+
+# Questions per knowledge area in a quiz; covers every question of the current bank
+QUESTIONS_PER_AREA = int(os.environ.get('QUIZ_QUESTIONS_PER_AREA', 4))
+
+MAGIC = b"QBIX"
+INDEX_FORMAT = 1
+_HEADER = struct.Struct("<4sII")
+_UINT32 = struct.Struct("<I")
+_OFFSET = struct.Struct("<QI")
+
+REQUIRED_FIELDS = ("id", "area", "difficulty", "question", "options", "correctAnswer", "explanation")
+
+
+class QuestionBankError(ValueError):
+    """Raised when the question bank source or index is malformed"""
+
+
+def _validate(questions):
+    seen = set()
+    for question in questions:
+        missing = [name for name in REQUIRED_FIELDS if name not in question]
+        if missing:
+            raise QuestionBankError(f"Question {question.get('id')} is missing {missing}")
+        if question["id"] in seen:
+            raise QuestionBankError(f"Duplicate question id {question['id']}")
+        seen.add(question["id"])
+        option_ids = {option["id"] for option in question["options"]}
+        answers = {part.strip() for part in question["correctAnswer"].split(",")}
+        if not answers <= option_ids:
+            raise QuestionBankError(f"Question {question['id']} answer is not one of its options")
+
+
+def build_index(source):
+    """Compile the raw bytes of a bank source file into index bytes"""
+    bank = json.loads(source)
+    questions = sorted(bank["questions"], key=lambda question: question["id"])
+    _validate(questions)
+
+    records = [json.dumps(question, separators=(",", ":")).encode("utf-8")
+               for question in questions]
+
+    # Record numbers grouped by area (in first-seen order), then difficulty
+    grouped = {}
+    for number, question in enumerate(questions):
+        grouped.setdefault(question["area"], {}).setdefault(
+            int(question["difficulty"]), []).append(number)
+
+    buckets = []
+    areas = {}
+    for area, by_difficulty in grouped.items():
+        area_start = len(buckets)
+        difficulties = {}
+        for difficulty in sorted(by_difficulty):
+            difficulties[str(difficulty)] = [len(buckets), len(by_difficulty[difficulty])]
+            buckets.extend(by_difficulty[difficulty])
+        areas[area] = {"range": [area_start, len(buckets) - area_start],
+                       "difficulties": difficulties}
+
+    toc = json.dumps({
+        "version": bank["version"],
+        "source_hash": hashlib.sha256(source).hexdigest(),
+        "count": len(questions),
+        "areas": areas
+    }, separators=(",", ":")).encode("utf-8")
+
+    parts = [_HEADER.pack(MAGIC, INDEX_FORMAT, len(toc)), toc]
+    parts.extend(_UINT32.pack(question["id"]) for question in questions)
+    offset = 0
+    for record in records:
+        parts.append(_OFFSET.pack(offset, len(record)))
+        offset += len(record)
+    parts.extend(_UINT32.pack(number) for number in buckets)
+    parts.extend(records)
+    return b"".join(parts)
+
+
+class QuestionBank:
+    """Read-only view of a compiled index held in an mmap or bytes buffer"""
+
+    def __init__(self, buffer):
+        magic, index_format, toc_length = _HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC or index_format != INDEX_FORMAT:
+            raise QuestionBankError("Not a question bank index of a supported format")
+        toc = json.loads(bytes(buffer[_HEADER.size:_HEADER.size + toc_length]))
+
+        self._buffer = buffer
+        self.version = toc["version"]
+        self.source_hash = toc["source_hash"]
+        self.count = toc["count"]
+        self.areas = toc["areas"]
+        self._ids_at = _HEADER.size + toc_length
+        self._offsets_at = self._ids_at + _UINT32.size * self.count
+        self._buckets_at = self._offsets_at + _OFFSET.size * self.count
+        self._records_at = self._buckets_at + _UINT32.size * self.count
+        self.record = lru_cache(maxsize=4096)(self._read_record)
+        self.public_json = lru_cache(maxsize=4096)(self._public_json)
+
+    def _id_at(self, number):
+        return _UINT32.unpack_from(self._buffer, self._ids_at + _UINT32.size * number)[0]
+
+    def _read_record(self, number):
+        offset, length = _OFFSET.unpack_from(self._buffer, self._offsets_at + _OFFSET.size * number)
+        start = self._records_at + offset
+        return json.loads(bytes(self._buffer[start:start + length]))
+
+    def _public_json(self, number, with_answer=True):
+        # Adaptive questions are served one at a time, before they are answered,
+        # so they leave out the answer key
+        question = self.record(number)
+        public = {
+            "id": question["id"],
+            "question": question["question"],
+            "options": question["options"]
+        }
+        if with_answer:
+            public["correctAnswer"] = question["correctAnswer"]
+        return json.dumps(public, separators=(",", ":"))
+
+    def bucket_entry(self, position):
+        """Return the record number at a position of the bucket section"""
+        return _UINT32.unpack_from(self._buffer, self._buckets_at + _UINT32.size * position)[0]
+
+    def number_of(self, question_id):
+        """Return the record number of a question id, or None"""
+        if not isinstance(question_id, int):
+            return None
+        number = bisect.bisect_left(range(self.count), question_id, key=self._id_at)
+        if number < self.count and self._id_at(number) == question_id:
+            return number
+        return None
+
+    def get(self, question_id):
+        """Return the full question with this id, or None"""
+        number = self.number_of(question_id)
+        return None if number is None else self.record(number)
+
+    def bucket(self, area, difficulty=None):
+        """Return the (start, count) range of an area's bucket entries"""
+        entry = self.areas.get(area)
+        if entry is None:
+            return 0, 0
+        if difficulty is None:
+            return tuple(entry["range"])
+        return tuple(entry["difficulties"].get(str(difficulty), (0, 0)))
+
+    def sample_numbers(self, area, count, difficulty=None, rng=random):
+        """Return up to count random record numbers from an area, in O(count)"""
+        start, size = self.bucket(area, difficulty)
+        positions = rng.sample(range(start, start + size), min(count, size))
+        return [self.bucket_entry(position) for position in positions]
+
+    def quiz(self, per_area=QUESTIONS_PER_AREA, rng=random):
+        """Return record numbers of a random quiz with per_area questions per area, by id"""
+        numbers = []
+        for area in self.areas:
+            numbers.extend(self.sample_numbers(area, per_area, rng=rng))
+        return sorted(numbers)
+
+    def default_quiz(self, per_area=QUESTIONS_PER_AREA):
+        """Return record numbers of the fixed quiz: the lowest ids of each area"""
+        numbers = []
+        for area in self.areas:
+            start, size = self.bucket(area)
+            numbers.extend(sorted(self.bucket_entry(position)
+                                  for position in range(start, start + size))[:per_area])
+        return sorted(numbers)
+
+    def questions(self, question_ids):
+        """Return the questions for a list of ids, skipping unknown ones"""
+        numbers = [self.number_of(question_id) for question_id in question_ids]
+        return [self.record(number) for number in numbers if number is not None]
+
+    def payload_json(self, numbers):
+        """Return the /api/get_questions JSON for a quiz and its ETag"""
+        body = (f'{{"version":{self.version},"questions":['
+                + ",".join(self.public_json(number) for number in numbers) + "]}")
+        return body, hashlib.sha256(body.encode("utf-8")).hexdigest()[:32]
+
+
+def _read_index(path):
+    try:
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return None
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except FileNotFoundError:
+        return None
+
+
+def compile_bank(source_path=BANK_PATH, index_path=INDEX_PATH):
+    """Compile the bank source to its index file and return the index bytes"""
+    with open(source_path, "rb") as f:
+        data = build_index(f.read())
+    tmp_path = f"{index_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, index_path)
+    return data
+
+
+def load_bank(source_path=BANK_PATH, index_path=INDEX_PATH):
+    """Open the compiled index, rebuilding it first if it is missing or stale"""
+    with open(source_path, "rb") as f:
+        source_hash = hashlib.sha256(f.read()).hexdigest()
+
+    buffer = _read_index(index_path)
+    if buffer is not None:
+        try:
+            bank = QuestionBank(buffer)
+            if bank.source_hash == source_hash:
+                return bank
+        except (QuestionBankError, struct.error, ValueError):
+            pass
+        print(f"Question bank index {index_path} is stale, rebuilding", file=sys.stderr)
+
+    try:
+        compile_bank(source_path, index_path)
+    except OSError as e:
+        # Read-only deploys build the index in memory instead
+        print(f"Could not write question bank index ({e}), keeping it in memory", file=sys.stderr)
+        with open(source_path, "rb") as f:
+            return QuestionBank(build_index(f.read()))
+    return QuestionBank(_read_index(index_path))
+
+
+_bank = None
+_bank_lock = threading.Lock()
+
+
+def get_bank():
+    """Return the shared question bank, loading it on first use
+
+    Diagnostics go to stderr, so command-line tools can stream results on stdout.
+    """
+    global _bank
+    if _bank is None:
+        with _bank_lock:
+            if _bank is None:
+                _bank = load_bank()
+                print(f"Loaded question bank v{_bank.version}: {_bank.count} questions, "
+                      f"{len(_bank.areas)} areas", file=sys.stderr)
+    return _bank
+
+
+if __name__ == "__main__":
+    source = sys.argv[1] if len(sys.argv) > 1 else BANK_PATH
+    target = sys.argv[2] if len(sys.argv) > 2 else os.path.splitext(source)[0] + '.idx'
+    index = compile_bank(source, target)
+    print(f"Compiled {source} -> {target} ({len(index)} bytes)")
@@ -0,0 +1,161 @@
+"""Deterministic roadmaps built from roadmap_templates and the user's area scores"""
+import copy
+from uuid import uuid4
+
+from roadmap_cache import roadmap_level
+from scoring import SCORING_LOGIC
+
+
+# Six-week plans per level; "areas" lists the knowledge areas each week trains
+ROADMAP_TEMPLATES = {
+    "beginner": {
+        "title": "Beginner's Path to Algorithmic Mastery",
+        "weekly_structure": [
+            {"week": 1, "focus": "Foundations", "hours_per_week": 10, "modules": 3, "lessons": 6,
+             "areas": ["Miscellaneous"]},
+            {"week": 2, "focus": "Basic Data Structures", "hours_per_week": 12, "modules": 4, "lessons": 8,
+             "areas": ["Two Pointers", "Priority Queue/Heap"]},
+            {"week": 3, "focus": "Searching Algorithms", "hours_per_week": 12, "modules": 3, "lessons": 9,
+             "areas": ["Binary Search", "BFS"]},
+            {"week": 4, "focus": "Sorting Algorithms", "hours_per_week": 14, "modules": 4, "lessons": 12,
+             "areas": ["Two Pointers", "Miscellaneous"]},
+            {"week": 5, "focus": "Graph Basics", "hours_per_week": 14, "modules": 3, "lessons": 9,
+             "areas": ["Graph", "BFS", "DFS/Backtracking"]},
+            {"week": 6, "focus": "Introduction to Dynamic Programming", "hours_per_week": 15, "modules": 4,
+             "lessons": 8, "areas": ["Dynamic Programming"]}
+        ]
+    },
+    "intermediate": {
+        "title": "Intermediate Algorithm Advancement",
+        "weekly_structure": [
+            {"week": 1, "focus": "Advanced Data Structures", "hours_per_week": 12, "modules": 4, "lessons": 8,
+             "areas": ["Priority Queue/Heap"]},
+            {"week": 2, "focus": "Binary Search Applications", "hours_per_week": 14, "modules": 3, "lessons": 9,
+             "areas": ["Binary Search"]},
+            {"week": 3, "focus": "Depth-First and Breadth-First Search", "hours_per_week": 15, "modules": 4,
+             "lessons": 12, "areas": ["BFS", "DFS/Backtracking"]},
+            {"week": 4, "focus": "Dynamic Programming Patterns", "hours_per_week": 16, "modules": 4, "lessons": 8,
+             "areas": ["Dynamic Programming"]},
+            {"week": 5, "focus": "Advanced Graph Algorithms", "hours_per_week": 15, "modules": 3, "lessons": 9,
+             "areas": ["Graph"]},
+            {"week": 6, "focus": "Problem-Solving Strategies", "hours_per_week": 14, "modules": 4, "lessons": 10,
+             "areas": ["Two Pointers", "Miscellaneous"]}
+        ]
+    },
+    "advanced": {
+        "title": "Advanced Algorithm Mastery",
+        "weekly_structure": [
+            {"week": 1, "focus": "Complex Data Structures", "hours_per_week": 15, "modules": 4, "lessons": 10,
+             "areas": ["Priority Queue/Heap"]},
+            {"week": 2, "focus": "Advanced Binary Search Techniques", "hours_per_week": 16, "modules": 3,
+             "lessons": 9, "areas": ["Binary Search"]},
+            {"week": 3, "focus": "Advanced Graph Theory", "hours_per_week": 18, "modules": 4, "lessons": 12,
+             "areas": ["Graph", "BFS"]},
+            {"week": 4, "focus": "Dynamic Programming Optimization", "hours_per_week": 20, "modules": 5,
+             "lessons": 15, "areas": ["Dynamic Programming"]},
+            {"week": 5, "focus": "Advanced Algorithm Design", "hours_per_week": 18, "modules": 4, "lessons": 12,
+             "areas": ["DFS/Backtracking", "Two Pointers"]},
+            {"week": 6, "focus": "Competitive Programming Strategies", "hours_per_week": 15, "modules": 4,
+             "lessons": 10, "areas": ["Miscellaneous"]}
+        ]
+    }
+}
+
+# Placeholder topics and practice sets shown until the agent's enrichment arrives
+AREA_TOPICS = {
+    "Binary Search": ["Search space reduction", "Lower and upper bounds", "Binary search on the answer"],
+    "Two Pointers": ["Opposite-end pointers", "Sliding window", "Fast and slow pointers"],
+    "BFS": ["Level-order traversal", "Shortest paths in unweighted graphs", "Multi-source BFS"],
+    "DFS/Backtracking": ["Recursive DFS", "Permutations and subsets", "Pruning the search tree"],
+    "Priority Queue/Heap": ["Heap operations", "Top-k problems", "Merging sorted streams"],
+    "Graph": ["Graph representations", "Topological sort", "Dijkstra's algorithm"],
+    "Dynamic Programming": ["Overlapping subproblems", "Memoization vs tabulation", "1D and 2D state design"],
+    "Miscellaneous": ["Time and space complexity", "Hashing", "Prefix sums"]
+}
+
+AREA_PRACTICE = {
+    "Binary Search": "binary-search",
+    "Two Pointers": "two-pointers",
+    "BFS": "breadth-first-search",
+    "DFS/Backtracking": "backtracking",
+    "Priority Queue/Heap": "heap-priority-queue",
+    "Graph": "graph",
+    "Dynamic Programming": "dynamic-programming",
+    "Miscellaneous": "hash-table"
+}
+
+# Hours for a week move by at most this fraction of the template's hours
+MAX_HOURS_ADJUSTMENT = 0.25
+
+
+def area_gap(areas, area):
+    """Return how many points an area's score is below its recommended level"""
+    score = (areas.get(area) or {}).get("score")
+    if score is None:
+        return 0
+    return SCORING_LOGIC["recommended_levels"].get(area, 0) - score
+
+
+def build_roadmap(roadmap_input):
+    """Build a roadmap skeleton from the template for the user's level
+
+    Week 1 stays first as the foundation; later weeks covering areas below
+    their recommended level move forward, weakest first, and every week's
+    hours are scaled by how far its areas are from their target.
+    """
+    evaluation = roadmap_input["evaluation"]
+    areas = evaluation.get("areas") or {}
+    level = roadmap_level(evaluation.get("score") or 0)
+    template = ROADMAP_TEMPLATES[level]
+
+    # The week's need is the largest gap among the areas it trains
+    weeks = []
+    for week in template["weekly_structure"]:
+        need = max(area_gap(areas, area) for area in week["areas"])
+        weeks.append((need, week))
+
+    first, rest = weeks[0], weeks[1:]
+    rest.sort(key=lambda item: (-max(item[0], 0), item[1]["week"]))
+
+    roadmap_weeks = []
+    for number, (need, week) in enumerate([first] + rest, start=1):
+        adjustment = max(-1.0, min(1.0, need / 50)) * MAX_HOURS_ADJUSTMENT
+        roadmap_weeks.append({
+            "week": number,
+            "focus": week["focus"],
+            "hours": round(week["hours_per_week"] * (1 + adjustment)),
+            "modules": week["modules"],
+            "lessons": week["lessons"],
+            "areas": list(week["areas"]),
+            "topics": [topic for area in week["areas"] for topic in AREA_TOPICS[area]][:4],
+            "resources": [{
+                "type": "Practice",
+                "title": f"{area} problem set",
+                "url": f"https://leetcode.com/tag/{AREA_PRACTICE[area]}/"
+            } for area in week["areas"]]
+        })
+
+    return {
+        "id": uuid4().hex,
+        "title": template["title"],
+        "level": level.title(),
+        "overall_score": evaluation.get("score"),
+        "weeks": roadmap_weeks,
+        "enrichment": "pending"
+    }
+
+
+def merge_enrichment(roadmap, enrichment):
+    """Return a copy of the roadmap with the agent's topics and resources per week"""
+    merged = copy.deepcopy(roadmap)
+    by_week = {item["week"]: item for item in enrichment.get("weeks", [])}
+    for week in merged["weeks"]:
+        item = by_week.get(week["week"])
+        if not item:
+            continue
+        if item.get("topics"):
+            week["topics"] = item["topics"]
+        if item.get("resources"):
+            week["resources"] = item["resources"]
+    merged["enrichment"] = "complete"
+    return merged
@@ -0,0 +1,117 @@
+"""LRU + TTL cache for generated roadmaps keyed by a bucketed user profile"""
+import copy
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from scoring import SCORING_LOGIC
+
+
+# Area scores are rounded to this step so near-identical results share a roadmap
+SCORE_BUCKET = 25
+
+
+def roadmap_level(score):
+    """Map an overall score to a roadmap_templates level"""
+    if score < 50:
+        return "beginner"
+    if score <= 75:
+        return "intermediate"
+    return "advanced"
+
+
+def bucket_score(score):
+    """Round a percentage to the nearest SCORE_BUCKET"""
+    try:
+        return int(round(float(score) / SCORE_BUCKET) * SCORE_BUCKET)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _enum(value):
+    """Normalise a profile field for use in a cache key"""
+    return str(value or "").strip().lower()
+
+
+def roadmap_fingerprint(roadmap_input):
+    """Return a canonical cache key for a generate_roadmap input"""
+    profile = roadmap_input.get("user_profile", {})
+    evaluation = roadmap_input.get("evaluation", {})
+    areas = evaluation.get("areas", {})
+
+    area_buckets = []
+    for area in SCORING_LOGIC["knowledge_areas"]:
+        area_data = areas.get(area) or {}
+        area_buckets.append(bucket_score(area_data.get("score")))
+
+    return json.dumps([
+        roadmap_level(evaluation.get("score") or 0),
+        area_buckets,
+        _enum(profile.get("experience")),
+        _enum(profile.get("education")),
+        _enum(profile.get("goal"))
+    ], separators=(",", ":"))
+
+
+class RoadmapCache:
+    """Thread-safe LRU cache with a per-entry time to live"""
+
+    def __init__(self, max_size=512, ttl=86400):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return a copy of the cached roadmap, or None on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                # Expired entries count as misses and are dropped
+                del self._entries[key]
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return copy.deepcopy(entry[1])
+
+    def __contains__(self, key):
+        """Return whether a live entry exists, without counting a lookup or refreshing it"""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and entry[0] >= time.monotonic()
+
+    def put(self, key, roadmap):
+        """Store a copy of a roadmap, evicting the least recently used entry"""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl,
+                                  copy.deepcopy(roadmap))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Remove every entry and reset the counters"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """Return size and hit/miss counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
+            }
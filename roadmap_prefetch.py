@@ -0,0 +1,88 @@
+"""Speculative roadmap jobs started as soon as an evaluation is stored
+
+The frontend asks for a roadmap right after every evaluation, so the agent's
+enrichment can start before it does. Each user has at most one job: a new
+evaluation or clear_session cancels the previous one, and generate_roadmap
+claims a job only if the profile and scores still produce the same roadmap.
+A job's future may be a concurrent.futures.Future or an asyncio.Task.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+class PrefetchJob:
+    """A roadmap skeleton and the future resolving to its enriched version"""
+
+    def __init__(self, key, roadmap, future):
+        self.key = key
+        self.roadmap = roadmap
+        self.future = future
+        self.started = time.monotonic()
+
+
+class RoadmapPrefetcher:
+    """Thread-safe per-user table of in-flight or finished roadmap jobs"""
+
+    def __init__(self, max_size=1024, ttl=600):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.started = 0
+        self.claimed = 0
+        self.dropped = 0
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _drop(self, job):
+        job.future.cancel()
+        self.dropped += 1
+
+    def add(self, user_id, key, roadmap, future):
+        """Register a user's job, cancelling any job it replaces"""
+        now = time.monotonic()
+        with self._lock:
+            previous = self._jobs.pop(user_id, None)
+            if previous is not None:
+                self._drop(previous)
+            self._jobs[user_id] = PrefetchJob(key, roadmap, future)
+            self.started += 1
+
+            # Unclaimed jobs expire, oldest first
+            while self._jobs:
+                user, job = next(iter(self._jobs.items()))
+                if len(self._jobs) <= self.max_size and now - job.started < self.ttl:
+                    break
+                del self._jobs[user]
+                self._drop(job)
+
+    def claim(self, user_id, key):
+        """Take the user's job if it was started for this roadmap key, else None
+
+        A job for a different key is stale and is cancelled.
+        """
+        with self._lock:
+            job = self._jobs.pop(user_id, None)
+            if job is None:
+                return None
+            if job.key != key or job.future.cancelled():
+                self._drop(job)
+                return None
+            self.claimed += 1
+            return job
+
+    def cancel(self, user_id):
+        """Cancel the user's job; one already running finishes but is never used"""
+        with self._lock:
+            job = self._jobs.pop(user_id, None)
+            if job is not None:
+                self._drop(job)
+
+    def stats(self):
+        """Return the number of pending jobs and job counters"""
+        with self._lock:
+            return {
+                "pending": len(self._jobs),
+                "started": self.started,
+                "claimed": self.claimed,
+                "dropped": self.dropped
+            }
@@ -0,0 +1,146 @@
+"""Deterministic local scoring of assessment answers"""
+from question_bank import get_bank
+
+
+SCORING_LOGIC = {
+    "knowledge_areas": [
+        "Binary Search",
+        "Two Pointers",
+        "BFS",
+        "DFS/Backtracking",
+        "Priority Queue/Heap",
+        "Graph",
+        "Dynamic Programming",
+        "Miscellaneous"
+    ],
+    "weight_by_area": {
+        "Binary Search": 1.0,
+        "Two Pointers": 1.0,
+        "BFS": 1.0,
+        "DFS/Backtracking": 1.0,
+        "Priority Queue/Heap": 1.0,
+        "Graph": 1.0,
+        "Dynamic Programming": 1.0,
+        "Miscellaneous": 1.0
+    },
+    "recommended_levels": {
+        "Binary Search": 80,
+        "Two Pointers": 75,
+        "BFS": 70,
+        "DFS/Backtracking": 65,
+        "Priority Queue/Heap": 70,
+        "Graph": 65,
+        "Dynamic Programming": 60,
+        "Miscellaneous": 75
+    }
+}
+
+
+def normalize_answer(answer):
+    """Turn an answer like "A", "a, d" or ["A", "D"] into a frozenset of option ids"""
+    if answer is None:
+        return frozenset()
+    if isinstance(answer, (list, tuple, set, frozenset)):
+        parts = answer
+    else:
+        parts = str(answer).split(',')
+    return frozenset(str(part).strip().upper() for part in parts if str(part).strip())
+
+
+def format_answer(answer):
+    """Return the answer in the "A,D" string form used by correctAnswer"""
+    if answer is None or isinstance(answer, str):
+        return answer
+    return ",".join(sorted(normalize_answer(answer)))
+
+
+def area_feedback(area, score, recommended):
+    """Return a short deterministic feedback sentence for a knowledge area"""
+    if score >= recommended:
+        return f"Great work! Your {area} score meets the recommended level of {recommended}%."
+    if score >= recommended - 25:
+        return f"You're close on {area}. A little more practice will get you to the recommended {recommended}%."
+    return f"{area} needs attention. Focus on the fundamentals to reach the recommended {recommended}%."
+
+
+def score_answers(questions, answers):
+    """Score answers (aligned with questions by index) against the question bank
+
+    Returns a dict with the same shape the evaluation endpoint has always
+    returned: overall "score", per-area "areas" and per-question "review".
+    """
+    return score_cohort(questions, [answers])[0]
+
+
+def score_cohort(questions, answer_sets):
+    """Score many users' answers to the same questions in one pass
+
+    Each question's bank entry, answer key and weight is resolved once and
+    graded for every user, then results are aggregated per user. Returns
+    one score_answers-shaped dict per answer list.
+    """
+    weights = SCORING_LOGIC["weight_by_area"]
+    recommended_levels = SCORING_LOGIC["recommended_levels"]
+
+    # Always grade against the bank, never against client-supplied data
+    bank = get_bank()
+    columns = []
+    for index, question in enumerate(questions):
+        bank_question = bank.get(question.get("id"))
+        if bank_question is not None:
+            columns.append((index, bank_question, normalize_answer(bank_question["correctAnswer"]),
+                            weights.get(bank_question["area"], 1.0)))
+
+    # grades[column][user] is (correct, formatted answer)
+    grades = []
+    for index, bank_question, key, weight in columns:
+        column = []
+        for answers in answer_sets:
+            user_answer = answers[index] if index < len(answers) else None
+            column.append((normalize_answer(user_answer) == key, format_answer(user_answer)))
+        grades.append(column)
+
+    results = []
+    for user in range(len(answer_sets)):
+        correct_by_area = {area: 0 for area in SCORING_LOGIC["knowledge_areas"]}
+        total_by_area = {area: 0 for area in SCORING_LOGIC["knowledge_areas"]}
+        weighted_correct = 0.0
+        weighted_total = 0.0
+        review = []
+
+        for (index, bank_question, key, weight), column in zip(columns, grades):
+            correct, user_answer = column[user]
+            area = bank_question["area"]
+            total_by_area[area] = total_by_area.get(area, 0) + 1
+            weighted_total += weight
+            if correct:
+                correct_by_area[area] = correct_by_area.get(area, 0) + 1
+                weighted_correct += weight
+
+            review.append({
+                "question_id": bank_question["id"],
+                "correct": correct,
+                "user_answer": user_answer,
+                "explanation": bank_question["explanation"]
+            })
+
+        areas = {}
+        for area, total in total_by_area.items():
+            score = round(100 * correct_by_area[area] / total) if total else 0
+            recommended = recommended_levels.get(area, 0)
+            areas[area] = {
+                "score": score,
+                "recommended": recommended,
+                "feedback": area_feedback(area, score, recommended)
+            }
+
+        overall = round(100 * weighted_correct /
+                        weighted_total) if weighted_total else 0
+
+        results.append({
+            "score": overall,
+            "areas": areas,
+            "review": review
+        })
+
+    return results
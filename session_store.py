@@ -0,0 +1,243 @@
+"""Per-user session records and the stores that hold them"""
+import json
+import os
+from abc import ABC, abstractmethod
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field, fields
+from datetime import datetime
+
+
+def _now():
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+@dataclass(slots=True)
+class SessionRecord:
+    """Everything the app tracks for one user between requests"""
+    experience: str = None
+    education: str = None
+    goal: str = None
+    # Questions are served from the shared bank, so only their ids are kept
+    question_ids: list = field(default_factory=list)
+    answers: list = field(default_factory=list)
+    # True while question_ids are served one at a time by the adaptive test
+    adaptive: bool = False
+    score: int = None
+    areas: dict = field(default_factory=dict)
+    review: list = field(default_factory=list)
+    roadmap: dict = None
+    roadmaps_generated: int = 0
+    # The last few chat turns; older ones are folded into chat_summary
+    chat_history: list = field(default_factory=list)
+    chat_summary: str = ""
+    session_start: str = field(default_factory=_now)
+
+    def to_json(self):
+        """Serialise the record compactly"""
+        return json.dumps(asdict(self), separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, data):
+        """Rebuild a record, ignoring fields this version doesn't know about"""
+        values = json.loads(data)
+        known = {f.name for f in fields(cls)}
+        return cls(**{key: value for key, value in values.items() if key in known})
+
+
+class SessionStore(ABC):
+    """Interface shared by the session backends
+
+    ``get`` returns None for unknown or expired users. Records are plain
+    values: after changing one, call ``save`` so every backend persists it.
+    """
+
+    @abstractmethod
+    def get(self, user_id):
+        """Return the user's record, or None"""
+
+    @abstractmethod
+    def save(self, user_id, record):
+        """Store the user's record"""
+
+    @abstractmethod
+    def delete(self, user_id):
+        """Remove the user's record if there is one"""
+
+    @abstractmethod
+    def __len__(self):
+        """Return the number of stored records"""
+
+    def __contains__(self, user_id):
+        return self.get(user_id) is not None
+
+
+class MemorySessionStore(SessionStore):
+    """In-process store with LRU eviction, an idle TTL and a memory cap"""
+
+    def __init__(self, max_entries=10000, ttl=86400, max_bytes=64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            record, size, last_access = entry
+            if time.monotonic() - last_access > self.ttl:
+                self._remove(user_id)
+                return None
+            self._entries[user_id] = (record, size, time.monotonic())
+            self._entries.move_to_end(user_id)
+            return record
+
+    def save(self, user_id, record):
+        # The serialised size is a cheap, stable estimate of the record's footprint
+        size = len(record.to_json())
+        with self._lock:
+            if user_id in self._entries:
+                self._remove(user_id)
+            self._entries[user_id] = (record, size, time.monotonic())
+            self._bytes += size
+            while self._entries and (len(self._entries) > self.max_entries or
+                                     self._bytes > self.max_bytes):
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def delete(self, user_id):
+        with self._lock:
+            if user_id in self._entries:
+                self._remove(user_id)
+
+    def _remove(self, user_id):
+        _, size, _ = self._entries.pop(user_id)
+        self._bytes -= size
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        """Return entry count, estimated bytes and evictions"""
+        with self._lock:
+            return {
+                "sessions": len(self._entries),
+                "bytes": self._bytes,
+                "evictions": self.evictions
+            }
+
+
+class SQLiteSessionStore(SessionStore):
+    """SQLite store in WAL mode, shared by every worker process on one host"""
+
+    # Expired and excess rows are pruned once every this many saves
+    PRUNE_EVERY = 100
+
+    def __init__(self, path, max_entries=100000, ttl=86400):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._saves = 0
+        self._local = threading.local()
+        conn = self._connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""CREATE TABLE IF NOT EXISTS sessions (
+            user_id TEXT PRIMARY KEY,
+            data TEXT NOT NULL,
+            updated_at REAL NOT NULL
+        )""")
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS sessions_updated_at ON sessions (updated_at)")
+        conn.commit()
+
+    def _connection(self):
+        # sqlite3 connections can't be shared between threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, user_id):
+        row = self._connection().execute(
+            "SELECT data, updated_at FROM sessions WHERE user_id = ?", (user_id,)).fetchone()
+        if row is None or time.time() - row[1] > self.ttl:
+            return None
+        return SessionRecord.from_json(row[0])
+
+    def save(self, user_id, record):
+        conn = self._connection()
+        conn.execute(
+            "INSERT OR REPLACE INTO sessions (user_id, data, updated_at) VALUES (?, ?, ?)",
+            (user_id, record.to_json(), time.time()))
+        conn.commit()
+
+        self._saves += 1
+        if self._saves % self.PRUNE_EVERY == 0:
+            self.prune()
+
+    def delete(self, user_id):
+        conn = self._connection()
+        conn.execute("DELETE FROM sessions WHERE user_id = ?", (user_id,))
+        conn.commit()
+
+    def prune(self):
+        """Delete expired sessions and the oldest ones beyond max_entries"""
+        conn = self._connection()
+        conn.execute("DELETE FROM sessions WHERE updated_at < ?",
+                     (time.time() - self.ttl,))
+        conn.execute("""DELETE FROM sessions WHERE user_id IN (
+            SELECT user_id FROM sessions ORDER BY updated_at DESC LIMIT -1 OFFSET ?
+        )""", (self.max_entries,))
+        conn.commit()
+
+    def __len__(self):
+        return self._connection().execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+
+class DictSessionStore(SessionStore):
+    """Unbounded dict-backed store for tests; records every save"""
+
+    def __init__(self):
+        self.records = {}
+        self.saves = []
+
+    def get(self, user_id):
+        return self.records.get(user_id)
+
+    def save(self, user_id, record):
+        self.records[user_id] = record
+        self.saves.append(user_id)
+
+    def delete(self, user_id):
+        self.records.pop(user_id, None)
+
+    def __len__(self):
+        return len(self.records)
+
+
+def create_session_store():
+    """Build the session store selected by the SESSION_STORE environment variable"""
+    backend = os.environ.get('SESSION_STORE', 'memory')
+    ttl = int(os.environ.get('SESSION_TTL', 86400))
+
+    if backend == 'sqlite':
+        return SQLiteSessionStore(
+            os.environ.get('SESSION_DB', 'sessions.db'),
+            max_entries=int(os.environ.get('SESSION_MAX_ENTRIES', 100000)),
+            ttl=ttl)
+    if backend == 'dict':
+        return DictSessionStore()
+    return MemorySessionStore(
+        max_entries=int(os.environ.get('SESSION_MAX_ENTRIES', 10000)),
+        ttl=ttl,
+        max_bytes=int(os.environ.get('SESSION_MAX_BYTES', 64 * 1024 * 1024)))
@@ -9,6 +9,9 @@ const appState = {
   questions: [],
   currentQuestionIndex: 0,
   answers: [],
+  // Adaptive mode asks one question at a time, chosen by the server
+  adaptive: document.body.dataset.assessmentMode === 'adaptive',
+  adaptiveProgress: null,
   
   // Results data
   evaluationResults: null,
@@ -79,7 +82,10 @@ const DOM = {
   chatInput: document.getElementById('chat-input'),
   sendMessageBtn: document.getElementById('send-message-btn'),
   backToRoadmapBtn: document.getElementById('back-to-roadmap-btn'),
-  openChatBtn: document.getElementById('open-chat-btn')
+  openChatBtn: document.getElementById('open-chat-btn'),
+
+  // Shown while the server answers without the learning assistant
+  degradedBanner: document.getElementById('degraded-banner')
 
   
 };
@@ -174,12 +180,15 @@ async function sendChatMessage() {
     // Add user message to chat
     addMessageToChat('user', messageText);
     
-    // Show typing indicator
+    // Show typing indicator until the first token arrives
     showTypingIndicator();
     
+    let assistantMessage = null;
+    let responseText = '';
+    
     try {
-        // Send message to the agent via API
-        const response = await fetch('/api/chat', {
+        // Stream the agent's reply as server-sent events
+        const response = await fetch('/api/chat/stream', {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json'
@@ -196,17 +205,52 @@ async function sendChatMessage() {
             })
         });
         
-        // Remove typing indicator
-        hideTypingIndicator();
-        
-        if (!response.ok) {
+        if (!response.ok || !response.body) {
             throw new Error('Failed to get response from assistant');
         }
         
-        const data = await response.json();
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        
+        while (true) {
+            const { done, value } = await reader.read();
+            if (done) break;
+            
+            buffer += decoder.decode(value, { stream: true });
+            
+            // Events are separated by a blank line
+            const events = buffer.split('\n\n');
+            buffer = events.pop();
+            
+            for (const event of events) {
+                if (!event.startsWith('data: ')) continue;
+                const data = JSON.parse(event.slice(6));
+                
+                if (data.error) {
+                    throw new Error(data.error);
+                }
+                
+                if (data.delta) {
+                    responseText += data.delta;
+                } else if (data.done) {
+                    responseText = data.response;
+                    updateDegradedNotice(data);
+                }
+                
+                // Replace the typing indicator with the message on the first token
+                if (!assistantMessage) {
+                    hideTypingIndicator();
+                    assistantMessage = addMessageToChat('assistant', responseText);
+                } else {
+                    updateChatMessage(assistantMessage, responseText);
+                }
+            }
+        }
         
-        // Add agent response to chat
-        addMessageToChat('assistant', data.response);
+        if (!assistantMessage) {
+            throw new Error('Empty response from assistant');
+        }
         
         // Save to chat history
         appState.chatHistory.push({
@@ -216,7 +260,7 @@ async function sendChatMessage() {
         
         appState.chatHistory.push({
             role: 'assistant',
-            content: data.response
+            content: responseText
         });
         
     } catch (error) {
@@ -226,7 +270,12 @@ async function sendChatMessage() {
         hideTypingIndicator();
         
         // Show error message
-        addMessageToChat('assistant', 'Sorry, I encountered an error processing your request. Please try again.');
+        const errorText = 'Sorry, I encountered an error processing your request. Please try again.';
+        if (assistantMessage) {
+            updateChatMessage(assistantMessage, errorText);
+        } else {
+            addMessageToChat('assistant', errorText);
+        }
     }
     
     // Scroll to bottom of chat
@@ -238,12 +287,8 @@ function addMessageToChat(role, content) {
     const messageDiv = document.createElement('div');
     messageDiv.className = `message ${role}-message`;
     
-    // Process content for code blocks
-    const processedContent = processCodeBlocks(content);
-    
     const messageContent = document.createElement('div');
     messageContent.className = 'message-content';
-    messageContent.innerHTML = processedContent;
     
     messageDiv.appendChild(messageContent);
     DOM.chatMessages.appendChild(messageDiv);
@@ -253,12 +298,30 @@ function addMessageToChat(role, content) {
     clearDiv.style.clear = 'both';
     DOM.chatMessages.appendChild(clearDiv);
     
+    updateChatMessage(messageDiv, content);
+    
+    return messageDiv;
+}
+
+// Re-render a chat message, e.g. as streamed tokens arrive
+function updateChatMessage(messageDiv, content) {
+    const messageContent = messageDiv.querySelector('.message-content');
+    
+    // Process content for code blocks
+    messageContent.innerHTML = processCodeBlocks(content);
+    
     // Scroll to bottom
     scrollChatToBottom();
 }
 
 // Process code blocks in the message content
 function processCodeBlocks(content) {
+    // A partially streamed message may end inside an unclosed code block
+    const fenceCount = (content.match(/```/g) || []).length;
+    if (fenceCount % 2 === 1) {
+        content += '```';
+    }
+    
     // Simple regex for code blocks (```code```)
     return content.replace(/```([\s\S]*?)```/g, '<div class="code-block">$1</div>');
 }
@@ -298,6 +361,11 @@ function hideTypingIndicator() {
     appState.isTyping = false;
 }
 
+// Show the notice while responses come from local data because the assistant is unavailable
+function updateDegradedNotice(data) {
+    DOM.degradedBanner.classList.toggle('hidden', !(data && data.degraded));
+}
+
 // Scroll chat to bottom
 function scrollChatToBottom() {
     DOM.chatMessages.scrollTop = DOM.chatMessages.scrollHeight;
@@ -396,6 +464,10 @@ async function saveProfile() {
 
 // Fetch Questions from Server
 async function fetchQuestions() {
+  if (appState.adaptive) {
+      return startAdaptiveAssessment();
+  }
+
   try {
       const response = await fetch('/api/get_questions');
       
@@ -421,6 +493,83 @@ async function fetchQuestions() {
   }
 }
 
+// Start an adaptive assessment with the server's first question
+async function startAdaptiveAssessment() {
+  try {
+      const response = await fetch('/api/adaptive/start', { method: 'POST' });
+
+      if (!response.ok) {
+          throw new Error('Failed to start assessment');
+      }
+
+      const data = await response.json();
+      appState.questions = [data.question];
+      appState.answers = [null];
+      appState.adaptiveProgress = data.progress;
+
+      initializeAssessment();
+      showSection('assessment-section');
+  } catch (error) {
+      console.error('Error starting adaptive assessment:', error);
+      alert('There was an error loading the questions. Please try again.');
+      showSection('profile-section');
+  }
+}
+
+// Send the current answer; the server replies with the next question or the evaluation
+async function submitAdaptiveAnswer() {
+  const index = appState.currentQuestionIndex;
+  const answer = appState.answers[index];
+
+  if (answer === null) {
+      alert('Please choose an answer.');
+      return;
+  }
+
+  DOM.nextQuestionBtn.disabled = true;
+  DOM.nextQuestionBtn.textContent = 'Checking...';
+
+  try {
+      const response = await fetch('/api/adaptive/answer', {
+          method: 'POST',
+          headers: {
+              'Content-Type': 'application/json'
+          },
+          body: JSON.stringify({
+              question_id: appState.questions[index].id,
+              answer: answer
+          })
+      });
+
+      if (!response.ok) {
+          throw new Error('Failed to submit answer');
+      }
+
+      const data = await response.json();
+
+      if (data.question) {
+          appState.questions.push(data.question);
+          appState.answers.push(null);
+          appState.adaptiveProgress = data.progress;
+          appState.currentQuestionIndex++;
+          updateQuestionUI();
+          return;
+      }
+
+      // The assessment is finished
+      appState.evaluationResults = data;
+      appState.reviewData = data.review;
+      updateDegradedNotice(data);
+      showSection('results-section');
+  } catch (error) {
+      console.error('Error submitting answer:', error);
+      alert('There was an error submitting your answer. Please try again.');
+  } finally {
+      DOM.nextQuestionBtn.disabled = false;
+      DOM.nextQuestionBtn.textContent = 'Next';
+  }
+}
+
 // Initialize Assessment Section
 function initializeAssessment() {
   // Reset state
@@ -435,9 +584,17 @@ function updateQuestionUI() {
   const currentQuestion = appState.questions[appState.currentQuestionIndex];
   
   // Update progress and counter
-  const progressPercentage = ((appState.currentQuestionIndex + 1) / appState.questions.length) * 100;
-  DOM.progressValue.style.width = `${progressPercentage}%`;
-  DOM.questionCounter.textContent = `Question ${appState.currentQuestionIndex + 1} of ${appState.questions.length}`;
+  if (appState.adaptive) {
+      // Progress is the share of knowledge areas the server is done with
+      const areas = Object.values(appState.adaptiveProgress.areas);
+      const doneCount = areas.filter(area => area.done).length;
+      DOM.progressValue.style.width = `${(doneCount / Math.max(areas.length, 1)) * 100}%`;
+      DOM.questionCounter.textContent = `Question ${appState.currentQuestionIndex + 1}`;
+  } else {
+      const progressPercentage = ((appState.currentQuestionIndex + 1) / appState.questions.length) * 100;
+      DOM.progressValue.style.width = `${progressPercentage}%`;
+      DOM.questionCounter.textContent = `Question ${appState.currentQuestionIndex + 1} of ${appState.questions.length}`;
+  }
   
   // Update question text
   DOM.questionText.textContent = currentQuestion.question;
@@ -470,6 +627,14 @@ function updateQuestionUI() {
   
   // Update navigation buttons
   DOM.prevQuestionBtn.disabled = appState.currentQuestionIndex === 0;
+
+  // Adaptive answers are final, so only Next is shown
+  if (appState.adaptive) {
+      DOM.prevQuestionBtn.disabled = true;
+      DOM.nextQuestionBtn.classList.remove('hidden');
+      DOM.submitEvaluationBtn.classList.add('hidden');
+      return;
+  }
   
   // Show/hide next and submit buttons
   if (appState.currentQuestionIndex === appState.questions.length - 1) {
@@ -507,6 +672,11 @@ function goToPreviousQuestion() {
 }
 
 function goToNextQuestion() {
+  if (appState.adaptive) {
+      submitAdaptiveAnswer();
+      return;
+  }
+
   if (appState.currentQuestionIndex < appState.questions.length - 1) {
       appState.currentQuestionIndex++;
       updateQuestionUI();
@@ -534,7 +704,9 @@ async function submitEvaluation() {
               'Content-Type': 'application/json'
           },
           body: JSON.stringify({
-              answers: appState.answers
+              answers: appState.answers,
+              // Graded against the questions shown, even if the session was reset
+              question_ids: appState.questions.map(question => question.id)
           })
       });
       
@@ -547,6 +719,7 @@ async function submitEvaluation() {
       // Save evaluation results
       appState.evaluationResults = data;
       appState.reviewData = data.review;
+      updateDegradedNotice(data);
       
       // Show results section
       showSection('results-section');
@@ -681,12 +854,18 @@ async function generateRoadmap() {
       
       // Save roadmap data
       appState.roadmapData = data;
+      updateDegradedNotice(data);
       
       // Initialize roadmap section
       initializeRoadmapSection();
       
       // Show roadmap section
       showSection('roadmap-section');
+
+      // Topics and resources are personalised in the background
+      if (data.enrichment === 'pending') {
+          pollRoadmapEnrichment(data.id);
+      }
   } catch (error) {
       console.error('Error generating roadmap:', error);
       alert('There was an error generating your learning path. Please try again.');
@@ -694,6 +873,33 @@ async function generateRoadmap() {
   }
 }
 
+// Poll for the personalised topics and resources of a roadmap
+async function pollRoadmapEnrichment(roadmapId, attempt = 0) {
+  if (attempt >= 30) return;
+  await new Promise(resolve => setTimeout(resolve, 2000));
+
+  // Stop if the session was reset or a new roadmap was generated
+  if (!appState.roadmapData || appState.roadmapData.id !== roadmapId) return;
+
+  try {
+      const response = await fetch('/api/roadmap');
+      if (!response.ok) return;
+
+      const data = await response.json();
+      if (data.id !== roadmapId) return;
+
+      if (data.enrichment === 'pending') {
+          pollRoadmapEnrichment(roadmapId, attempt + 1);
+          return;
+      }
+
+      appState.roadmapData = data;
+      initializeRoadmapSection();
+  } catch (error) {
+      console.error('Error fetching roadmap:', error);
+  }
+}
+
 // Initialize Roadmap Section
 function initializeRoadmapSection() {
   const roadmap = appState.roadmapData;
@@ -835,7 +1041,7 @@ function initializeReviewSection() {
               optionElement.className = 'review-option correct';
           } else if (!item.correct && option.id === item.user_answer) {
               optionElement.className = 'review-option incorrect';
-          } else if (option.id === question.correctAnswer) {
+          } else if (option.id === (item.correct_answer || question.correctAnswer)) {
               optionElement.className = 'review-option correct';
           } else {
               optionElement.className = 'review-option neutral';
@@ -925,6 +1131,7 @@ function restartApplication() {
   appState.questions = [];
   appState.currentQuestionIndex = 0;
   appState.answers = [];
+  appState.adaptiveProgress = null;
   appState.evaluationResults = null;
   appState.reviewData = null;
   appState.roadmapData = null;
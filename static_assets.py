@@ -0,0 +1,184 @@
+"""Fingerprinted, precompressed static assets
+
+The stylesheet and script are copied to static/dist under names carrying a
+hash of their content (css/styles.<hash>.css), each with gzip and, when the
+brotli package is installed, brotli versions next to it. A manifest maps the
+source paths to those names; templates link assets with
+``asset_url('js/script.js')`` and the files are served from /dist/ with
+immutable cache headers, since any edit changes the name.
+
+The build is committed and shipped with the app (vercel.json includes
+static/**); rerun ``python static_assets.py`` after editing an asset. A
+build serves the encodings it was made with, so one made without brotli
+stays valid where brotli is installed. If the build is missing or stale it
+is redone on first use with the faster request-time compression levels,
+and kept in memory if static/ is read-only. If the sources cannot be read,
+asset_url falls back to the plain path.
+"""
+import hashlib
+import json
+import os
+import sys
+import threading
+
+from compression import ENCODINGS, compress
+
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+DIST_DIR = os.environ.get('ASSET_DIST_DIR', os.path.join(STATIC_DIR, 'dist'))
+
+# Source paths, relative to static/, that get fingerprinted
+ASSETS = ('css/styles.css', 'js/script.js')
+
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+SUFFIXES = {'gzip': '.gz', 'br': '.br'}
+
+MIMETYPES = {'.css': 'text/css',
+             '.js': 'text/javascript'}
+
+
+def _hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def fingerprinted_name(path, data):
+    """Return path with a short content hash before its extension"""
+    stem, ext = os.path.splitext(path)
+    return f"{stem}.{_hash(data)[:12]}{ext}"
+
+
+def _read_sources(static_dir, assets):
+    sources = {}
+    for path in assets:
+        with open(os.path.join(static_dir, path), 'rb') as f:
+            sources[path] = f.read()
+    return sources
+
+
+def build_assets(static_dir=STATIC_DIR, assets=ASSETS, best=True):
+    """Fingerprint and compress the assets; return the manifest and {name: {encoding: bytes}}
+
+    best uses the slowest, smallest compression, for builds made ahead of a deploy.
+    """
+    manifest = {"assets": {}, "sources": {}, "encodings": list(ENCODINGS)}
+    files = {}
+    for path, data in _read_sources(static_dir, assets).items():
+        name = fingerprinted_name(path, data)
+        manifest["assets"][path] = name
+        manifest["sources"][path] = _hash(data)
+        files[name] = {"identity": data}
+        for encoding in ENCODINGS:
+            files[name][encoding] = compress(data, encoding, best=best)
+    return manifest, files
+
+
+def write_assets(manifest, files, dist_dir=DIST_DIR):
+    """Write built assets and their manifest, replacing the manifest last"""
+    for name, variants in files.items():
+        for encoding, data in variants.items():
+            path = os.path.join(dist_dir, name + SUFFIXES.get(encoding, ''))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(data)
+    tmp_path = os.path.join(dist_dir, f"manifest.json.{os.getpid()}.tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, os.path.join(dist_dir, 'manifest.json'))
+
+
+def _read_build(dist_dir, sources):
+    """Return a fresh on-disk build as (manifest, files), or None"""
+    try:
+        with open(os.path.join(dist_dir, 'manifest.json')) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if manifest.get("sources") != {path: _hash(data) for path, data in sources.items()}:
+        return None
+
+    files = {}
+    try:
+        for name in manifest["assets"].values():
+            files[name] = {}
+            for encoding in ["identity"] + manifest.get("encodings", []):
+                with open(os.path.join(dist_dir, name + SUFFIXES.get(encoding, '')), 'rb') as f:
+                    files[name][encoding] = f.read()
+    except OSError:
+        return None
+    return manifest, files
+
+
+class AssetStore:
+    """Built assets held in memory, looked up by source path or fingerprinted name"""
+
+    def __init__(self, manifest, files):
+        self.manifest = manifest
+        self.files = files
+        self.encodings = tuple(manifest.get("encodings", ()))
+
+    def url(self, path):
+        """Return the URL of an asset, fingerprinted when it was built"""
+        name = self.manifest["assets"].get(path)
+        return f"/dist/{name}" if name else f"/{path}"
+
+    def variant(self, name, encoding):
+        """Return the bytes of an asset in an encoding (None for identity), or None"""
+        variants = self.files.get(name)
+        if variants is None:
+            return None
+        return variants.get(encoding or "identity")
+
+    @staticmethod
+    def mimetype(name):
+        return MIMETYPES.get(os.path.splitext(name)[1], 'application/octet-stream')
+
+
+def load_assets(static_dir=STATIC_DIR, dist_dir=DIST_DIR, assets=ASSETS):
+    """Load the asset build, redoing it first if it is missing or stale"""
+    try:
+        sources = _read_sources(static_dir, assets)
+    except OSError as e:
+        print(f"Could not read static assets ({e}), serving them unversioned")
+        return AssetStore({"assets": {}}, {})
+
+    build = _read_build(dist_dir, sources)
+    if build is not None:
+        return AssetStore(*build)
+
+    print(f"Static asset build in {dist_dir} is missing or stale, rebuilding")
+    manifest, files = build_assets(static_dir, assets, best=False)
+    try:
+        write_assets(manifest, files, dist_dir)
+    except OSError as e:
+        # Read-only deploys keep the build in memory instead
+        print(f"Could not write static assets ({e}), keeping them in memory")
+    return AssetStore(manifest, files)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_assets():
+    """Return the shared asset store, loading it on first use"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = load_assets()
+    return _store
+
+
+def asset_url(path):
+    """Template helper: the URL to link a static asset by its path under static/"""
+    return get_assets().url(path)
+
+
+if __name__ == "__main__":
+    target = sys.argv[1] if len(sys.argv) > 1 else DIST_DIR
+    manifest, files = build_assets()
+    write_assets(manifest, files, target)
+    for path, name in manifest["assets"].items():
+        sizes = ", ".join(f"{encoding} {len(data)}" for encoding, data in files[name].items())
+        print(f"{path} -> {name} ({sizes} bytes)")